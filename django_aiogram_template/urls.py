@@ -17,6 +17,9 @@ Including another URLconf
 from django.contrib import admin
 from django.urls import path
 
+from robot import views
+
 urlpatterns = [
     path('admin/', admin.site.urls),
+    path('scheduler/health/', views.scheduler_health, name='scheduler_health'),
 ]
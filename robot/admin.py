@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import TelegramUser, Task, TaskComment, Reminder, TaskAssignment, TaskCompletion, BotText
+from .models import TelegramUser, Task, TaskComment, Reminder, TaskAssignment, TaskCompletion, BotText, EscalationRule, NotificationLog, OutboxMessage, SchedulerLease, SchedulerNode, SchedulerJobRun
 
 # Register your models here.
 
@@ -7,7 +7,7 @@ from .models import TelegramUser, Task, TaskComment, Reminder, TaskAssignment, T
 @admin.register(TelegramUser)
 class TelegramUserAdmin(admin.ModelAdmin):
     list_display = ('username', 'first_name', 'telegram_id', 'is_admin', 'is_active')
-    list_filter = ('is_active', 'is_admin')
+    list_filter = ('is_active', 'is_admin', 'alert_mode')
     search_fields = ('telegram_id', 'first_name', 'username')
     ordering = ('username',)  # Добавьте эту строку для сортировки по умолчанию
 
@@ -29,7 +29,7 @@ class TaskCommentAdmin(admin.ModelAdmin):
 
 @admin.register(Reminder)
 class ReminderAdmin(admin.ModelAdmin):
-    list_display = ('task', 'reminder_time', 'is_sent')
+    list_display = ('task', 'reminder_time', 'is_sent', 'sent_at')
     list_filter = ('is_sent',)
 
 
@@ -53,3 +53,40 @@ class TaskCompletionAdmin(admin.ModelAdmin):
 class BotTextAdmin(admin.ModelAdmin):
     list_display = ('name', 'text')
     search_fields = ('name', 'text')
+
+
+@admin.register(NotificationLog)
+class NotificationLogAdmin(admin.ModelAdmin):
+    list_display = ('task', 'kind', 'recipient', 'deadline', 'status', 'attempts', 'sent_at')
+    list_filter = ('status', 'kind')
+    search_fields = ('task__title', 'recipient__first_name')
+
+
+@admin.register(EscalationRule)
+class EscalationRuleAdmin(admin.ModelAdmin):
+    list_display = ('name', 'offset', 'window', 'repeat', 'audience', 'is_active')
+    list_filter = ('audience', 'is_active')
+    search_fields = ('name', 'template', 'admin_template')
+
+
+@admin.register(OutboxMessage)
+class OutboxMessageAdmin(admin.ModelAdmin):
+    list_display = ('chat_id', 'status', 'attempts', 'available_at', 'sent_at', 'created_at')
+    list_filter = ('status',)
+    search_fields = ('chat_id', 'text', 'last_error')
+
+
+@admin.register(SchedulerLease)
+class SchedulerLeaseAdmin(admin.ModelAdmin):
+    list_display = ('name', 'holder', 'acquired_at', 'renewed_at', 'expires_at')
+
+
+@admin.register(SchedulerNode)
+class SchedulerNodeAdmin(admin.ModelAdmin):
+    list_display = ('name', 'started_at', 'heartbeat_at')
+
+
+@admin.register(SchedulerJobRun)
+class SchedulerJobRunAdmin(admin.ModelAdmin):
+    list_display = ('job', 'status', 'started_at', 'duration', 'scanned', 'attempted', 'sent', 'failed', 'node')
+    list_filter = ('job', 'status')
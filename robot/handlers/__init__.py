@@ -1,14 +1,21 @@
 from aiogram import Router
+from ..middlewares import UserMiddleware
 from .start_handler import start_router
 from .admin_handler import admin_router
 from .task_creation_handler import task_creation_router
 from .navigation_handler import navigation_router
 from .task_management_handler import task_management_router
 from .report_handler import report_router
+from .search_handler import search_router
 
 router = Router()
 
+user_middleware = UserMiddleware()
+router.message.outer_middleware(user_middleware)
+router.callback_query.outer_middleware(user_middleware)
+
 router.include_router(start_router)
+router.include_router(search_router)
 router.include_router(admin_router)
 router.include_router(task_creation_router)
 router.include_router(navigation_router)
@@ -1,48 +1,45 @@
 from aiogram import Router, F
 from aiogram.types import CallbackQuery, Message
 from aiogram.fsm.context import FSMContext
-from ..utils import identify_user
 from asgiref.sync import sync_to_async
 from ..models import Task, TelegramUser
 from datetime import datetime, timedelta
 from ..keyboards.admin_keyboards import (
     get_admin_settings_keyboard,
+    get_notification_settings_keyboard,
+    get_scheduler_health_keyboard,
     get_admin_task_list_keyboard,
     get_admin_statistics_keyboard,
     get_users_list_keyboard,
     get_user_stats_keyboard
 )
 from django.utils import timezone
+from zoneinfo import ZoneInfo
 from ..utils.logger import logger
+from ..utils.message_utils import safe_edit_message
+from ..notifications import get_digest_page
+from ..schedulers.monitor import get_health_report
 import logging
 
 admin_router = Router()
 
 @admin_router.callback_query(F.data == "tasks")
-async def handle_admin_tasks(callback: CallbackQuery):
-    user, _ = await identify_user(callback.from_user.id)
-    
-    if not user.is_admin:
+async def handle_admin_tasks(callback: CallbackQuery, is_admin: bool):
+    if not is_admin:
         await callback.answer("You do not have access!", show_alert=True)
         return
 
     keyboard = get_admin_task_list_keyboard()
-    try:
-        await callback.message.edit_text("🗂 Task management:", reply_markup=keyboard)
-    except Exception as e:
-        logging.error(f"Error in handle_admin_tasks: {e}")
-        await callback.message.answer("🗂 Task management:", reply_markup=keyboard)
+    await safe_edit_message(callback.message, "🗂 Task management:", keyboard)
     await callback.answer()
 
 @admin_router.callback_query(F.data == "statistics")
-async def handle_admin_statistics(callback: CallbackQuery):
+async def handle_admin_statistics(callback: CallbackQuery, is_admin: bool):
     user_id = callback.from_user.id
     logger.info(f"Admin {user_id} accessing statistics")
     
     try:
-        user, _ = await identify_user(user_id)
-        
-        if not user.is_admin:
+        if not is_admin:
             logger.warning(f"Unauthorized statistics access attempt by user {user_id}")
             await callback.answer("You do not have access!", show_alert=True)
             return
@@ -74,10 +71,7 @@ async def handle_admin_statistics(callback: CallbackQuery):
         )
         
         keyboard = get_admin_statistics_keyboard()
-        try:
-            await callback.message.edit_text(stats_text, reply_markup=keyboard)
-        except Exception as e:
-            await callback.message.answer(stats_text, reply_markup=keyboard)
+        await safe_edit_message(callback.message, stats_text, keyboard)
         await callback.answer()
         logger.info(f"Successfully displayed statistics for admin {user_id}")
         
@@ -86,9 +80,7 @@ async def handle_admin_statistics(callback: CallbackQuery):
         await callback.answer("Error in loading statistics")
 
 @admin_router.callback_query(F.data == "settings")
-async def handle_admin_settings(callback: CallbackQuery):
-    user, _ = await identify_user(callback.from_user.id)
-    
+async def handle_admin_settings(callback: CallbackQuery, user: TelegramUser):
     if not user.is_admin:
         await callback.answer("You do not have access", show_alert=True)
         return
@@ -102,10 +94,115 @@ async def handle_admin_settings(callback: CallbackQuery):
     )
     
     keyboard = get_admin_settings_keyboard()
-    try:
-        await callback.message.edit_text(settings_text, reply_markup=keyboard)
-    except Exception as e:
-        await callback.message.answer(settings_text, reply_markup=keyboard)
+    await safe_edit_message(callback.message, settings_text, keyboard)
+    await callback.answer()
+
+def get_notification_settings_text(user: TelegramUser) -> str:
+    return (
+        "🔔 Notification settings:\n\n"
+        f"Notifications: {'ON' if user.notification_enabled else 'OFF'}\n"
+        f"Scheduler alerts: {user.get_alert_mode_display()}\n\n"
+        "⚡ Immediate — a message for every task that needs attention\n"
+        "🗞 Digest — one message per check listing all such tasks"
+    )
+
+
+async def show_notification_settings(callback: CallbackQuery, user: TelegramUser):
+    await safe_edit_message(
+        callback.message,
+        get_notification_settings_text(user),
+        get_notification_settings_keyboard(user)
+    )
+    await callback.answer()
+
+
+@admin_router.callback_query(F.data == "notification_settings")
+async def handle_notification_settings(callback: CallbackQuery, user: TelegramUser):
+    if not user.is_admin:
+        await callback.answer("You do not have access", show_alert=True)
+        return
+
+    await show_notification_settings(callback, user)
+
+
+@admin_router.callback_query(F.data == "toggle_notifications")
+async def handle_toggle_notifications(callback: CallbackQuery, user: TelegramUser):
+    if not user.is_admin:
+        await callback.answer("You do not have access", show_alert=True)
+        return
+
+    user.notification_enabled = not user.notification_enabled
+    # save() rather than update() so the signals drop the cached user and admin list
+    await sync_to_async(user.save)(update_fields=['notification_enabled'])
+    logger.info(f"Admin {user.telegram_id} turned notifications {'on' if user.notification_enabled else 'off'}")
+    await show_notification_settings(callback, user)
+
+
+@admin_router.callback_query(F.data.startswith("alert_mode:"))
+async def handle_alert_mode(callback: CallbackQuery, user: TelegramUser):
+    if not user.is_admin:
+        await callback.answer("You do not have access", show_alert=True)
+        return
+
+    mode = callback.data.split(":")[1]
+    if mode not in dict(TelegramUser.ALERT_MODE_CHOICES):
+        await callback.answer()
+        return
+
+    user.alert_mode = mode
+    await sync_to_async(user.save)(update_fields=['alert_mode'])
+    logger.info(f"Admin {user.telegram_id} switched scheduler alerts to {mode}")
+    await show_notification_settings(callback, user)
+
+
+@admin_router.callback_query(F.data.startswith("digest_page:"))
+async def handle_digest_page(callback: CallbackQuery, user: TelegramUser):
+    _, digest_id, page = callback.data.split(":")
+    digest = await get_digest_page(int(digest_id), user, int(page))
+    if digest is None:
+        await callback.answer("This digest is no longer available", show_alert=True)
+        return
+
+    text, keyboard = digest
+    await safe_edit_message(callback.message, text, keyboard)
+    await callback.answer()
+
+STATUS_ICONS = {'ok': "✅", 'failed': "❌", 'misfired': "⏭", 'overlapped': "⏸"}
+
+
+def render_scheduler_health(report: dict) -> str:
+    text = "🩺 Scheduler health\n"
+    for lease in report['leases']:
+        state = "active" if lease['expires_at'] > report['generated_at'] else "expired"
+        text += f"👑 Leader: {lease['holder'] or 'nobody'} ({state})\n"
+    if report['nodes']:
+        text += f"🧩 Sharded nodes: {len(report['nodes'])}\n"
+
+    if not report['jobs']:
+        return text + "\nNo job runs recorded yet."
+
+    for job in report['jobs']:
+        last_run = job['last_started_at'].astimezone(ZoneInfo("Europe/Moscow")).strftime('%m/%d/%Y %I:%M %p')
+        text += (
+            f"\n{STATUS_ICONS.get(job['last_status'], '❔')} {job['job']} — last run {last_run}\n"
+            f"   Runs: {job['runs']} · failed: {job['failures']} · misfired: {job['misfires']} · overlapped: {job['overlaps']}\n"
+            f"   Avg {job['avg_duration'] or 0:.2f}s · max {job['max_duration'] or 0:.2f}s\n"
+            f"   Tasks: {job['scanned'] or 0} · notifications: {job['attempted'] or 0} · "
+            f"messages: {job['sent'] or 0} · errors: {job['failed'] or 0}\n"
+        )
+        if job['last_status'] == 'failed' and job['last_error']:
+            text += f"   ⚠️ {job['last_error'][:200]}\n"
+    return text
+
+
+@admin_router.callback_query(F.data == "scheduler_health")
+async def handle_scheduler_health(callback: CallbackQuery, is_admin: bool):
+    if not is_admin:
+        await callback.answer("You do not have access!", show_alert=True)
+        return
+
+    report = await get_health_report()
+    await safe_edit_message(callback.message, render_scheduler_health(report), get_scheduler_health_keyboard())
     await callback.answer()
 
 @sync_to_async
@@ -124,10 +221,8 @@ def get_user_statistics(user: TelegramUser):
     }
 
 @admin_router.callback_query(F.data == "users")
-async def show_users_menu(callback: CallbackQuery, state: FSMContext):
-    user, _ = await identify_user(callback.from_user.id)
-    
-    if not user.is_admin:
+async def show_users_menu(callback: CallbackQuery, state: FSMContext, is_admin: bool):
+    if not is_admin:
         await callback.answer("You do not have access!", show_alert=True)
         return
     
@@ -141,18 +236,12 @@ async def show_users_menu(callback: CallbackQuery, state: FSMContext):
     
     users = await get_regular_users()
     keyboard = get_users_list_keyboard(users)
-    try:
-        await callback.message.edit_text("👥 Список пользователей:", reply_markup=keyboard)
-    except Exception as e:
-        logging.error(f"Error in show_users_menu: {e}")
-        await callback.message.answer("👥 Список пользователей:", reply_markup=keyboard)
+    await safe_edit_message(callback.message, "👥 Список пользователей:", keyboard)
     await callback.answer()
 
 @admin_router.callback_query(F.data.startswith("user_stats:"))
-async def show_user_stats(callback: CallbackQuery, state: FSMContext):
-    admin, _ = await identify_user(callback.from_user.id)
-    
-    if not admin.is_admin:
+async def show_user_stats(callback: CallbackQuery, state: FSMContext, is_admin: bool):
+    if not is_admin:
         await callback.answer("У вас нет прав администратора!", show_alert=True)
         return
     
@@ -186,10 +275,7 @@ async def show_user_stats(callback: CallbackQuery, state: FSMContext):
     )
     
     keyboard = get_user_stats_keyboard()
-    try:
-        await callback.message.edit_text(stats_text, reply_markup=keyboard)
-    except Exception as e:
-        await callback.message.answer(stats_text, reply_markup=keyboard)
+    await safe_edit_message(callback.message, stats_text, keyboard)
     await callback.answer()
 
 @admin_router.callback_query(F.data.startswith("users_page:"))
@@ -206,9 +292,5 @@ async def handle_users_pagination(callback: CallbackQuery, state: FSMContext):
     
     users = await get_regular_users()
     keyboard = get_users_list_keyboard(users, page=page)
-    try:
-        await callback.message.edit_text("👥 Users list:", reply_markup=keyboard)
-    except Exception as e:
-        logging.warning(f"Error in handle_users_pagination: {e}")
-        await callback.message.answer("👥 Users list:", reply_markup=keyboard)
+    await safe_edit_message(callback.message, "👥 Users list:", keyboard)
     await callback.answer() 
\ No newline at end of file
@@ -1,7 +1,6 @@
 from aiogram import Router, F
 from aiogram.types import CallbackQuery
 from aiogram.fsm.context import FSMContext
-from ..utils import identify_user
 from ..models import Task, TelegramUser
 from ..keyboards.report_keyboards import get_report_keyboard
 from asgiref.sync import sync_to_async
@@ -11,6 +10,7 @@ import gspread
 from oauth2client.service_account import ServiceAccountCredentials
 import os
 from ..utils.logger import logger
+from ..utils.message_utils import safe_edit_message
 from zoneinfo import ZoneInfo
 
 report_router = Router()
@@ -74,10 +74,8 @@ async def export_to_sheets():
     sheet.update('A1', data)
 
 @report_router.callback_query(F.data == "reports")
-async def show_reports_menu(callback: CallbackQuery):
-    user, _ = await identify_user(callback.from_user.id)
-    
-    if not user.is_admin:
+async def show_reports_menu(callback: CallbackQuery, is_admin: bool):
+    if not is_admin:
         await callback.answer("У вас нет прав администратора!", show_alert=True)
         return
     
@@ -93,21 +91,16 @@ async def show_reports_menu(callback: CallbackQuery):
     )
     
     keyboard = get_report_keyboard()
-    try:
-        await callback.message.edit_text(report_text, reply_markup=keyboard)
-    except Exception as e:
-        await callback.message.answer(report_text, reply_markup=keyboard)
+    await safe_edit_message(callback.message, report_text, keyboard)
     await callback.answer()
 
 @report_router.callback_query(F.data == "export_report")
-async def handle_export_report(callback: CallbackQuery):
+async def handle_export_report(callback: CallbackQuery, is_admin: bool):
     user_id = callback.from_user.id
     logger.info(f"Admin {user_id} attempting to export report")
     
     try:
-        user, _ = await identify_user(user_id)
-        
-        if not user.is_admin:
+        if not is_admin:
             logger.warning(f"Unauthorized report export attempt by user {user_id}")
             await callback.answer("You do not have access!", show_alert=True)
             return
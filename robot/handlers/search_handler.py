@@ -0,0 +1,94 @@
+from aiogram import Router, F
+from aiogram.filters import Command, CommandObject
+from aiogram.fsm.context import FSMContext
+from aiogram.types import CallbackQuery, Message
+from aiogram.utils.keyboard import InlineKeyboardBuilder
+
+from ..keyboards.task_list_keyboards import get_search_results_keyboard
+from ..services.task_search import search_tasks
+from ..states.task_states import TaskSearch
+from ..utils.logger import logger
+from ..utils.message_utils import safe_edit_message
+
+search_router = Router()
+
+
+def get_search_prompt_keyboard():
+    builder = InlineKeyboardBuilder()
+    builder.button(text="◀️ Back", callback_data="tasks")
+    return builder.as_markup()
+
+
+def get_search_text(query: str, tasks) -> str:
+    if not tasks.total:
+        return f"🔍 Nothing found for «{query}»"
+    return f"🔍 Found {tasks.total} task(s) for «{query}»:"
+
+
+async def show_search_results(message: Message, state: FSMContext, query: str, page: int = 1, edit: bool = False):
+    tasks = await search_tasks(query, page)
+    logger.info(f"Search «{query}» page {page}: {tasks.total} result(s)")
+    await state.set_state(None)
+    await state.update_data(search_query=query)
+
+    text = get_search_text(query, tasks)
+    keyboard = get_search_results_keyboard(tasks)
+    if edit:
+        await safe_edit_message(message, text, keyboard)
+    else:
+        await message.answer(text, reply_markup=keyboard)
+
+
+@search_router.message(Command("search"))
+async def handle_search_command(message: Message, command: CommandObject, state: FSMContext, is_admin: bool):
+    if not is_admin:
+        await message.answer("You do not have access!")
+        return
+
+    if command.args:
+        await show_search_results(message, state, command.args.strip())
+        return
+
+    await state.set_state(TaskSearch.waiting_for_query)
+    await message.answer("🔍 Enter words to search in task titles, descriptions and comments:", reply_markup=get_search_prompt_keyboard())
+
+
+@search_router.callback_query(F.data == "search_tasks")
+async def handle_search_button(callback: CallbackQuery, state: FSMContext, is_admin: bool):
+    if not is_admin:
+        await callback.answer("You do not have access!", show_alert=True)
+        return
+
+    await state.set_state(TaskSearch.waiting_for_query)
+    await safe_edit_message(
+        callback.message,
+        "🔍 Enter words to search in task titles, descriptions and comments:",
+        get_search_prompt_keyboard()
+    )
+    await callback.answer()
+
+
+@search_router.message(TaskSearch.waiting_for_query, F.text)
+async def handle_search_query(message: Message, state: FSMContext):
+    try:
+        await show_search_results(message, state, message.text.strip())
+    except Exception as e:
+        logger.error(f"Error in handle_search_query: {str(e)}", exc_info=True)
+        await message.answer("❌ Error in searching tasks")
+
+
+@search_router.callback_query(F.data.startswith("search_page:"))
+async def handle_search_pagination(callback: CallbackQuery, state: FSMContext, is_admin: bool):
+    if not is_admin:
+        await callback.answer("You do not have access!", show_alert=True)
+        return
+
+    data = await state.get_data()
+    query = data.get('search_query')
+    if not query:
+        await callback.answer("Search expired, please search again", show_alert=True)
+        return
+
+    page = int(callback.data.split(":")[1])
+    await show_search_results(callback.message, state, query, page, edit=True)
+    await callback.answer()
@@ -1,7 +1,8 @@
 from aiogram import Router
 from aiogram.filters import Command
 from aiogram.types import Message
-from robot.utils import get_text_by_name, identify_user
+from robot.utils import get_text_by_name
+from robot.models import TelegramUser
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
 from aiogram.utils.keyboard import InlineKeyboardBuilder
 from django.db.models.query import sync_to_async
@@ -27,9 +28,7 @@ def get_user_keyboard() -> InlineKeyboardMarkup:
 
 
 @start_router.message(Command("start"))
-async def handle_start(message: Message):
-    user, is_new = await identify_user(message.from_user.id, message.from_user.username, message.from_user.full_name)
-    
+async def handle_start(message: Message, user: TelegramUser):
     if user.is_admin:
         keyboard = get_admin_keyboard()  # Теперь включает кнопку "Пользователи"
         await message.answer("Welcome to admin panel!", reply_markup=keyboard)
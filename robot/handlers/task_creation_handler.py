@@ -8,32 +8,29 @@ from ..keyboards.task_creation_keyboards import (
     get_users_keyboard,
     get_multi_users_keyboard,
     get_media_keyboard,
-    get_confirm_keyboard
+    get_confirm_keyboard,
+    get_reminder_keyboard
 )
 from ..keyboards.task_keyboards import get_task_action_keyboard, get_open_task_keyboard, get_group_task_keyboard, get_personal_task_keyboard
 from ..states.task_states import TaskCreation
-from ..models import Task, TelegramUser, TaskAssignment
-from ..utils import identify_user
+from ..models import Task, TelegramUser, TaskAssignment, Reminder
+from ..notifications import Outgoing, aenqueue
 from ..utils.message_utils import safe_edit_message
 from asgiref.sync import sync_to_async
+from django.db import transaction
 from zoneinfo import ZoneInfo
 import logging
 task_creation_router = Router()
 
 
 @task_creation_router.callback_query(F.data == "create_task")
-async def start_task_creation(callback: CallbackQuery, state: FSMContext):
-    user, _ = await identify_user(callback.from_user.id)
-    
-    if not user.is_admin:
+async def start_task_creation(callback: CallbackQuery, state: FSMContext, is_admin: bool):
+    if not is_admin:
         await callback.answer("You do not have access!", show_alert=True)
         return
 
     await state.set_state(TaskCreation.waiting_for_title)
-    try:
-        await callback.message.edit_text("📝 Enter task name:")
-    except Exception as e:
-        await callback.message.answer("📝 Enter task name:")
+    await safe_edit_message(callback.message, "📝 Enter task name:")
     await callback.answer()
 
 
@@ -79,10 +76,7 @@ async def process_deadline_time(callback: CallbackQuery, state: FSMContext):
         
         await state.set_state(TaskCreation.waiting_for_assignment_type)
         keyboard = get_assignment_type_keyboard()
-        try:
-            await callback.message.edit_text("👥 Choose type of task:", reply_markup=keyboard)
-        except Exception as e:
-            await callback.message.answer("👥 Choose type of task:", reply_markup=keyboard)    
+        await safe_edit_message(callback.message, "👥 Choose type of task:", keyboard)
     except Exception as e:
         await callback.answer(f'Error: {e}')
 
@@ -104,10 +98,7 @@ async def process_individual_task(callback: CallbackQuery, state: FSMContext):
     await state.update_data(is_group_task=False)
     keyboard = await get_users_keyboard()
     await state.set_state(TaskCreation.waiting_for_assignee)
-    try:
-        await callback.message.edit_text("👤 Choose assignee:", reply_markup=keyboard)
-    except Exception as e:
-        await callback.message.answer("👤 Choose assignee:", reply_markup=keyboard)
+    await safe_edit_message(callback.message, "👤 Choose assignee:", keyboard)
     await callback.answer()
 
 
@@ -116,10 +107,7 @@ async def process_group_task(callback: CallbackQuery, state: FSMContext):
     await state.update_data(is_group_task=True)
     keyboard = get_media_keyboard()
     await state.set_state(TaskCreation.waiting_for_media)
-    try:
-        await callback.message.edit_text("📎 Send a photo/video or skip the step:", reply_markup=keyboard)
-    except Exception as e:
-        await callback.message.answer("📎 Send a photo/video or skip the step:", reply_markup=keyboard)
+    await safe_edit_message(callback.message, "📎 Send a photo/video or skip the step:", keyboard)
     await callback.answer()
 
 
@@ -133,10 +121,7 @@ async def process_multi_task(callback: CallbackQuery, state: FSMContext):
     # Get and set the multi-user selection keyboard
     keyboard = await get_multi_users_keyboard()
     await state.set_state(TaskCreation.selecting_assignees)
-    try:
-        await callback.message.edit_text("👥 Choose assignees for task:", reply_markup=keyboard)
-    except Exception as e:
-        await callback.message.answer("👥 Choose assignees for task:", reply_markup=keyboard)
+    await safe_edit_message(callback.message, "👥 Choose assignees for task:", keyboard)
     await callback.answer()
 
 
@@ -160,10 +145,7 @@ async def handle_user_selection(callback: CallbackQuery, state: FSMContext):
     
     # Update the keyboard with new selection state
     keyboard = await get_multi_users_keyboard(selected_users, current_page)
-    try:
-        await callback.message.edit_text("👥 Choose assignees for task:", reply_markup=keyboard)
-    except Exception as e:
-        await callback.message.answer("👥 Choose assignees for task:", reply_markup=keyboard)
+    await safe_edit_message(callback.message, "👥 Choose assignees for task:", keyboard)
     await callback.answer()
 
 
@@ -180,10 +162,7 @@ async def handle_pagination(callback: CallbackQuery, state: FSMContext):
     
     # Update the keyboard with new page
     keyboard = await get_multi_users_keyboard(selected_users, new_page)
-    try:
-        await callback.message.edit_text("👥 Choose assignees for task:", reply_markup=keyboard)
-    except Exception as e:
-        await callback.message.answer("👥 Choose assignees for task:", reply_markup=keyboard)
+    await safe_edit_message(callback.message, "👥 Choose assignees for task:", keyboard)
     await callback.answer()
 
 
@@ -198,10 +177,7 @@ async def confirm_multi_selection(callback: CallbackQuery, state: FSMContext):
     
     keyboard = get_media_keyboard()
     await state.set_state(TaskCreation.waiting_for_media)
-    try:
-        await callback.message.edit_text("📎 Send photo/video or skip this step:", reply_markup=keyboard)
-    except Exception as e:
-        await callback.message.answer("📎 Send photo/video or skip this step:", reply_markup=keyboard)
+    await safe_edit_message(callback.message, "📎 Send photo/video or skip this step:", keyboard)
     await callback.answer()
 
 
@@ -216,10 +192,7 @@ async def process_assignee(callback: CallbackQuery, state: FSMContext):
     await state.update_data(assignee_id=user_id, is_open_task=False)
     keyboard = get_media_keyboard()
     await state.set_state(TaskCreation.waiting_for_media)
-    try:
-        await callback.message.edit_text("📎 Send photo/video or skip this step", reply_markup=keyboard)
-    except Exception as e:
-        await callback.message.answer("📎 Send photo/video or skip this step", reply_markup=keyboard)
+    await safe_edit_message(callback.message, "📎 Send photo/video or skip this step", keyboard)
     await callback.answer()
 
 
@@ -228,10 +201,7 @@ async def process_open_task(callback: CallbackQuery, state: FSMContext):
     await state.update_data(assignee_id=None, is_open_task=True)
     keyboard = get_media_keyboard()
     await state.set_state(TaskCreation.waiting_for_media)
-    try:
-        await callback.message.edit_text("📎 Send photo/video or skip this step:", reply_markup=keyboard)
-    except Exception as e:
-        await callback.message.answer("📎 Send photo/video or skip this step:", reply_markup=keyboard)
+    await safe_edit_message(callback.message, "📎 Send photo/video or skip this step:", keyboard)
     await callback.answer()
 
 
@@ -272,6 +242,83 @@ async def skip_media(callback: CallbackQuery, state: FSMContext):
     await callback.answer()
 
 
+def reminders_text(data) -> str:
+    reminders = sorted(data.get('reminders', []))
+    if not reminders:
+        return "No reminders yet."
+    return "\n".join(f"• {reminder.strftime('%m/%d/%Y %I:%M %p')}" for reminder in reminders)
+
+
+async def add_reminder_time(state: FSMContext, reminder_time: datetime) -> str | None:
+    """Add a reminder to the task being created; returns why it was refused, if it was."""
+    data = await state.get_data()
+    if reminder_time <= datetime.now():
+        return "❌ This time has already passed"
+    if reminder_time >= data['deadline']:
+        return "❌ The reminder must come before the deadline"
+    reminders = data.get('reminders', [])
+    if reminder_time not in reminders:
+        await state.update_data(reminders=reminders + [reminder_time])
+    return None
+
+
+@task_creation_router.callback_query(F.data == "add_reminder")
+async def show_reminder_options(callback: CallbackQuery, state: FSMContext):
+    data = await state.get_data()
+    await safe_edit_message(
+        callback.message,
+        f"⏰ When should the assignees get a reminder?\n\n{reminders_text(data)}",
+        get_reminder_keyboard(),
+    )
+    await callback.answer()
+
+
+@task_creation_router.callback_query(F.data.startswith("reminder_before:"))
+async def add_preset_reminder(callback: CallbackQuery, state: FSMContext):
+    minutes = int(callback.data.split(":")[1])
+    data = await state.get_data()
+    error = await add_reminder_time(state, data['deadline'] - timedelta(minutes=minutes))
+    if error:
+        await callback.answer(error, show_alert=True)
+        return
+    await show_reminder_options(callback, state)
+
+
+@task_creation_router.callback_query(F.data == "reminder_custom")
+async def ask_custom_reminder(callback: CallbackQuery, state: FSMContext):
+    await state.set_state(TaskCreation.waiting_for_reminder)
+    await safe_edit_message(callback.message, "⏰ Enter reminder time in a format MM/DD/YYYY HH:MM")
+    await callback.answer()
+
+
+@task_creation_router.message(TaskCreation.waiting_for_reminder)
+async def process_custom_reminder(message: Message, state: FSMContext):
+    try:
+        reminder_time = datetime.strptime(message.text or '', "%m/%d/%Y %H:%M")
+    except ValueError:
+        await message.answer("❌ Incorrect format. Remember: MM/DD/YYYY HH:MM")
+        return
+    error = await add_reminder_time(state, reminder_time)
+    if error:
+        await message.answer(error)
+        return
+    await state.set_state(TaskCreation.confirm_creation)
+    data = await state.get_data()
+    await message.answer(
+        f"⏰ When should the assignees get a reminder?\n\n{reminders_text(data)}",
+        reply_markup=get_reminder_keyboard(),
+    )
+
+
+@task_creation_router.callback_query(F.data == "reminder_done")
+async def finish_reminders(callback: CallbackQuery, state: FSMContext):
+    data = await state.get_data()
+    preview_text = await get_task_preview(data)
+    await safe_edit_message(callback.message, preview_text, get_confirm_keyboard())
+    await state.set_state(TaskCreation.confirm_creation)
+    await callback.answer()
+
+
 async def show_confirmation(message: Message, state: FSMContext):
     data = await state.get_data()
     
@@ -288,6 +335,12 @@ async def show_confirmation(message: Message, state: FSMContext):
     await message.answer(confirmation_text, reply_markup=keyboard)
 
 
+@sync_to_async
+def get_task_assignments(task_id: int) -> list[TaskAssignment]:
+    # One query for the assignments and their users
+    return list(TaskAssignment.objects.filter(task_id=task_id).select_related('user').order_by('pk'))
+
+
 async def send_task_notification(bot: Bot, task: Task, data: dict):
     group_id = os.getenv("TELEGRAM_GROUP_ID")
     bot_username = os.getenv("TELEGRAM_BOT_USERNAME")
@@ -304,89 +357,37 @@ async def send_task_notification(bot: Bot, task: Task, data: dict):
     if task.is_multi_task:
         task_type = "👥 Task for chosen assignees"
         
-        # Get assignees from database
-        @sync_to_async
-        def get_task_assignments(task):
-            return list(task.assignments.all())
-
-        @sync_to_async
-        def get_user_first_name(assignment):
-            return assignment.user.username
-
-        @sync_to_async
-        def get_user_telegram_id(assignment):
-            return assignment.user.telegram_id
-
-        # Get assignments from database
-        assignments = await get_task_assignments(task)
-        assignees_names = []
-        for assignment in assignments:
-            name = await get_user_first_name(assignment)
-            assignees_names.append(name)
-        assignees_names = [assignment.user.first_name for assignment in assignments]
-        assignees_text = ", ".join(assignees_names)
+        assignments = await get_task_assignments(task.id)
+        assignees_text = ", ".join(assignment.user.first_name for assignment in assignments)
         
         group_text = f"{task_type}\n\n{task_text}\n\nAssignees: {assignees_text}"
         
-        # Send to group chat
-        if task.media_file_id:
-            if task.media_type == 'photo':
-                await bot.send_photo(group_id, task.media_file_id, caption=group_text)
-            elif task.media_type == 'video':
-                await bot.send_video(group_id, task.media_file_id, caption=group_text)
-            elif task.media_type == 'document':  # Add document sending
-                await bot.send_document(group_id, task.media_file_id, caption=group_text)
-        else:
-            await bot.send_message(group_id, group_text)
-        
         # Send to individual assignees
         personal_text = (
             f"👤 You have been assigned to a new task!\n\n{task_text}\n\n"
             "Read the task and start it!"
         )
-        
-        for assignment in assignments:
-            user_id = assignment.user.telegram_id
-            keyboard = get_personal_task_keyboard(task.id)
-            if task.media_file_id:
-                if task.media_type == 'photo':
-                    await bot.send_photo(user_id, task.media_file_id, caption=personal_text, reply_markup=keyboard)
-                elif task.media_type == 'video':
-                    await bot.send_video(user_id, task.media_file_id, caption=personal_text, reply_markup=keyboard)
-                elif task.media_type == 'document':  # Add document sending
-                    await bot.send_document(user_id, task.media_file_id, caption=personal_text, reply_markup=keyboard)
-            else:
-                await bot.send_message(user_id, personal_text, reply_markup=keyboard)
+        keyboard = get_personal_task_keyboard(task.id)
+
+        messages = [Outgoing(group_id, group_text, None, task.media_file_id, task.media_type)]
+        messages.extend(
+            Outgoing(assignment.user.telegram_id, personal_text, keyboard, task.media_file_id, task.media_type)
+            for assignment in assignments
+        )
     
     # Для открытой задачи
     elif data.get('is_open_task'):
         task_type = "🔓 Open task"
         group_text = f"{task_type}\n\n{task_text}"
         keyboard = get_open_task_keyboard(task.id)
-        if task.media_file_id:
-            if task.media_type == 'photo':
-                message = await bot.send_photo(group_id, task.media_file_id, caption=group_text, reply_markup=keyboard)
-            elif task.media_type == 'video':
-                message = await bot.send_video(group_id, task.media_file_id, caption=group_text, reply_markup=keyboard)
-            elif task.media_type == 'document':  # Add document sending
-                await bot.send_document(group_id, task.media_file_id, caption=group_text)
-        else:
-            message = await bot.send_message(group_id, group_text, reply_markup=keyboard)
+        messages = [Outgoing(group_id, group_text, keyboard, task.media_file_id, task.media_type)]
     
     # Для групповой задачи
     elif task.is_group_task:
         task_type = "👥 Group task"
         group_text = f"{task_type}\n\n{task_text}"
         keyboard = await get_group_task_keyboard(bot)
-        if task.media_file_id:
-            if task.media_type == 'photo':
-                message = await bot.send_photo(group_id, task.media_file_id, caption=group_text, reply_markup=keyboard)
-            elif task.media_type == 'video':
-                message = await bot.send_video(group_id, task.media_file_id, caption=group_text, reply_markup=keyboard)
-            elif task.media_type == 'document':  # Add document sending
-                await bot.send_document(group_id, task.media_file_id, caption=group_text)
-        else:
-            message = await bot.send_message(group_id, group_text, reply_markup=keyboard)
+        messages = [Outgoing(group_id, group_text, keyboard, task.media_file_id, task.media_type)]
     
     # Для индивидуальной задачи с назначенным исполнителем
     elif task.assignee:
@@ -395,58 +396,82 @@ async def send_task_notification(bot: Bot, task: Task, data: dict):
             "Read the task and start it!"
         )
         keyboard = get_personal_task_keyboard(task.id)
-        if task.media_file_id:
-            if task.media_type == 'photo':
-                message = await bot.send_photo(task.assignee.telegram_id, task.media_file_id, caption=personal_text, reply_markup=keyboard)
-            elif task.media_type == 'video':
-                message = await bot.send_video(task.assignee.telegram_id, task.media_file_id, caption=personal_text, reply_markup=keyboard)
-            elif task.media_type == 'document':  # Add document sending
-                await bot.send_document(task.assignee.telegram_id, task.media_file_id, caption=personal_text, reply_markup=keyboard)
-        else:
-            message = await bot.send_message(task.assignee.telegram_id, personal_text, reply_markup=keyboard)
+        messages = [Outgoing(task.assignee.telegram_id, personal_text, keyboard, task.media_file_id, task.media_type)]
+
+    else:
+        return
+
+    # Without a configured group only the personal messages go out
+    messages = [message for message in messages if message.chat_id]
+    # The outbox workers deliver them concurrently under the rate limits and
+    # retry each recipient on its own, so the admin gets their confirmation right away
+    await aenqueue(messages)
+
+
+def users_by_telegram_id(telegram_ids) -> tuple[dict, list]:
+    """
+    Selected users in one query: {telegram_id: user} for those that exist,
+    and the ids that match nobody, in the order they were selected.
+    """
+    users = TelegramUser.objects.in_bulk(telegram_ids, field_name='telegram_id')
+    return users, [telegram_id for telegram_id in telegram_ids if telegram_id not in users]
 
 
 @sync_to_async
-def create_new_task(data, creator):
+def create_new_task(data, creator) -> tuple[Task, list]:
+    """
+    Create the task with its assignments and reminders in one transaction, in
+    a fixed number of queries whatever the number of assignees.
+
+    Returns the task and the selected telegram ids that matched no user.
+    """
     logging.info(f"Creating new task with data: {data}")
+    unknown = []
     
     # Handle regular assignee for individual tasks
-    if not data.get('is_group_task') and not data.get('is_multi_task'):
-        try:
-            assignee = TelegramUser.objects.get(telegram_id=data['assignee_id']) if 'assignee_id' in data else None
-        except Exception as e:
-            assignee = None
-    else:
-        assignee = None
+    assignee = None
+    if not data.get('is_group_task') and not data.get('is_multi_task') and data.get('assignee_id'):
+        users, unknown = users_by_telegram_id([data['assignee_id']])
+        assignee = users.get(data['assignee_id'])
     
     task_status = 'open'
     if not data.get('is_group_task') and not data.get('is_open_task'):
         task_status = 'assigned'
     
-    # Create the task
-    task = Task.objects.create(
-        title=data['title'],
-        description=data['description'],
-        creator=creator,
-        deadline=data['deadline'],
-        is_group_task=data.get('is_group_task', False),
-        is_multi_task=data.get('is_multi_task', False),
-        assignee=assignee,
-        media_file_id=data.get('media_file_id', None),
-        media_type=data.get('media_type', None),
-        status=task_status,
-    )
-    
-    # Handle multiple assignees for multi-tasks
-    if data.get('is_multi_task') and 'selected_users' in data:
-        for user_id in data['selected_users']:
-            try:
-                user = TelegramUser.objects.get(telegram_id=user_id)
-                TaskAssignment.objects.create(task=task, user=user)
-            except Exception as e:
-                logging.error(f"Error creating task assignment: {e}")
-    
-    return task
+    with transaction.atomic():
+        # Create the task
+        task = Task.objects.create(
+            title=data['title'],
+            description=data['description'],
+            creator=creator,
+            deadline=data['deadline'],
+            is_group_task=data.get('is_group_task', False),
+            is_multi_task=data.get('is_multi_task', False),
+            assignee=assignee,
+            media_file_id=data.get('media_file_id', None),
+            media_type=data.get('media_type', None),
+            status=task_status,
+        )
+        
+        # Handle multiple assignees for multi-tasks
+        if data.get('is_multi_task') and data.get('selected_users'):
+            users, unknown = users_by_telegram_id(data['selected_users'])
+            TaskAssignment.objects.bulk_create(
+                [TaskAssignment(task=task, user=user) for user in users.values()],
+                batch_size=500,
+            )
+
+        Reminder.objects.bulk_create(
+            Reminder(task=task, reminder_time=reminder_time) for reminder_time in data.get('reminders', [])
+        )
+
+    if unknown:
+        logging.warning(f"Task {task.pk}: skipped unknown users {unknown}")
+    return task, unknown
+
+
+def unknown_users_text(unknown) -> str:
+    return f"\n⚠️ Unknown users, not assigned: {', '.join(map(str, unknown))}"
 
 
 @sync_to_async
@@ -463,38 +488,38 @@ def get_task_preview(data):
         preview_text += "👥 Type: Multicast (for exact members)"
         
         # Add selected users info
-        if 'selected_users' in data and data['selected_users']:
-            selected_users = []
-            for user_id in data['selected_users']:
-                try:
-                    user = TelegramUser.objects.get(telegram_id=user_id)
-                    selected_users.append(user.first_name)
-                except Exception:
-                    pass
-            
-            if selected_users:
-                preview_text += f"\n👤 Исполнители: {', '.join(selected_users)}"
+        if data.get('selected_users'):
+            users, unknown = users_by_telegram_id(data['selected_users'])
+            if users:
+                preview_text += f"\n👤 Исполнители: {', '.join(user.first_name for user in users.values())}"
+            if unknown:
+                preview_text += unknown_users_text(unknown)
     else:
         preview_text += "👤 Type: Solo"
         if data.get('is_open_task'):
             preview_text += "\n🔓 Open for working"
         elif data.get('assignee_id'):
-            assignee = TelegramUser.objects.get(telegram_id=data['assignee_id'])
-            preview_text += f"\n👤 Assignee: {assignee.first_name}"
+            users, unknown = users_by_telegram_id([data['assignee_id']])
+            if users:
+                preview_text += f"\n👤 Assignee: {users[data['assignee_id']].first_name}"
+            else:
+                preview_text += unknown_users_text(unknown)
     
     if data.get('media_file_id'):
         media_type = "📷 Photo" if data.get('media_type') == 'photo' else "🎥 video"
         preview_text += f"\n{media_type}: Pinned"
     
+    if data.get('reminders'):
+        preview_text += f"\n⏰ Reminders:\n{reminders_text(data)}"
+    
     return preview_text
 
 
 @task_creation_router.callback_query(F.data == "confirm_task")
-async def create_task(callback: CallbackQuery, state: FSMContext):
+async def create_task(callback: CallbackQuery, state: FSMContext, user: TelegramUser):
     data = await state.get_data()
-    creator, _ = await identify_user(callback.from_user.id)
     
-    task = await create_new_task(data, creator)
+    task, unknown = await create_new_task(data, user)
     
     # Отправляем уведомления
     bot = callback.bot
@@ -510,6 +535,8 @@ async def create_task(callback: CallbackQuery, state: FSMContext):
         f"Type: {task_type}\n"
         f"Deadline: {task.deadline.strftime('%m/%d/%Y %H:%M')}"
     )
+    if unknown:
+        confirmation_text += unknown_users_text(unknown)
     
     await state.clear()
     await safe_edit_message(callback.message, confirmation_text)
@@ -519,8 +546,5 @@ async def create_task(callback: CallbackQuery, state: FSMContext):
 @task_creation_router.callback_query(F.data == "cancel_creation")
 async def cancel_creation(callback: CallbackQuery, state: FSMContext):
     await state.clear()
-    try:
-        await callback.message.edit_text("❌ Creation of task canceled")
-    except Exception as e:
-        await callback.message.answer("❌ Creation of task canceled")
+    await safe_edit_message(callback.message, "❌ Creation of task canceled")
     await callback.answer()
\ No newline at end of file
@@ -1,8 +1,8 @@
 from aiogram import Router, F
 from aiogram.types import CallbackQuery, Message
 from aiogram.fsm.context import FSMContext
-from ..utils import identify_user
 from ..models import Task, TaskCompletion, TelegramUser, TaskComment
+from ..notifications import Outgoing, aenqueue
 from ..keyboards.task_list_keyboards import get_task_list_keyboard, get_task_detail_keyboard, get_task_list_open_keyboard, get_open_task_detail_keyboard, get_user_filter_keyboard
 from asgiref.sync import sync_to_async
 from ..states.task_states import TaskSubmission
@@ -12,6 +12,8 @@ from django.db import models
 from django.db.models import Q
 from ..utils.message_utils import safe_edit_message, send_task_message
 from ..utils.logger import logger
+from ..services.task_detail import get_task_detail, render_task_detail
+from ..services.task_query import TaskQuery, fetch_tasks, get_tasks
 import logging
 from aiogram.fsm.state import State, StatesGroup
 from zoneinfo import ZoneInfo
@@ -20,83 +22,6 @@ from datetime import datetime
 task_management_router = Router()
 
 
-@sync_to_async
-def get_user_tasks(user, state: str = '*'):
-    if state == '*':
-        return list(TaskAssignment.objects.filter(
-            user=user,
-            status__in=['in_progress', 'assigned', 'overdue']
-        ).select_related('task').order_by('-task__created_at'))
-    elif state == 'my_tasks':
-        return list(TaskAssignment.objects.filter(
-            user=user,
-            status__in=['in_progress', 'assigned', 'overdue']
-        ).select_related('task').order_by('-task__created_at'))
-    elif state == 'user_completed_tasks':
-        return list(TaskAssignment.objects.filter(
-            user=user,
-            status='completed'
-        ).select_related('task').order_by('-completed_at'))
-    elif state == 'user_overdue_tasks':
-        return list(TaskAssignment.objects.filter(
-            user=user,
-            status='overdue'
-        ).select_related('task').order_by('task__deadline'))
-    elif state == 'user_submitted_tasks':
-        return list(TaskAssignment.objects.filter(
-            user=user,
-            task__status='submitted'
-        ).select_related('task').order_by('-task__created_at'))
-    elif state == 'user_revision_tasks':
-        return list(TaskAssignment.objects.filter(
-            user=user,
-            task__status='revision'
-        ).select_related('task').order_by('-task__created_at'))
-
-
-@sync_to_async
-def get_open_tasks():
-    return list(Task.objects.filter(status='open'))
-
-
-@sync_to_async
-def get_admin_task_list(state: str = '*'):
-    if state == '*':
-        return list(Task.objects.all().order_by('-created_at'))
-    elif state == 'my_tasks':
-        return list(Task.objects.filter(status__in=['in_progress', 'assigned', 'overdue']).order_by('-created_at'))
-    elif state == 'user_completed_tasks':
-        return list(Task.objects.filter(status='completed').order_by('-completed_at'))
-    elif state == 'user_overdue_tasks':
-        return list(Task.objects.filter(status='overdue').order_by('deadline'))
-    elif state == 'submitted_tasks':
-        return list(Task.objects.filter(status='submitted').order_by('-created_at'))
-    elif state == 'revision_tasks':
-        return list(Task.objects.filter(status='revision').order_by('-created_at'))
-
-@sync_to_async
-def get_completed_tasks():
-    return list(Task.objects.filter(status='completed').order_by('-completed_at'))
-
-
-@sync_to_async
-def get_overdue_tasks():
-    now = timezone.now().astimezone(ZoneInfo("Europe/Moscow"))
-    return list(Task.objects.filter(
-        models.Q(status__in=['open', 'in_progress', 'assigned', 'overdue']) &
-        models.Q(deadline__lt=now)
-    ).order_by('deadline'))
-
-
-@sync_to_async
-def get_task_with_completions(task_id):
-    task = Task.objects.get(id=task_id)
-    if task.is_group_task:
-        completions_count = TaskCompletion.objects.filter(task=task).count()
-        return task, completions_count
-    return task, None
-
-
 @sync_to_async
 def assign_task_to_user(task_id, user):
     task = Task.objects.get(id=task_id)
@@ -129,111 +54,22 @@ def create_task_completion(task_id, user, comment=None):
     return task
 
 from robot.models import TaskAssignment
-@sync_to_async
-def get_user_filtered_tasks(user_id, state: str = '*'):
-    logging.info(f"Getting user filtered tasks for user {user_id} with state {state}")
-    filtered_user = TelegramUser.objects.get(telegram_id=user_id)
-    if state == '*':
-        assignments = TaskAssignment.objects.filter(user=filtered_user)
-        tasks = [el.task for el in assignments]
-        return tasks + list(Task.objects.filter(
-            models.Q(assignee=filtered_user) | models.Q(assignments__user=filtered_user)
-        ).order_by('-created_at'))
-    elif state == 'my_tasks':
-        assignments = TaskAssignment.objects.filter(user=filtered_user)
-        tasks = [el.task for el in assignments]
-        return tasks + list(Task.objects.filter(
-            (models.Q(assignee=filtered_user) | models.Q(assignments__user=filtered_user)),
-            status__in=['in_progress', 'assigned', 'overdue', 'multi']
-        ).order_by('-created_at'))
-    elif state == 'user_completed_tasks':
-        return list(Task.objects.filter(
-            models.Q(assignee=filtered_user) | models.Q(assignments__user=filtered_user),
-            status='completed'
-        ).order_by('-completed_at'))
-    elif state == 'user_overdue_tasks':
-        return list(Task.objects.filter(
-            models.Q(assignee=filtered_user) | models.Q(assignments__user=filtered_user),
-            status='overdue'
-        ).order_by('deadline'))
-
-
-@sync_to_async
-def get_user_completed_tasks(user):
-    return list(Task.objects.filter(
-        assignee=user,
-        status='completed'
-    ).order_by('-completed_at'))
-
-
-@sync_to_async
-def get_user_overdue_tasks(user):
-    now = timezone.now().astimezone(ZoneInfo("Europe/Moscow"))
-    return list(Task.objects.filter(
-        assignee=user,
-        status__in=['in_progress', 'assigned', 'overdue'],
-        deadline__lt=now
-    ).order_by('deadline'))
-
-
 @sync_to_async
 def get_moscow_time():
     return timezone.now().astimezone(ZoneInfo("Europe/Moscow"))
 
 
 @task_management_router.callback_query(F.data.in_(["my_tasks", "user_completed_tasks", "user_overdue_tasks"]))
-async def handle_task_list_navigation(callback: CallbackQuery, state: FSMContext):
+async def handle_task_list_navigation(callback: CallbackQuery, state: FSMContext, user: TelegramUser):
     user_id = callback.from_user.id
     logger.info(f"User {user_id} accessing task list with type: {callback.data}")
     
     try:
         await state.update_data(last_view=callback.data)
-        user, _ = await identify_user(user_id)
-        
-        @sync_to_async
-        def get_tasks_by_type(task_type: str, is_admin: bool):
-            if is_admin:
-                if task_type == "my_tasks":
-                    return list(Task.objects.filter(
-                        status__in=['in_progress', 'assigned', 'overdue']
-                    ).order_by('-created_at'))
-                elif task_type == "user_completed_tasks":
-                    return list(Task.objects.filter(
-                        status='completed'
-                    ).order_by('-completed_at'))
-                else:  # user_overdue_tasks
-                    return list(Task.objects.filter(
-                        status='overdue'
-                    ).order_by('deadline'))
-            else:
-                if task_type == "my_tasks":
-                    # assignments = TaskAssignment.objects.filter(user=user)
-                    # tasks = [el.task for el in assignments]
-                    # return tasks + list(Task.objects.filter(
-                    #     (Q(assignee=user) | Q(is_group_task=True)),
-                    #     status__in=['in_progress', 'assigned', 'overdue']
-                    # ).order_by('-created_at'))
-                    
-                    return list(TaskAssignment.objects.filter(
-                        (Q(user=user)),
-                        status__in=['in_progress', 'assigned', 'overdue']
-                    ))
-                    
-                elif task_type == "user_completed_tasks":
-                    
-                    return list(TaskAssignment.objects.filter(
-                        (Q(user=user)),
-                        status='completed'
-                    ))
-                    
-                else:  # user_overdue_tasks
-                    return list(Task.objects.filter(
-                        (Q(assignee=user) | Q(is_group_task=True)),
-                        status='overdue'
-                    ).order_by('deadline'))
         
-        tasks = await get_tasks_by_type(callback.data, user.is_admin)
-        logger.info(f"Retrieved {len(tasks)} tasks for user {user_id}")
+        result = await get_tasks(TaskQuery(view=callback.data, is_admin=user.is_admin, viewer_id=user.pk))
+        tasks = result.page
+        logger.info(f"Retrieved {tasks.total} tasks for user {user_id}")
         
         if callback.data == "my_tasks":
             text = "📋 All active tasks:" if user.is_admin else "📋 My tasks:"
@@ -243,11 +79,8 @@ async def handle_task_list_navigation(callback: CallbackQuery, state: FSMContext
             text = "⏰ All overdue tasks:" if user.is_admin else "⏰ My overdue tasks:"
         
         
-        keyboard = await get_task_list_keyboard(tasks, state=callback.data)
-        try:
-            await callback.message.edit_text(text, reply_markup=keyboard)
-        except Exception as e:
-            await callback.message.answer(text, reply_markup=keyboard)
+        keyboard = get_task_list_keyboard(tasks, state=result.view)
+        await safe_edit_message(callback.message, text, keyboard)
         await callback.answer()
         logger.info(f"Successfully displayed task list for user {user_id}")
         
@@ -256,62 +89,14 @@ async def handle_task_list_navigation(callback: CallbackQuery, state: FSMContext
         await callback.answer("Error occured in displaying task list")
 
 
-@sync_to_async
-def get_text_with_details(task: Task):
-    return (
-        f"📝 Task: {task.title}\n\n"
-        f"📄 Description: {task.description}\n"
-        f"📅 Deadline: {task.deadline.strftime('%m/%d/%Y %I:%M %p')}\n"
-        f"👤 Created by: {task.creator.first_name}\n"
-        f"📊 Status: {task.get_status_display()}\n"
-    )
-
-
-@sync_to_async
-def get_assignee_text(task: Task):
-    if task.assignee:
-        return f"👤 Assignee: {task.assignee.first_name}\n"
-    else:
-        return ""
-
-@sync_to_async
-def get_task_comment(task: Task):
-    if task.comments.count() > 0:
-        return TaskComment.objects.filter(task=task).order_by('-created_at').first().text
-    else:
-        return ""
-
-@sync_to_async
-def get_task_assignee(task: Task):
-    if task.assignee:
-        return task.assignee.first_name
-    else:
-        return ""
-
 @task_management_router.callback_query(F.data.startswith("view_task:"))
-async def view_task_details(callback: CallbackQuery, state: FSMContext):
+async def view_task_details(callback: CallbackQuery, state: FSMContext, user: TelegramUser):
     task_id = int(callback.data.split(":")[1])
-    user, _ = await identify_user(callback.from_user.id)
-
-    task, completions_count = await get_task_with_completions(task_id)
-
-    task_text = await get_text_with_details(task)
-
-    if user.is_admin:
-        if task.is_group_task and completions_count is not None:
-            task_text += f"✅ Completed: {completions_count} members\n"
-        if task.status == 'completed':
-            task_text += f"✅ Task completed\n"
 
-            comment = await get_task_comment(task)
-            if comment:
-                task_text += f"💬 Commentary: {comment}\n"
+    task = await get_task_detail(task_id, user)
+    task_text = render_task_detail(task, user.is_admin)
 
-    asignee = await get_assignee_text(task)
-    if asignee:
-        task_text += asignee
-
-    keyboard = await get_task_detail_keyboard(task.id, user.is_admin, task.status, user)
+    keyboard = get_task_detail_keyboard(task, user.is_admin)
     if keyboard == False:
         await callback.answer("❌ Пользователь еще не подтвердил свое участие в заказе.")
         return
@@ -320,9 +105,8 @@ async def view_task_details(callback: CallbackQuery, state: FSMContext):
 
 
 @task_management_router.callback_query(F.data.startswith("take_task:"))
-async def take_task(callback: CallbackQuery, state: FSMContext):
+async def take_task(callback: CallbackQuery, state: FSMContext, user: TelegramUser):
     task_id = int(callback.data.split(":")[1])
-    user, _ = await identify_user(callback.from_user.id)
 
     task = await assign_task_to_user(task_id, user)
     if task:
@@ -362,18 +146,12 @@ async def submit_task(callback: CallbackQuery, state: FSMContext):
         # Ask for mandatory comment
         keyboard = InlineKeyboardBuilder()
         keyboard.button(text="❌ Cancel", callback_data="cancel_submission")
-        try:
-            await callback.message.edit_text(
-                "💬 Please add commentary to work.\n"
-                "It is neccessary.",
-                reply_markup=keyboard.as_markup()
-            )
-        except Exception as e:
-            await callback.message.answer(
-                "💬 Please add commentary to work.\n"
-                "It is neccessary.",
-                reply_markup=keyboard.as_markup()
-            )
+        await safe_edit_message(
+            callback.message,
+            "💬 Please add commentary to work.\n"
+            "It is neccessary.",
+            keyboard.as_markup()
+        )
         await state.set_state(TaskStates.waiting_for_comment)
         await callback.answer()
         logger.info(f"Waiting for comment from user {user_id} for task {task_id}")
@@ -384,25 +162,18 @@ async def submit_task(callback: CallbackQuery, state: FSMContext):
 
 
 @task_management_router.message(TaskStates.waiting_for_comment)
-async def handle_task_comment(message: Message, state: FSMContext):
+async def handle_task_comment(message: Message, state: FSMContext, user: TelegramUser):
     user_id = message.from_user.id
     logger.info(f"Received comment from user {user_id}")
     
     try:
         data = await state.get_data()
         task_id = data['task_id']
-        user, _ = await identify_user(user_id)
         
         # Mark task as submitted, not completed
         task = await mark_task_submitted(task_id, user, message.text)
         
-        # Get the task creator for notification
-        @sync_to_async
-        def get_task_creator(task_id):
-            task = Task.objects.get(id=task_id)
-            return task.creator
-        
-        creator = await get_task_creator(task_id)
+        detail = await get_task_detail(task_id, user)
         
         # Send notification to task creator
         notification_text = (
@@ -413,21 +184,14 @@ async def handle_task_comment(message: Message, state: FSMContext):
             f"💬 Commentary: {message.text}\n\n"
         )
         
-        try:
-            # Send notification with review keyboard
-            review_keyboard = InlineKeyboardBuilder()
-            review_keyboard.button(text="✅ Review task", callback_data=f"review_task:{task_id}:{user_id}")
-            await message.bot.send_message(
-                creator.telegram_id,
-                notification_text,
-                reply_markup=review_keyboard.as_markup()
-            )
-            logger.info(f"Sent submission notification to task creator {creator.telegram_id}")
-        except Exception as e:
-            logger.error(f"Failed to send notification to task creator {creator.telegram_id}: {e}")
+        # Send notification with review keyboard
+        review_keyboard = InlineKeyboardBuilder()
+        review_keyboard.button(text="✅ Review task", callback_data=f"review_task:{task_id}:{user_id}")
+        await aenqueue([Outgoing(detail.creator_telegram_id, notification_text, review_keyboard.as_markup())])
+        logger.info(f"Queued submission notification to task creator {detail.creator_telegram_id}")
         
         # Update task view for the user
-        task_text = await get_text_with_details(task)
+        task_text = render_task_detail(detail)
         await message.answer(
             f"✅ Task send for approve!\n"
             f"You will get the notification about the status of task later.\n\n{task_text}"
@@ -443,15 +207,14 @@ async def handle_task_comment(message: Message, state: FSMContext):
 
 # Add review handlers for admins
 @task_management_router.callback_query(F.data.startswith("review_task:"))
-async def review_task(callback: CallbackQuery, state: FSMContext):
+async def review_task(callback: CallbackQuery, state: FSMContext, is_admin: bool):
     user_id = callback.from_user.id
     logger.info(f"Admin {user_id} reviewing task")
     
     try:
         task_id = int(callback.data.split(":")[1])
-        user, _ = await identify_user(user_id)
         
-        if not user.is_admin:
+        if not is_admin:
             await callback.answer("You do not have access!", show_alert=True)
             return
         
@@ -498,10 +261,7 @@ async def review_task(callback: CallbackQuery, state: FSMContext):
         review_keyboard.button(text="❌ Cancel", callback_data=f"cancel_review:{task_id}")
         review_keyboard.adjust(1)
         
-        try:
-            await callback.message.edit_text(task_info, reply_markup=review_keyboard.as_markup())
-        except Exception as e:
-            await callback.message.answer(task_info, reply_markup=review_keyboard.as_markup())
+        await safe_edit_message(callback.message, task_info, review_keyboard.as_markup())
         await callback.answer()
         await state.update_data(task_id=task_id)
         
@@ -511,15 +271,14 @@ async def review_task(callback: CallbackQuery, state: FSMContext):
 
 
 @task_management_router.callback_query(F.data.startswith("accept_completion:"))
-async def accept_task_completion(callback: CallbackQuery, state: FSMContext):
+async def accept_task_completion(callback: CallbackQuery, state: FSMContext, is_admin: bool):
     user_id = callback.from_user.id
     logger.info(f"Admin {user_id} accepting task completion")
     
     try:
         task_id = int(callback.data.split(":")[1])
-        admin, _ = await identify_user(user_id)
         
-        if not admin.is_admin:
+        if not is_admin:
             await callback.answer("You do not have access!", show_alert=True)
             return
         
@@ -541,30 +300,19 @@ async def accept_task_completion(callback: CallbackQuery, state: FSMContext):
         task, assignees = await complete_task_and_notify(task_id)
         
         # Notify all assignees
-        for assignee in assignees:
-            notification_text = (
-                f"✅ Your task was check and confirmed!\n\n"
-                f"Name: {task.title}\n"
-                f"Time of confirmation: {task.completed_at.strftime('%m/%d/%Y %I:%M %p')}"
-            )
-            
-            try:
-                await callback.bot.send_message(assignee.telegram_id, notification_text)
-                logger.info(f"Sent acceptance notification to assignee {assignee.telegram_id}")
-            except Exception as e:
-                logger.error(f"Failed to send notification to assignee {assignee.telegram_id}: {e}")
+        notification_text = (
+            f"✅ Your task was check and confirmed!\n\n"
+            f"Name: {task.title}\n"
+            f"Time of confirmation: {task.completed_at.strftime('%m/%d/%Y %I:%M %p')}"
+        )
+        await aenqueue(Outgoing(assignee.telegram_id, notification_text) for assignee in assignees)
         
         # Update UI for the admin
-        try:
-            await callback.message.edit_text(
-                f"✅ Task '{task.title}' was confirmed!\n"
-                f"Assignees was notificated about that."
-            )
-        except Exception as e:
-            await callback.message.answer(
-                f"✅ Task '{task.title}' was confirmed!\n"
-                f"Assignees was notificated about that."
-            )
+        await safe_edit_message(
+            callback.message,
+            f"✅ Task '{task.title}' was confirmed!\n"
+            f"Assignees was notificated about that."
+        )
         await callback.answer("Task confirmed!")
         logger.info(f"Admin {user_id} accepted task {task_id}")
         
@@ -598,16 +346,7 @@ async def request_task_revision(callback: CallbackQuery, state: FSMContext):
         keyboard.button(text="❌ Cancel", callback_data=f"cancel_review:{task_id}")
         keyboard.adjust(3, 2, 1)
         
-        try:
-            await callback.message.edit_text(
-                "📅 Choose new deadline date in format MM/DD/YYYY HH:MM",
-                reply_markup=keyboard.as_markup()
-            )
-        except Exception as e:
-            await callback.message.answer(
-                "📅 Choose new deadline date in format MM/DD/YYYY HH:MM",
-                reply_markup=keyboard.as_markup()
-            )
+        await safe_edit_message(callback.message, "📅 Choose new deadline date in format MM/DD/YYYY HH:MM", keyboard.as_markup())
         await state.set_state(TaskStates.waiting_for_new_deadline)
         await callback.answer()
         
@@ -632,16 +371,7 @@ async def set_revision_date_from_button(callback: CallbackQuery, state: FSMConte
         keyboard = InlineKeyboardBuilder()
         keyboard.button(text="❌ Cancel", callback_data=f"cancel_review:{(await state.get_data())['task_id']}")
         
-        try:
-            await callback.message.edit_text(
-                "💬 Commentary for task (what exactly needs to be reworked):",
-                reply_markup=keyboard.as_markup()
-            )
-        except Exception as e:
-            await callback.message.answer(
-                "💬 Commentary for task (what exactly needs to be reworked):",
-                reply_markup=keyboard.as_markup()
-            )
+        await safe_edit_message(callback.message, "💬 Commentary for task (what exactly needs to be reworked):", keyboard.as_markup())
         await state.set_state(TaskStates.waiting_for_review_decision)
         await callback.answer()
         
@@ -682,7 +412,7 @@ async def set_revision_date_manual(message: Message, state: FSMContext):
 
 
 @task_management_router.message(TaskStates.waiting_for_review_decision)
-async def send_task_to_revision(message: Message, state: FSMContext):
+async def send_task_to_revision(message: Message, state: FSMContext, user: TelegramUser):
     user_id = message.from_user.id
     logger.info(f"Admin {user_id} sending task to revision with comment")
     
@@ -690,7 +420,6 @@ async def send_task_to_revision(message: Message, state: FSMContext):
         data = await state.get_data()
         task_id = data['task_id']
         new_deadline = data['new_deadline']
-        admin, _ = await identify_user(user_id)
         
         @sync_to_async
         def update_task_for_revision(task_id, new_deadline, admin, comment):
@@ -718,22 +447,16 @@ async def send_task_to_revision(message: Message, state: FSMContext):
                 
             return task, assignees
         
-        task, assignees = await update_task_for_revision(task_id, new_deadline, admin, message.text)
+        task, assignees = await update_task_for_revision(task_id, new_deadline, user, message.text)
         
         # Notify all assignees
-        for assignee in assignees:
-            notification_text = (
-                f"🔄 Your task needs to be reworked!\n\n"
-                f"Name: {task.title}\n"
-                f"New deadline: {new_deadline.strftime('%m/%d/%Y %I:%M %p')}\n"
-                f"💬 Commentary from checker: {message.text}"
-            )
-            
-            try:
-                await message.bot.send_message(assignee.telegram_id, notification_text)
-                logger.info(f"Sent revision notification to assignee {assignee.telegram_id}")
-            except Exception as e:
-                logger.error(f"Failed to send notification to assignee {assignee.telegram_id}: {e}")
+        notification_text = (
+            f"🔄 Your task needs to be reworked!\n\n"
+            f"Name: {task.title}\n"
+            f"New deadline: {new_deadline.strftime('%m/%d/%Y %I:%M %p')}\n"
+            f"💬 Commentary from checker: {message.text}"
+        )
+        await aenqueue(Outgoing(assignee.telegram_id, notification_text) for assignee in assignees)
         
         # Update UI for the admin
         await message.answer(
@@ -751,80 +474,75 @@ async def send_task_to_revision(message: Message, state: FSMContext):
 
 
 @task_management_router.callback_query(F.data == "cancel_submission")
-async def cancel_submission(callback: CallbackQuery, state: FSMContext):
+async def cancel_submission(callback: CallbackQuery, state: FSMContext, user: TelegramUser):
     await state.clear()
     data = await state.get_data()
     task_id = data.get('task_id')
 
     if (task_id):
-        await view_task_details(callback, state)
+        await view_task_details(callback, state, user)
     else:
-        await show_my_tasks(callback, state)
+        await show_my_tasks(callback, state, user)
 
 
 @task_management_router.callback_query(F.data == "back_to_task_list")
-async def handle_back_to_task_list(callback: CallbackQuery, state: FSMContext):
+async def handle_back_to_task_list(callback: CallbackQuery, state: FSMContext, user: TelegramUser):
     await state.clear()
-    user, _ = await identify_user(callback.from_user.id)
 
-    if user.is_admin:
-        tasks = await get_admin_task_list()
-        text = "🗂 All tasks:"
-    else:
-        tasks = await get_user_tasks(user)
-        text = "📋 My tasks:"
+    result = await get_tasks(TaskQuery(is_admin=user.is_admin, viewer_id=user.pk))
+    text = "🗂 All tasks:" if user.is_admin else "📋 My tasks:"
 
-    keyboard = await get_task_list_keyboard(tasks)
+    keyboard = get_task_list_keyboard(result.page, state=result.view)
     await safe_edit_message(callback.message, text, keyboard)
     await callback.answer()
 
 
 @task_management_router.callback_query(F.data.in_(["open_tasks", "available_tasks"]))
 async def show_open_tasks(callback: CallbackQuery, state: FSMContext):
-    tasks = await get_open_tasks()
-    keyboard = get_task_list_open_keyboard(tasks)
-    try:
-        await callback.message.edit_text("📥 New tasks:", reply_markup=keyboard)
-    except Exception as e:
-        await callback.message.answer("📥 New tasks:", reply_markup=keyboard)
+    result = await get_tasks(TaskQuery(view='open'))
+    keyboard = get_task_list_open_keyboard(result.page)
+    await safe_edit_message(callback.message, "📥 New tasks:", keyboard)
     await callback.answer()
 
 
 @task_management_router.callback_query(F.data.startswith("task_page:"))
-async def handle_task_pagination(callback: CallbackQuery, state: FSMContext):
-    page = int(callback.data.split(":")[1])
-    state_ = callback.data.split(":")[2]
+async def handle_task_pagination(callback: CallbackQuery, state: FSMContext, user: TelegramUser):
+    _, page, state_, cursor = (callback.data.split(":") + ['*', ''])[:4]
+    page = int(page)
     data = await state.get_data()
     filtered_user_id = data.get('filtered_user_id')
     logging.info(f'FILTERED_USER_ID = {filtered_user_id}')
 
-    user, _ = await identify_user(callback.from_user.id)
+    result = await get_tasks(TaskQuery(
+        view=state_,
+        is_admin=user.is_admin,
+        viewer_id=user.pk,
+        target_telegram_id=filtered_user_id,
+        page=page,
+        cursor=cursor,
+    ))
+
+    if result.view == 'open':
+        keyboard = get_task_list_open_keyboard(result.page)
+        await safe_edit_message(callback.message, "📥 New tasks:", keyboard)
+        await callback.answer()
+        return
 
     if not user.is_admin:
-        tasks = await get_user_tasks(user, state_)
         text = "📋 My tasks:"
-    elif filtered_user_id:
-        logger.info(f"Getting user filtered tasks for user {filtered_user_id} with state {state_}")
-        tasks = await get_user_filtered_tasks(filtered_user_id, state_)
-        filtered_user = await sync_to_async(TelegramUser.objects.get)(telegram_id=filtered_user_id)
-        text = f"📋 User's tasks {filtered_user.first_name}:"
+    elif result.target is not None:
+        text = f"📋 User's tasks {result.target.first_name}:"
     else:
-        tasks = await get_admin_task_list(state=state_)
         text = "📋 All tasks:"
 
-    keyboard = await get_task_list_keyboard(tasks, page=page, state=state_)
-    try:
-        await callback.message.edit_text(text, reply_markup=keyboard)
-    except Exception as e:
-        await callback.message.answer(text, reply_markup=keyboard)
+    keyboard = get_task_list_keyboard(result.page, state=result.view)
+    await safe_edit_message(callback.message, text, keyboard)
     await callback.answer()
 
 
 @task_management_router.callback_query(F.data == "filter_by_user")
-async def show_user_filter(callback: CallbackQuery, state: FSMContext):
-    user, _ = await identify_user(callback.from_user.id)
-
-    if not user.is_admin:
+async def show_user_filter(callback: CallbackQuery, state: FSMContext, is_admin: bool):
+    if not is_admin:
         await callback.answer("You do not have access!", show_alert=True)
         return
 
@@ -838,45 +556,33 @@ async def show_user_filter(callback: CallbackQuery, state: FSMContext):
 
     users = await get_active_users()
     keyboard = get_user_filter_keyboard(users)
-    try:
-        await callback.message.edit_text("👥 Choose user for filtration:", reply_markup=keyboard)
-    except Exception as e:
-        await callback.message.answer("👥 Choose user for filtration:", reply_markup=keyboard)
+    await safe_edit_message(callback.message, "👥 Choose user for filtration:", keyboard)
     await callback.answer()
 
 
 @task_management_router.callback_query(F.data.startswith("filter_tasks_user:"))
-async def show_filtered_tasks(callback: CallbackQuery, state: FSMContext):
+async def show_filtered_tasks(callback: CallbackQuery, state: FSMContext, is_admin: bool):
+    if not is_admin:
+        await callback.answer("You do not have access!", show_alert=True)
+        return
+
     user_id = int(callback.data.split(":")[1])
     page = 1
     await state.update_data(filtered_user_id=user_id, page=page)
 
-    tasks = await get_user_filtered_tasks(user_id)
-    filtered_user = await sync_to_async(TelegramUser.objects.get)(telegram_id=user_id)
+    result = await get_tasks(TaskQuery(is_admin=is_admin, target_telegram_id=user_id, page=page))
 
-    keyboard = await get_task_list_keyboard(tasks, page=page)
-    try:
-        await callback.message.edit_text(
-            f"📋 User's tasks {filtered_user.first_name}:",
-            reply_markup=keyboard
-        )
-    except Exception as e:
-        await callback.message.answer(
-            f"📋 User's tasks {filtered_user.first_name}:",
-            reply_markup=keyboard
-        )
+    keyboard = get_task_list_keyboard(result.page, state=result.view)
+    await safe_edit_message(callback.message, f"📋 User's tasks {result.target.first_name}:", keyboard)
     await callback.answer()
 
 
 @task_management_router.callback_query(F.data == "clear_filter")
-async def clear_task_filter(callback: CallbackQuery, state: FSMContext):
+async def clear_task_filter(callback: CallbackQuery, state: FSMContext, is_admin: bool):
     await state.clear()
-    tasks = await get_admin_task_list()
-    keyboard = await get_task_list_keyboard(tasks)
-    try:
-        await callback.message.edit_text("📋 All tasks:", reply_markup=keyboard)
-    except Exception as e:
-        await callback.message.answer("📋 All tasks:", reply_markup=keyboard)
+    result = await get_tasks(TaskQuery(is_admin=is_admin))
+    keyboard = get_task_list_keyboard(result.page, state=result.view)
+    await safe_edit_message(callback.message, "📋 All tasks:", keyboard)
     await callback.answer()
 
 
@@ -894,93 +600,67 @@ async def handle_user_filter_pagination(callback: CallbackQuery, state: FSMConte
 
     users = await get_active_users()
     keyboard = get_user_filter_keyboard(users, page=page)
-    try:
-        await callback.message.edit_text("👥 Choose user for filtration:", reply_markup=keyboard)
-    except Exception as e:
-        await callback.message.answer("👥 Choose user for filtration:", reply_markup=keyboard)
+    await safe_edit_message(callback.message, "👥 Choose user for filtration:", keyboard)
     await callback.answer()
 
 
 @task_management_router.callback_query(F.data == "completed_tasks")
-async def show_completed_tasks(callback: CallbackQuery, state: FSMContext):
-    user, _ = await identify_user(callback.from_user.id)
-
-    if not user.is_admin:
+async def show_completed_tasks(callback: CallbackQuery, state: FSMContext, is_admin: bool):
+    if not is_admin:
         await callback.answer("You do not have access!", show_alert=True)
         return
 
-    tasks = await get_completed_tasks()
-    keyboard = await get_task_list_keyboard(tasks)
-    try:
-        await callback.message.edit_text("✅ Completed tasks:", reply_markup=keyboard)
-    except Exception as e:
-        await callback.message.answer("✅ Completed tasks:", reply_markup=keyboard)
+    result = await get_tasks(TaskQuery(view='completed', is_admin=True))
+    keyboard = get_task_list_keyboard(result.page, state=result.view)
+    await safe_edit_message(callback.message, "✅ Completed tasks:", keyboard)
     await callback.answer()
 
 
 @task_management_router.callback_query(F.data == "overdue_tasks")
-async def show_overdue_tasks(callback: CallbackQuery, state: FSMContext):
-    user, _ = await identify_user(callback.from_user.id)
-
-    if not user.is_admin:
+async def show_overdue_tasks(callback: CallbackQuery, state: FSMContext, is_admin: bool):
+    if not is_admin:
         await callback.answer("You do not have access!", show_alert=True)
         return
 
-    tasks = await get_overdue_tasks()
-    keyboard = await get_task_list_keyboard(tasks)
-    try:
-        await callback.message.edit_text("⏰ Overdue tasks:", reply_markup=keyboard)
-    except Exception as e:
-        await callback.message.answer("⏰ Overdue tasks:", reply_markup=keyboard)
+    result = await get_tasks(TaskQuery(view='overdue', is_admin=True))
+    keyboard = get_task_list_keyboard(result.page, state=result.view)
+    await safe_edit_message(callback.message, "⏰ Overdue tasks:", keyboard)
     await callback.answer()
 
 
 @task_management_router.callback_query(F.data == "user_completed_tasks")
-async def show_user_completed_tasks(callback: CallbackQuery, state: FSMContext):
-    user, _ = await identify_user(callback.from_user.id)
-    tasks = await get_user_completed_tasks(user)
-    keyboard = await get_task_list_keyboard(tasks)
-    try:
-        await callback.message.edit_text("✅ My completed tasks:", reply_markup=keyboard)
-    except Exception as e:
-        await callback.message.answer("✅ My completed tasks:", reply_markup=keyboard)
+async def show_user_completed_tasks(callback: CallbackQuery, state: FSMContext, user: TelegramUser):
+    result = await get_tasks(TaskQuery(view='completed', viewer_id=user.pk))
+    keyboard = get_task_list_keyboard(result.page, state=result.view)
+    await safe_edit_message(callback.message, "✅ My completed tasks:", keyboard)
     await callback.answer()
 
 
 @task_management_router.callback_query(F.data == "user_overdue_tasks")
-async def show_user_overdue_tasks(callback: CallbackQuery, state: FSMContext):
-    user, _ = await identify_user(callback.from_user.id)
-    tasks = await get_user_overdue_tasks(user)
-    keyboard = await get_task_list_keyboard(tasks)
-    try:
-        await callback.message.edit_text("⏰ My overdue tasks:", reply_markup=keyboard)
-    except Exception as e:
-        await callback.message.answer("⏰ My overdue tasks:", reply_markup=keyboard)
+async def show_user_overdue_tasks(callback: CallbackQuery, state: FSMContext, user: TelegramUser):
+    result = await get_tasks(TaskQuery(view='overdue', viewer_id=user.pk))
+    keyboard = get_task_list_keyboard(result.page, state=result.view)
+    await safe_edit_message(callback.message, "⏰ My overdue tasks:", keyboard)
     await callback.answer()
 
 
 @task_management_router.callback_query(F.data == "my_tasks")
-async def show_my_tasks(callback: CallbackQuery, state: FSMContext):
-    user, _ = await identify_user(callback.from_user.id)
-    tasks = await get_user_tasks(user)
-    keyboard = await get_task_list_keyboard(tasks)
-    try:
-        await callback.message.edit_text("📋 My tasks:", reply_markup=keyboard)
-    except Exception as e:
-        await callback.message.answer("📋 My tasks:", reply_markup=keyboard)
+async def show_my_tasks(callback: CallbackQuery, state: FSMContext, user: TelegramUser):
+    result = await get_tasks(TaskQuery(view='active', viewer_id=user.pk))
+    keyboard = get_task_list_keyboard(result.page, state=result.view)
+    await safe_edit_message(callback.message, "📋 My tasks:", keyboard)
     await callback.answer()
 
 
 @task_management_router.callback_query(F.data.startswith("delete_task:"))
-async def handle_delete_task(callback: CallbackQuery, state: FSMContext):
+async def handle_delete_task(callback: CallbackQuery, state: FSMContext, is_admin: bool):
     user_id = callback.from_user.id
     logger.info(f"Admin {user_id} attempting to delete task")
     
     try:
         task_id = int(callback.data.split(":")[1])
-        user, _ = await identify_user(user_id)
         
-        if not user.is_admin:
+        if not is_admin:
             logger.warning(f"Unauthorized delete attempt by user {user_id}")
             await callback.answer("You do not have access!", show_alert=True)
             return
@@ -990,26 +670,19 @@ async def handle_delete_task(callback: CallbackQuery, state: FSMContext):
             task = Task.objects.get(id=task_id)
             task_title = task.title
             task.delete()
-            return task_title
+            return task_title, fetch_tasks(TaskQuery(is_admin=True))
             
-        task_title = await delete_task()
+        task_title, result = await delete_task()
         logger.info(f"Task {task_id} ({task_title}) deleted by admin {user_id}")
         
         # Return to task list
-        tasks = await get_admin_task_list()
-        keyboard = await get_task_list_keyboard(tasks)
-        try:
-            await callback.message.edit_text(
-                f"✅ Task «{task_title}» deleted\n\n"
-                "📋 All tasks:",
-                reply_markup=keyboard
-            )
-        except Exception as e:
-            await callback.message.answer(
-                f"✅ Task «{task_title}» deleted\n\n"
-                "📋 All tasks:",
-                reply_markup=keyboard
-            )   
+        keyboard = get_task_list_keyboard(result.page, state=result.view)
+        await safe_edit_message(
+            callback.message,
+            f"✅ Task «{task_title}» deleted\n\n"
+            "📋 All tasks:",
+            keyboard
+        )
         await callback.answer("Task successfully deleted")
         
     except Exception as e:
@@ -1059,13 +732,12 @@ def mark_task_accepted(task_id, user):
 
 
 @task_management_router.callback_query(F.data.startswith("accept_task:"))
-async def accept_task(callback: CallbackQuery, state: FSMContext):
+async def accept_task(callback: CallbackQuery, state: FSMContext, user: TelegramUser):
     user_id = callback.from_user.id
     logger.info(f"User {user_id} accepting task")
     
     try:
         task_id = int(callback.data.split(":")[1])
-        user, _ = await identify_user(user_id)
         
         task, accepted = await mark_task_accepted(task_id, user)
         
@@ -1083,26 +755,16 @@ async def accept_task(callback: CallbackQuery, state: FSMContext):
                 f"Time of comfirmation: {timezone.now().astimezone(ZoneInfo('Europe/Moscow')).strftime('%m/%d/%Y %I:%M %p')}"
             )
             
-            try:
-                await callback.bot.send_message(creator_id, admin_notification)
-                logger.info(f"Sent acceptance notification to admin {creator_id}")
-            except Exception as e:
-                logger.error(f"Failed to send notification to admin {creator_id}: {e}")
+            await aenqueue([Outgoing(creator_id, admin_notification)])
+            logger.info(f"Queued acceptance notification to admin {creator_id}")
             
             # Update UI for the user
-            try:
-                await callback.message.edit_text(
-                    f"✅ You confirmed task!\n\n"
-                    f"Task: {task.title}\n"
-                    f"Deadline: {task.deadline.strftime('%m/%d/%Y %I:%M %p')}"
-                )
-            except Exception as e:
-                logger.warning(f"Failed to update UI for user {user_id}: {e}")
-                await callback.message.answer(
-                    f"✅ You confirmed task!\n\n"
-                    f"Task: {task.title}\n"
-                    f"Deadline: {task.deadline.strftime('%m/%d/%Y %I:%M %p')}"
-                )
+            await safe_edit_message(
+                callback.message,
+                f"✅ You confirmed task!\n\n"
+                f"Task: {task.title}\n"
+                f"Deadline: {task.deadline.strftime('%m/%d/%Y %I:%M %p')}"
+            )
                 
             await callback.answer("✅ Task successfully became in progress!")
             logger.info(f"User {user_id} accepted task {task_id}")
@@ -1120,46 +782,27 @@ async def accept_task(callback: CallbackQuery, state: FSMContext):
 @task_management_router.callback_query(F.data.startswith("cancel_review:"))
 async def cancel_review(callback: CallbackQuery, state: FSMContext):
     await state.clear()
-    try:
-        await callback.message.edit_text("❌ Check canceled")
-    except Exception as e:
-        await callback.message.answer("❌ Check canceled")
+    await safe_edit_message(callback.message, "❌ Check canceled")
     await callback.answer()
 
 
 @task_management_router.callback_query(F.data == "submitted_tasks")
-async def show_submitted_tasks(callback: CallbackQuery, state: FSMContext):
-    user, _ = await identify_user(callback.from_user.id)
+async def show_submitted_tasks(callback: CallbackQuery, state: FSMContext, user: TelegramUser):
 
-    if user.is_admin:
-        tasks = await get_admin_task_list("submitted_tasks")
-        text = "📤 Tasks on check:"
-    else:
-        tasks = await get_user_tasks(user, "user_submitted_tasks")
-        text = "📤 My tasks on check:"
+    result = await get_tasks(TaskQuery(view='submitted', is_admin=user.is_admin, viewer_id=user.pk))
+    text = "📤 Tasks on check:" if user.is_admin else "📤 My tasks on check:"
 
-    keyboard = await get_task_list_keyboard(tasks, state="submitted_tasks")
-    try:
-        await callback.message.edit_text(text, reply_markup=keyboard)
-    except Exception as e:
-        await callback.message.answer(text, reply_markup=keyboard)
+    keyboard = get_task_list_keyboard(result.page, state=result.view)
+    await safe_edit_message(callback.message, text, keyboard)
     await callback.answer()
 
 
 @task_management_router.callback_query(F.data == "revision_tasks")
-async def show_revision_tasks(callback: CallbackQuery, state: FSMContext):
-    user, _ = await identify_user(callback.from_user.id)
+async def show_revision_tasks(callback: CallbackQuery, state: FSMContext, user: TelegramUser):
 
-    if user.is_admin:
-        tasks = await get_admin_task_list("revision_tasks")
-        text = "🔄 Tasks on rework:"
-    else:
-        tasks = await get_user_tasks(user, "user_revision_tasks")
-        text = "🔄 My tasks on rework:"
+    result = await get_tasks(TaskQuery(view='revision', is_admin=user.is_admin, viewer_id=user.pk))
+    text = "🔄 Tasks on rework:" if user.is_admin else "🔄 My tasks on rework:"
 
-    keyboard = await get_task_list_keyboard(tasks, state="revision_tasks")
-    try:
-        await callback.message.edit_text(text, reply_markup=keyboard)
-    except Exception as e:
-        await callback.message.answer(text, reply_markup=keyboard)
+    keyboard = get_task_list_keyboard(result.page, state=result.view)
+    await safe_edit_message(callback.message, text, keyboard)
     await callback.answer()
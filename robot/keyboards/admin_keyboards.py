@@ -7,10 +7,31 @@ def get_admin_settings_keyboard() -> InlineKeyboardMarkup:
     builder.button(text="🔔 Notification Settings", callback_data="notification_settings")
     builder.button(text="📝 Message Templates", callback_data="message_templates")
     builder.button(text="📊 Data Export", callback_data="export_data")
+    builder.button(text="🩺 Scheduler health", callback_data="scheduler_health")
     builder.button(text="◀️ Back", callback_data="back_to_main")
     builder.adjust(2)
     return builder.as_markup()
 
+def get_scheduler_health_keyboard() -> InlineKeyboardMarkup:
+    builder = InlineKeyboardBuilder()
+    builder.button(text="🔄 Refresh", callback_data="scheduler_health")
+    builder.button(text="◀️ Back", callback_data="settings")
+    builder.adjust(2)
+    return builder.as_markup()
+
+def get_notification_settings_keyboard(user) -> InlineKeyboardMarkup:
+    builder = InlineKeyboardBuilder()
+    builder.button(
+        text=f"🔔 Notifications: {'ON' if user.notification_enabled else 'OFF'}",
+        callback_data="toggle_notifications"
+    )
+    for mode, label in (('immediate', "⚡ Immediate alerts"), ('digest', "🗞 Digest per run")):
+        mark = "✅ " if user.alert_mode == mode else ""
+        builder.button(text=f"{mark}{label}", callback_data=f"alert_mode:{mode}")
+    builder.button(text="◀️ Back", callback_data="settings")
+    builder.adjust(1)
+    return builder.as_markup()
+
 def get_admin_task_list_keyboard() -> InlineKeyboardMarkup:
     builder = InlineKeyboardBuilder()
     builder.button(text="📝 Create Task", callback_data="create_task")
@@ -20,6 +41,7 @@ def get_admin_task_list_keyboard() -> InlineKeyboardMarkup:
     builder.button(text="👤 Filter by User", callback_data="filter_by_user")
     builder.button(text="⏰ Overdue", callback_data="overdue_tasks")
     builder.button(text="✅ Completed", callback_data="completed_tasks")
+    builder.button(text="🔍 Search", callback_data="search_tasks")
     builder.button(text="◀️ Back", callback_data="back_to_main")
     builder.adjust(2)
     return builder.as_markup()
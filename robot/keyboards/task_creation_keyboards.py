@@ -91,7 +91,26 @@ def get_media_keyboard() -> InlineKeyboardMarkup:
 
 def get_confirm_keyboard() -> InlineKeyboardMarkup:
     builder = InlineKeyboardBuilder()
+    builder.button(text="⏰ Add reminder", callback_data="add_reminder")
     builder.button(text="✅ Confirm", callback_data="confirm_task")
     builder.button(text="❌ Cancel", callback_data="cancel_creation")
-    builder.adjust(2)
+    builder.adjust(1, 2)
+    return builder.as_markup()
+
+
+# Minutes before the deadline offered as ready-made reminders
+REMINDER_PRESETS = [
+    ("1 day before", 24 * 60),
+    ("3 hours before", 3 * 60),
+    ("1 hour before", 60),
+]
+
+
+def get_reminder_keyboard() -> InlineKeyboardMarkup:
+    builder = InlineKeyboardBuilder()
+    for text, minutes in REMINDER_PRESETS:
+        builder.button(text=text, callback_data=f"reminder_before:{minutes}")
+    builder.button(text="✏️ Custom time", callback_data="reminder_custom")
+    builder.button(text="✅ Done", callback_data="reminder_done")
+    builder.adjust(3, 2)
     return builder.as_markup()
\ No newline at end of file
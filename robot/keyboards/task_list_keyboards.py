@@ -1,15 +1,14 @@
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
 from aiogram.utils.keyboard import InlineKeyboardBuilder
+from ..services.task_detail import TaskDetail
+from ..utils.pagination import Page
 import logging
 
 
-def get_task_list_open_keyboard(tasks, page=1, items_per_page=5) -> InlineKeyboardMarkup:
+def get_task_list_open_keyboard(tasks: Page) -> InlineKeyboardMarkup:
     builder = InlineKeyboardBuilder()
     
-    start_idx = (page - 1) * items_per_page
-    end_idx = start_idx + items_per_page
-    
-    for task in tasks[start_idx:end_idx]:
+    for task in tasks:
         status_emoji = "✅" if task.status == 'completed' else "📝"
         builder.button(
             text=f"{status_emoji} {task.title[:30]}...",
@@ -17,11 +16,10 @@ def get_task_list_open_keyboard(tasks, page=1, items_per_page=5) -> InlineKeyboa
         )
     
     # Navigation buttons
-    if len(tasks) > items_per_page:
-        if page > 1:
-            builder.button(text="⬅️", callback_data=f"task_page:{page-1}")
-        if end_idx < len(tasks):
-            builder.button(text="➡️", callback_data=f"task_page:{page+1}")
+    if tasks.has_previous:
+        builder.button(text="⬅️", callback_data=f"task_page:{tasks.number-1}:open_tasks:{tasks.previous_cursor}")
+    if tasks.has_next:
+        builder.button(text="➡️", callback_data=f"task_page:{tasks.number+1}:open_tasks:{tasks.next_cursor}")
     
     builder.button(text="◀️ Back", callback_data="back_to_main")
     builder.adjust(1)
@@ -30,29 +28,14 @@ def get_task_list_open_keyboard(tasks, page=1, items_per_page=5) -> InlineKeyboa
 from asgiref.sync import sync_to_async
 from robot.models import Task, TelegramUser, TaskAssignment
 
-@sync_to_async
-def ajdbakjdbsdjkbasjkdbasjkd(task: TaskAssignment):
-    return task.task
-
-async def get_task_list_keyboard(tasks, page=1, items_per_page=5, is_open_tasks=False, state: str = '*') -> InlineKeyboardMarkup:
+def get_task_list_keyboard(tasks: Page, is_open_tasks=False, state: str = '*') -> InlineKeyboardMarkup:
     builder = InlineKeyboardBuilder()
     
-    
-    start_idx = (page - 1) * items_per_page
-    end_idx = start_idx + items_per_page
-    
-    for task in tasks[start_idx:end_idx]:
-        
-        if isinstance(task, TaskAssignment):
-            task_ass = task
-            task = await ajdbakjdbsdjkbasjkdbasjkd(task_ass)
-        else:
-            task_ass = task
-        
+    for task in tasks:
         status_emoji = "✅" if task.status == 'completed' else "📝"
-        if task_ass.status == 'overdue':
+        if task.assignment_status == 'overdue':
             status_emoji = "⏰"
-        elif task_ass.status == 'submitted':
+        elif task.assignment_status == 'submitted':
             status_emoji = "📤"
         elif task.status == 'revision':
             status_emoji = "🔄"
@@ -64,12 +47,12 @@ async def get_task_list_keyboard(tasks, page=1, items_per_page=5, is_open_tasks=
     
     # Navigation row
     nav_buttons = []
-    if len(tasks) > items_per_page:
-        if page > 1:
-            nav_buttons.append(InlineKeyboardButton(text="⬅️", callback_data=f"task_page:{page-1}:{state}"))
-        nav_buttons.append(InlineKeyboardButton(text=f"{page}/{(len(tasks) + items_per_page - 1) // items_per_page}", callback_data="current_page"))
-        if end_idx < len(tasks):
-            nav_buttons.append(InlineKeyboardButton(text="➡️", callback_data=f"task_page:{page+1}:{state}"))
+    if tasks.num_pages > 1:
+        if tasks.has_previous:
+            nav_buttons.append(InlineKeyboardButton(text="⬅️", callback_data=f"task_page:{tasks.number-1}:{state}:{tasks.previous_cursor}"))
+        nav_buttons.append(InlineKeyboardButton(text=f"{tasks.number}/{tasks.num_pages}", callback_data="current_page"))
+        if tasks.has_next:
+            nav_buttons.append(InlineKeyboardButton(text="➡️", callback_data=f"task_page:{tasks.number+1}:{state}:{tasks.next_cursor}"))
     
     if nav_buttons:
         builder.row(*nav_buttons)
@@ -88,50 +71,84 @@ async def get_task_list_keyboard(tasks, page=1, items_per_page=5, is_open_tasks=
     builder.adjust(1)
     return builder.as_markup()
 
-from robot.models import TelegramUser, TaskAssignment, Task
+def get_search_results_keyboard(tasks: Page) -> InlineKeyboardMarkup:
+    builder = InlineKeyboardBuilder()
 
-import logging
-@sync_to_async
-def get_assignment_by_task(task_id: int, user: TelegramUser):
-    try:
-        return TaskAssignment.objects.get(task_id=task_id, user=user)
-    except Exception as e:
-        logging.error(f"Error while getting TaskAssignment for task {task_id} and user {user} -> {e}")
-        return False
+    for task in tasks:
+        status_emoji = "✅" if task.status == 'completed' else "📝"
+        if task.status == 'overdue':
+            status_emoji = "⏰"
+        elif task.status == 'submitted':
+            status_emoji = "📤"
+        elif task.status == 'revision':
+            status_emoji = "🔄"
 
-@sync_to_async
-def get_assignment_for_admin(task_id: int):
-    try:
-        return TaskAssignment.objects.get(task_id=task_id)
-    except Exception as e:
-        logging.error(f"Error while getting TaskAssignment for task {task_id} -> {e}")
-        return False
-    
+        builder.button(
+            text=f"{status_emoji} {task.title}",
+            callback_data=f"view_task:{task.id}"
+        )
+
+    # Navigation row; the query itself stays in the FSM data
+    nav_buttons = []
+    if tasks.num_pages > 1:
+        if tasks.has_previous:
+            nav_buttons.append(InlineKeyboardButton(text="⬅️", callback_data=f"search_page:{tasks.number-1}"))
+        nav_buttons.append(InlineKeyboardButton(text=f"{tasks.number}/{tasks.num_pages}", callback_data="current_page"))
+        if tasks.has_next:
+            nav_buttons.append(InlineKeyboardButton(text="➡️", callback_data=f"search_page:{tasks.number+1}"))
 
-async def get_task_detail_keyboard(task_id: int, user_is_admin: bool = False, task_status: str = 'open', user: TelegramUser = None) -> InlineKeyboardMarkup:
+    if nav_buttons:
+        builder.row(*nav_buttons)
+
+    builder.button(text="🔍 New search", callback_data="search_tasks")
+    builder.button(text="◀️ Back", callback_data="tasks")
+    builder.adjust(1)
+    return builder.as_markup()
+
+def get_digest_keyboard(digest_id: int, tasks: Page) -> InlineKeyboardMarkup:
+    builder = InlineKeyboardBuilder()
+
+    for task in tasks:
+        status_emoji = "⏰" if task.status == 'overdue' else "⚠️"
+        builder.button(
+            text=f"{status_emoji} {task.title}",
+            callback_data=f"view_task:{task.id}"
+        )
+
+    # Navigation row; the task ids stay in the AlertDigest row
+    nav_buttons = []
+    if tasks.num_pages > 1:
+        if tasks.has_previous:
+            nav_buttons.append(InlineKeyboardButton(text="⬅️", callback_data=f"digest_page:{digest_id}:{tasks.number-1}"))
+        nav_buttons.append(InlineKeyboardButton(text=f"{tasks.number}/{tasks.num_pages}", callback_data="current_page"))
+        if tasks.has_next:
+            nav_buttons.append(InlineKeyboardButton(text="➡️", callback_data=f"digest_page:{digest_id}:{tasks.number+1}"))
+
+    if nav_buttons:
+        builder.row(*nav_buttons)
+
+    builder.adjust(1)
+    return builder.as_markup()
+
+def get_task_detail_keyboard(task: TaskDetail, user_is_admin: bool = False) -> InlineKeyboardMarkup:
     builder = InlineKeyboardBuilder()
     
-    if not user_is_admin:
-        task_ass = await get_assignment_by_task(task_id, user)
-    else:
-        task_ass = await get_assignment_for_admin(task_id)
-        
-    if task_ass == False:
+    # Users without an assignment of their own can only open tasks still open to take; any assignment, accepted or not, is enough
+    if not user_is_admin and task.viewer_assignment_status is None and task.status != 'open':
         return False
-    logging.info(f"Review of the task -> {task_status}")
+    logging.info(f"Review of the task -> {task.status}")
     
-    if task_status == 'open' and not user_is_admin:
-        builder.button(text="✅ Take Task", callback_data=f"take_task:{task_id}")
-    elif (task_ass.status == 'in_progress' or task_ass.status == 'assigned' or 
-          task_ass.status == 'overdue' or task_ass.status == 'revision') and not user_is_admin:
-        builder.button(text="📤 Submit Task", callback_data=f"submit_task:{task_id}")
+    if task.status == 'open' and not user_is_admin:
+        builder.button(text="✅ Take Task", callback_data=f"take_task:{task.id}")
+    elif task.viewer_assignment_status in ('in_progress', 'assigned', 'overdue', 'revision') and not user_is_admin:
+        builder.button(text="📤 Submit Task", callback_data=f"submit_task:{task.id}")
     
-    if task_ass.status == 'submitted' and user_is_admin:
-        builder.button(text="✅ Accept", callback_data=f"accept_task:{task_id}")
-        builder.button(text="🔄 Request Revision", callback_data=f"request_revision:{task_id}")
+    if task.has_submitted_assignment and user_is_admin:
+        builder.button(text="✅ Accept", callback_data=f"accept_task:{task.id}")
+        builder.button(text="🔄 Request Revision", callback_data=f"request_revision:{task.id}")
     
     if user_is_admin:
-        builder.button(text="❌ Delete", callback_data=f"delete_task:{task_id}")
+        builder.button(text="❌ Delete", callback_data=f"delete_task:{task.id}")
     
     builder.button(text="◀️ Back to List", callback_data="back_to_task_list")
     builder.adjust(1)
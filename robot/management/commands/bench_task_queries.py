@@ -0,0 +1,78 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.utils import timezone
+
+from robot.models import Task, TaskAssignment, TelegramUser
+from robot.services.task_query import TaskQuery, fetch_tasks
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'RUN COMMAND: python manage.py bench_task_queries [--sizes 10 100 1000 5000]'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', nargs='+', type=int, default=[10, 100, 1000, 5000])
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def handle(self, *args, **options):
+        # Everything is seeded inside a transaction that is rolled back at the end
+        try:
+            with transaction.atomic():
+                self.run(options['sizes'], options['repeat'])
+                raise Rollback
+        except Rollback:
+            pass
+
+    def run(self, sizes, repeat):
+        admin = TelegramUser.objects.create(telegram_id=-1, first_name='bench admin', is_admin=True)
+        deadline = timezone.now() + timedelta(days=1)
+        self.stdout.write(f"{'assignments':>12} {'view':>10} {'queries':>8} {'page 1 ms':>10} {'last page ms':>13}")
+
+        for index, size in enumerate(sizes, start=2):
+            user = TelegramUser.objects.create(telegram_id=-index, first_name=f'bench {size}')
+            tasks = Task.objects.bulk_create(
+                Task(
+                    title=f'bench {size}/{n}',
+                    description='',
+                    creator=admin,
+                    deadline=deadline,
+                    # Every third task is also assigned directly, so the OR branch overlaps the EXISTS branch
+                    assignee=user if n % 3 == 0 else None,
+                    status='in_progress' if n % 2 else 'completed',
+                    is_group_task=n % 3 != 0,
+                )
+                for n in range(size)
+            )
+            TaskAssignment.objects.bulk_create(
+                TaskAssignment(task=task, user=user, status=task.status) for task in tasks
+            )
+
+            for view in ('all', 'active', 'completed'):
+                first = TaskQuery(view=view, is_admin=True, target_telegram_id=user.telegram_id)
+                result = fetch_tasks(first)
+                assert len({row.pk for row in result.page}) == len(result.page), 'duplicate rows on a page'
+                last = first._replace(page=result.page.num_pages)
+
+                queries = self.count_queries(first)
+                self.stdout.write(
+                    f"{size:>12} {view:>10} {queries:>8} "
+                    f"{self.time_query(first, repeat):>10.2f} {self.time_query(last, repeat):>13.2f}"
+                )
+
+    def count_queries(self, query):
+        executed = []
+        with connection.execute_wrapper(lambda execute, sql, *args: executed.append(sql) or execute(sql, *args)):
+            fetch_tasks(query)
+        return len(executed)
+
+    def time_query(self, query, repeat):
+        started = time.perf_counter()
+        for _ in range(repeat):
+            fetch_tasks(query)
+        return (time.perf_counter() - started) * 1000 / repeat
@@ -0,0 +1,112 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.utils import timezone
+
+from robot.models import Reminder, Task, TaskAssignment, TelegramUser
+from robot.schedulers.escalation import escalation_queryset, load_rules
+from robot.schedulers.task_scheduler import overdue_queryset
+from robot.services.task_query import VIEWS, compile_query
+from robot.utils.task_rows import paginate_task_rows
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'RUN COMMAND: python manage.py explain_task_queries [--scans-only]'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scans-only', action='store_true', help='Only print queries that scan a whole table')
+
+    def handle(self, *args, **options):
+        self.scans_only = options['scans_only']
+        # One row per table is enough for the cursor branch to run; it is rolled back afterwards
+        try:
+            with transaction.atomic():
+                self.run()
+                raise Rollback
+        except Rollback:
+            pass
+
+    def run(self):
+        user = TelegramUser.objects.create(telegram_id=-1, first_name='explain')
+        task = Task.objects.create(
+            title='explain', description='', creator=user, deadline=timezone.now() + timedelta(days=1)
+        )
+        TaskAssignment.objects.create(task=task, user=user)
+        Reminder.objects.create(task=task, reminder_time=timezone.now())
+        scans = 0
+
+        # Scheduler jobs
+        scans += self.report('scheduler: overdue transition', lambda: list(overdue_queryset()))
+        rules = load_rules()
+        if rules:
+            scans += self.report('scheduler: escalation rules', lambda: list(escalation_queryset(rules)))
+        scans += self.report(
+            'reminders: due batch',
+            lambda: list(
+                Reminder.objects.filter(is_sent=False, reminder_time__lte=timezone.now())
+                .order_by('reminder_time').values_list('pk', flat=True)[:100]
+            ),
+        )
+
+        # Task lists, with the COUNT and the page query exactly as the handlers run them
+        for view in VIEWS:
+            for is_admin, targeted, role in ((True, False, 'admin'), (False, False, 'user'), (True, True, 'filtered')):
+                if role == 'user' and VIEWS[view][1] is None:
+                    continue
+                compiled = compile_query(view, is_admin, targeted)
+                queryset = compiled.queryset(user.pk)
+                cursor = f"a{compiled.model.objects.values_list('pk', flat=True).first()}"
+                scans += self.report(
+                    f"list {view} ({role}) page 2",
+                    lambda: paginate_task_rows(queryset, page=2, per_page=5),
+                )
+                scans += self.report(
+                    f"list {view} ({role}) after cursor",
+                    lambda: paginate_task_rows(queryset, page=2, per_page=5, cursor=cursor),
+                )
+
+        self.stdout.write(f"\n{scans} full table scan(s)")
+
+    def capture(self, run):
+        queries = []
+
+        def wrapper(execute, sql, params, many, context):
+            queries.append((sql, params))
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(wrapper):
+            run()
+        return queries
+
+    def explain(self, sql, params):
+        with connection.cursor() as cursor:
+            cursor.execute(f"{connection.ops.explain_query_prefix()} {sql}", params)
+            return [str(row[-1]) for row in cursor.fetchall()]
+
+    def report(self, title, run):
+        scans = 0
+        for sql, params in self.capture(run):
+            if not sql.lstrip().upper().startswith('SELECT'):
+                continue
+            plan = self.explain(sql, params)
+            table_scans = [line for line in plan if self.is_table_scan(line)]
+            scans += len(table_scans)
+            if self.scans_only and not table_scans:
+                continue
+            self.stdout.write(f"\n== {title}\n{sql}")
+            for line in plan:
+                marker = '  !! ' if line in table_scans else '     '
+                self.stdout.write(f"{marker}{line}")
+        return scans
+
+    @staticmethod
+    def is_table_scan(line: str) -> bool:
+        # SQLite: "SCAN robot_task"; PostgreSQL: "Seq Scan on robot_task"
+        if line.startswith('SCAN '):
+            return 'USING' not in line and 'CONSTANT ROW' not in line
+        return 'Seq Scan' in line
@@ -3,7 +3,10 @@ from django.core.management.base import BaseCommand
 from dotenv import load_dotenv
 from aiogram import Dispatcher, Bot
 from robot.handlers import router
+from robot.notifications import outbox_workers, reminder_worker
 from robot.schedulers import setup_all_schedulers
+from robot.utils.get_text_by_name import bot_texts
+from asgiref.sync import sync_to_async
 import asyncio
 import logging
 
@@ -23,6 +26,10 @@ class Command(BaseCommand):
         logging.basicConfig(level=logging.INFO)
         
         async def main():
+            await sync_to_async(bot_texts.load)()
+            text_watcher = asyncio.create_task(bot_texts.watch())
+            outbox = asyncio.create_task(outbox_workers.run(bot, int(os.getenv("OUTBOX_WORKERS", 4))))
+            reminders = asyncio.create_task(reminder_worker.run())
             await setup_all_schedulers(bot)
             await dp.start_polling(bot)
             
@@ -0,0 +1 @@
+from .user_middleware import UserMiddleware
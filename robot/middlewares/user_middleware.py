@@ -0,0 +1,26 @@
+from typing import Any, Awaitable, Callable, Dict
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject, User
+
+from ..utils import identify_user
+
+
+class UserMiddleware(BaseMiddleware):
+    """
+    Resolves the TelegramUser behind an update once and hands it to handlers
+    as `user` together with an `is_admin` flag.
+    """
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        from_user: User | None = data.get("event_from_user")
+        if from_user is not None and "user" not in data:
+            user, _ = await identify_user(from_user.id, from_user.username, from_user.full_name)
+            data["user"] = user
+            data["is_admin"] = user.is_admin
+        return await handler(event, data)
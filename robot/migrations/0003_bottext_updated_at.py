@@ -0,0 +1,32 @@
+# Generated by Django 6.1.2 on 2026-10-18 06:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("robot", "0002_taskassignment_status"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="bottext",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AlterField(
+            model_name="task",
+            name="media_type",
+            field=models.CharField(
+                blank=True,
+                choices=[
+                    ("photo", "Photo"),
+                    ("video", "Video"),
+                    ("document", "Document"),
+                ],
+                max_length=10,
+                null=True,
+            ),
+        ),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 6.1.2 on 2026-10-18 06:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("robot", "0003_bottext_updated_at"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="task",
+            index=models.Index(
+                fields=["status", "deadline"], name="task_status_deadline_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="task",
+            index=models.Index(
+                fields=["status", "-created_at"], name="task_status_created_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="task",
+            index=models.Index(
+                fields=["status", "-completed_at"], name="task_status_completed_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="task",
+            index=models.Index(fields=["-created_at"], name="task_created_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="task",
+            index=models.Index(
+                condition=models.Q(
+                    ("status__in", ["open", "assigned", "in_progress", "overdue"])
+                ),
+                fields=["deadline"],
+                name="task_active_deadline_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="taskassignment",
+            index=models.Index(
+                fields=["user", "status"], name="assignment_user_status_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="taskassignment",
+            index=models.Index(
+                fields=["status", "task"], name="assignment_status_task_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,106 @@
+from django.db import migrations, utils
+
+# Full-text index over task titles, descriptions and comment texts. The FTS5
+# rowid is the task id; the comments column holds every comment of the task.
+# Triggers keep it in step with robot_task and robot_taskcomment, including
+# writes that bypass the ORM (bulk updates, the admin, raw SQL).
+
+COMMENTS = (
+    "(SELECT group_concat(text, ' ') FROM robot_taskcomment WHERE task_id = {task})"
+)
+
+FORWARD = [
+    """
+    CREATE VIRTUAL TABLE robot_task_fts USING fts5(
+        title, description, comments,
+        tokenize = 'unicode61 remove_diacritics 2',
+        prefix = '2 3'
+    )
+    """,
+    """
+    CREATE TRIGGER robot_task_fts_insert AFTER INSERT ON robot_task BEGIN
+        INSERT INTO robot_task_fts (rowid, title, description, comments)
+        VALUES (new.id, new.title, new.description, '');
+    END
+    """,
+    """
+    CREATE TRIGGER robot_task_fts_update AFTER UPDATE OF title, description ON robot_task BEGIN
+        UPDATE robot_task_fts SET title = new.title, description = new.description
+        WHERE rowid = new.id;
+    END
+    """,
+    """
+    CREATE TRIGGER robot_task_fts_delete AFTER DELETE ON robot_task BEGIN
+        DELETE FROM robot_task_fts WHERE rowid = old.id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER robot_taskcomment_fts_insert AFTER INSERT ON robot_taskcomment BEGIN
+        UPDATE robot_task_fts SET comments = {COMMENTS.format(task='new.task_id')}
+        WHERE rowid = new.task_id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER robot_taskcomment_fts_update AFTER UPDATE OF text, task_id ON robot_taskcomment BEGIN
+        UPDATE robot_task_fts SET comments = {COMMENTS.format(task='old.task_id')}
+        WHERE rowid = old.task_id;
+        UPDATE robot_task_fts SET comments = {COMMENTS.format(task='new.task_id')}
+        WHERE rowid = new.task_id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER robot_taskcomment_fts_delete AFTER DELETE ON robot_taskcomment BEGIN
+        UPDATE robot_task_fts SET comments = {COMMENTS.format(task='old.task_id')}
+        WHERE rowid = old.task_id;
+    END
+    """,
+    f"""
+    INSERT INTO robot_task_fts (rowid, title, description, comments)
+    SELECT id, title, description, coalesce({COMMENTS.format(task='robot_task.id')}, '')
+    FROM robot_task
+    """,
+]
+
+BACKWARD = [
+    "DROP TRIGGER IF EXISTS robot_taskcomment_fts_delete",
+    "DROP TRIGGER IF EXISTS robot_taskcomment_fts_update",
+    "DROP TRIGGER IF EXISTS robot_taskcomment_fts_insert",
+    "DROP TRIGGER IF EXISTS robot_task_fts_delete",
+    "DROP TRIGGER IF EXISTS robot_task_fts_update",
+    "DROP TRIGGER IF EXISTS robot_task_fts_insert",
+    "DROP TABLE IF EXISTS robot_task_fts",
+]
+
+
+def create_search_index(apps, schema_editor):
+    # Other backends search with the ORM fallback in robot.services.task_search
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    with schema_editor.connection.cursor() as cursor:
+        try:
+            cursor.execute("CREATE VIRTUAL TABLE temp.fts5_probe USING fts5(x)")
+            cursor.execute("DROP TABLE temp.fts5_probe")
+        except utils.OperationalError:
+            # SQLite built without FTS5
+            return
+        for statement in FORWARD:
+            cursor.execute(statement)
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    with schema_editor.connection.cursor() as cursor:
+        for statement in BACKWARD:
+            cursor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("robot", "0004_task_indexes"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 6.1.2 on 2026-10-18 07:01
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("robot", "0007_outboxmessage"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="telegramuser",
+            name="alert_mode",
+            field=models.CharField(
+                choices=[("immediate", "Immediate"), ("digest", "Digest")],
+                default="immediate",
+                max_length=20,
+            ),
+        ),
+        migrations.CreateModel(
+            name="AlertDigest",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("title", models.CharField(max_length=255)),
+                ("task_ids", models.JSONField(default=list)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "recipient",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="alert_digests",
+                        to="robot.telegramuser",
+                    ),
+                ),
+            ],
+        ),
+    ]
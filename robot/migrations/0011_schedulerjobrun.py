@@ -0,0 +1,56 @@
+# Generated by Django 6.1.2 on 2026-10-18 07:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("robot", "0010_schedulernode"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SchedulerJobRun",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("job", models.CharField(max_length=100)),
+                ("node", models.CharField(max_length=255)),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("ok", "OK"),
+                            ("failed", "Failed"),
+                            ("misfired", "Misfired"),
+                            ("overlapped", "Overlapped"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                ("started_at", models.DateTimeField()),
+                ("duration", models.FloatField(blank=True, null=True)),
+                ("scanned", models.PositiveIntegerField(default=0)),
+                ("attempted", models.PositiveIntegerField(default=0)),
+                ("sent", models.PositiveIntegerField(default=0)),
+                ("failed", models.PositiveIntegerField(default=0)),
+                ("overlapped", models.BooleanField(default=False)),
+                ("error", models.TextField(blank=True, default="")),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["job", "-started_at"], name="job_run_job_started_idx"
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,135 @@
+# Generated by Django 6.1.2 on 2026-10-18 07:10
+
+from datetime import timedelta
+
+from django.db import migrations, models
+
+
+def deadline_rule(name, hours, time_text, audience):
+    return {
+        'name': name,
+        'offset': timedelta(hours=-hours),
+        'window': timedelta(hours=hours),
+        'audience': audience,
+        'template': (
+            "⚠️ Reminder!\n"
+            f"The deadline for the task «{{title}}» is in {time_text}!\n"
+            "Deadline: {deadline}"
+        ),
+        'admin_template': (
+            "🚨 Attention, Admin!\n"
+            "The task «{title}» is in a critical status!\n"
+            f"Time left: {time_text}\n"
+            "Assignee: {assignee}\n"
+            "Deadline: {deadline}"
+        ),
+        'digest_title': f"🚨 Deadline in {time_text}",
+    }
+
+
+def overdue_rule(name, hours, window, suffix, digest_title):
+    return {
+        'name': name,
+        'offset': timedelta(hours=hours),
+        'window': window,
+        'audience': 'both',
+        'template': (
+            "🚨 Attention!\n"
+            f"The task «{{title}}» is overdue{suffix}!\n"
+            "Deadline was: {deadline}"
+        ),
+        'admin_template': (
+            "🚨 Attention, Admin!\n"
+            f"The task «{{title}}» is overdue{suffix}!\n"
+            "Assignee: {assignee}\n"
+            "Deadline was: {deadline}"
+        ),
+        'digest_title': digest_title,
+    }
+
+
+# The ladder the scheduler used to hard-code; admins only hear about tasks down to their last day
+DEFAULT_RULES = [
+    deadline_rule('deadline_48h', 48, '2 days', 'assignee'),
+    deadline_rule('deadline_24h', 24, '24 hours', 'both'),
+    deadline_rule('deadline_1h', 1, '1 hour', 'both'),
+    overdue_rule('overdue', 0, timedelta(days=1), '', "🚨 Overdue tasks"),
+    overdue_rule('overdue_1h', 1, timedelta(hours=1), ' for 1 hour', "🚨 Overdue for 1 hour"),
+    overdue_rule('overdue_4h', 4, timedelta(hours=1), ' for 4 hours', "🚨 Overdue for 4 hours"),
+]
+
+
+def seed_rules(apps, schema_editor):
+    EscalationRule = apps.get_model('robot', 'EscalationRule')
+    for rule in DEFAULT_RULES:
+        EscalationRule.objects.get_or_create(name=rule['name'], defaults=rule)
+
+
+def drop_rules(apps, schema_editor):
+    EscalationRule = apps.get_model('robot', 'EscalationRule')
+    EscalationRule.objects.filter(name__in=[rule['name'] for rule in DEFAULT_RULES]).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("robot", "0011_schedulerjobrun"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="EscalationRule",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("name", models.CharField(max_length=40, unique=True)),
+                (
+                    "offset",
+                    models.DurationField(
+                        help_text="Relative to the deadline, negative before it"
+                    ),
+                ),
+                (
+                    "window",
+                    models.DurationField(
+                        help_text="How long after deadline + offset a task still gets the notification"
+                    ),
+                ),
+                (
+                    "repeat",
+                    models.DurationField(
+                        blank=True,
+                        help_text="Notify again this often while inside the window",
+                        null=True,
+                    ),
+                ),
+                (
+                    "audience",
+                    models.CharField(
+                        choices=[
+                            ("assignee", "Assignee"),
+                            ("admins", "Admins"),
+                            ("both", "Assignee and admins"),
+                        ],
+                        default="both",
+                        max_length=20,
+                    ),
+                ),
+                ("template", models.TextField()),
+                ("admin_template", models.TextField(blank=True, default="")),
+                ("digest_title", models.CharField(max_length=255)),
+                ("is_active", models.BooleanField(default=True)),
+            ],
+            options={
+                "ordering": ["offset"],
+            },
+        ),
+        migrations.RunPython(seed_rules, drop_rules),
+    ]
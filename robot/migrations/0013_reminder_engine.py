@@ -0,0 +1,33 @@
+# Generated by Django 6.1.2 on 2026-10-18 07:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("robot", "0012_escalationrule"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="reminder",
+            name="claim_token",
+            field=models.UUIDField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="reminder",
+            name="sent_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name="reminder",
+            index=models.Index(
+                fields=["is_sent", "reminder_time"], name="reminder_due_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="reminder",
+            index=models.Index(fields=["claim_token"], name="reminder_claim_idx"),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 6.1.2 on 2026-10-18 07:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("robot", "0013_reminder_engine"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="schedulerjobrun",
+            name="missed",
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 6.1.2 on 2026-10-18 09:12
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def fill_deadlines(apps, schema_editor):
+    # Notifications already recorded count as sent for the deadline their task has now
+    NotificationLog = apps.get_model('robot', 'NotificationLog')
+    Task = apps.get_model('robot', 'Task')
+    NotificationLog.objects.update(
+        deadline=Subquery(Task.objects.filter(pk=OuterRef('task_id')).values('deadline')[:1])
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("robot", "0014_schedulerjobrun_missed"),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name="notificationlog",
+            name="notification_once",
+        ),
+        migrations.AddField(
+            model_name="notificationlog",
+            name="deadline",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.RunPython(fill_deadlines, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name="notificationlog",
+            constraint=models.UniqueConstraint(
+                fields=("task", "kind", "recipient", "deadline"), name="notification_once"
+            ),
+        ),
+    ]
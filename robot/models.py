@@ -4,6 +4,11 @@ from zoneinfo import ZoneInfo
 
 
 class TelegramUser(models.Model):
+    ALERT_MODE_CHOICES = [
+        ('immediate', 'Immediate'),  # Отдельное сообщение на каждую задачу
+        ('digest', 'Digest'),  # Одна сводка на каждый запуск планировщика
+    ]
+
     telegram_id = models.BigIntegerField(unique=True)
     first_name = models.CharField(max_length=255)
     username = models.CharField(max_length=255, blank=True, null=True)
@@ -15,6 +20,7 @@ class TelegramUser(models.Model):
     last_login = models.DateTimeField(auto_now=True)
     date_joined = models.DateTimeField(auto_now_add=True)
     notification_enabled = models.BooleanField(default=True)
+    alert_mode = models.CharField(max_length=20, choices=ALERT_MODE_CHOICES, default='immediate')
 
     def identify_user(self, telegram_id) -> tuple["TelegramUser", bool]:
         try:
@@ -32,13 +38,12 @@ class TelegramUser(models.Model):
 class BotText(models.Model):
     name = models.CharField(max_length=255)
     text = models.TextField()
+    updated_at = models.DateTimeField(auto_now=True)
 
-    def get_text_by_name(self, name, text=""):
-        try:
-            return self.objects.get(name=name).text
-        except self.DoesNotExist:
-            self.objects.create(name=name, text=text)
-            return text
+    @classmethod
+    def get_text_by_name(cls, name, text=""):
+        from .utils.get_text_by_name import bot_texts
+        return bot_texts.get(name, text)
 
     def __str__(self):
         return self.name
@@ -72,6 +77,22 @@ class Task(models.Model):
         ('video', 'Video'),
         ('document', 'Document')  # Add document type
     ], null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # Deadline scans of the scheduler and the overdue views
+            models.Index(fields=['status', 'deadline'], name='task_status_deadline_idx'),
+            # List views filter by status and show the newest (or latest completed) first
+            models.Index(fields=['status', '-created_at'], name='task_status_created_idx'),
+            models.Index(fields=['status', '-completed_at'], name='task_status_completed_idx'),
+            models.Index(fields=['-created_at'], name='task_created_idx'),
+            # Only unfinished tasks have a deadline anyone still waits on
+            models.Index(
+                fields=['deadline'],
+                condition=models.Q(status__in=['open', 'assigned', 'in_progress', 'overdue']),
+                name='task_active_deadline_idx',
+            ),
+        ]
     
     def __str__(self):
         return self.title
@@ -119,6 +140,11 @@ class TaskAssignment(models.Model):
 
     class Meta:
         unique_together = ['task', 'user']
+        indexes = [
+            models.Index(fields=['user', 'status'], name='assignment_user_status_idx'),
+            # Admin review queue: tasks with at least one submitted assignment
+            models.Index(fields=['status', 'task'], name='assignment_status_task_idx'),
+        ]
 
     def mark_accepted(self):
         self.accepted = True
@@ -159,8 +185,18 @@ class TaskComment(models.Model):
 class Reminder(models.Model):
     task = models.ForeignKey(Task, on_delete=models.CASCADE, related_name='reminders')
     reminder_time = models.DateTimeField()
+    # Set when the reminder worker claims it, so it's handed out once
     is_sent = models.BooleanField(default=False)
-    
+    claim_token = models.UUIDField(null=True, blank=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # The worker reads due reminders in reminder_time order straight off this index
+            models.Index(fields=['is_sent', 'reminder_time'], name='reminder_due_idx'),
+            models.Index(fields=['claim_token'], name='reminder_claim_idx'),
+        ]
+
     def __str__(self):
         return f"Reminder for {self.task.title} at {self.reminder_time}"
 
@@ -173,3 +209,171 @@ class TaskCompletion(models.Model):
     
     class Meta:
         unique_together = ['task', 'user']
+
+
+class NotificationLog(models.Model):
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('claimed', 'Claimed'),  # Взято отправителем, отправка идёт
+        ('sent', 'Sent'),
+        ('failed', 'Failed'),
+    ]
+
+    task = models.ForeignKey(Task, on_delete=models.CASCADE, related_name='notifications')
+    kind = models.CharField(max_length=50)
+    recipient = models.ForeignKey(TelegramUser, on_delete=models.CASCADE, related_name='notifications')
+    # Deadline the notification was due for; a moved deadline gets its notifications again
+    deadline = models.DateTimeField(null=True, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    claim_token = models.UUIDField(null=True, blank=True)
+    claimed_at = models.DateTimeField(null=True, blank=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    error = models.TextField(blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['task', 'kind', 'recipient', 'deadline'], name='notification_once'),
+        ]
+        indexes = [
+            models.Index(fields=['status', 'kind'], name='notification_status_kind_idx'),
+            models.Index(fields=['claim_token'], name='notification_claim_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} for {self.task.title} to {self.recipient.first_name}"
+
+
+class EscalationRule(models.Model):
+    """
+    One level of the deadline reminder and escalation ladder. A task is due
+    for the rule from deadline + offset for `window`; rules before the
+    deadline apply to active tasks, rules from it on to overdue ones.
+    """
+
+    AUDIENCE_CHOICES = [
+        ('assignee', 'Assignee'),
+        ('admins', 'Admins'),
+        ('both', 'Assignee and admins'),
+    ]
+
+    # Ledger kind of the notifications; admins get it with ':admin' appended
+    name = models.CharField(max_length=40, unique=True)
+    offset = models.DurationField(help_text='Relative to the deadline, negative before it')
+    window = models.DurationField(help_text='How long after deadline + offset a task still gets the notification')
+    repeat = models.DurationField(null=True, blank=True, help_text='Notify again this often while inside the window')
+    audience = models.CharField(max_length=20, choices=AUDIENCE_CHOICES, default='both')
+    # Formatted with {title}, {deadline} and {assignee}
+    template = models.TextField()
+    admin_template = models.TextField(blank=True, default='')
+    digest_title = models.CharField(max_length=255)
+    is_active = models.BooleanField(default=True)
+
+    class Meta:
+        ordering = ['offset']
+
+    def __str__(self):
+        return self.name
+
+
+class OutboxMessage(models.Model):
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('sending', 'Sending'),  # Взято воркером, отправка идёт
+        ('sent', 'Sent'),
+        ('failed', 'Failed'),
+    ]
+
+    chat_id = models.CharField(max_length=64)
+    text = models.TextField()
+    reply_markup = models.JSONField(null=True, blank=True)
+    media_file_id = models.CharField(max_length=255, null=True, blank=True)
+    media_type = models.CharField(max_length=20, null=True, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveSmallIntegerField(default=0)
+    available_at = models.DateTimeField(default=timezone.now)
+    claim_token = models.UUIDField(null=True, blank=True)
+    claimed_at = models.DateTimeField(null=True, blank=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            # Workers claim due pending messages and reclaim expired 'sending' leases
+            models.Index(fields=['status', 'available_at'], name='outbox_status_available_idx'),
+            models.Index(fields=['claim_token'], name='outbox_claim_idx'),
+        ]
+
+    def __str__(self):
+        return f"Message to {self.chat_id} ({self.status})"
+
+
+class AlertDigest(models.Model):
+    """Scheduler alerts of one run gathered into a single paginated message for an admin."""
+
+    recipient = models.ForeignKey(TelegramUser, on_delete=models.CASCADE, related_name='alert_digests')
+    title = models.CharField(max_length=255)
+    # Ordered by deadline when the digest was built
+    task_ids = models.JSONField(default=list)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.title} for {self.recipient.first_name}"
+
+
+class SchedulerLease(models.Model):
+    """Lease row that elects the one bot process allowed to run the scheduled jobs."""
+
+    name = models.CharField(max_length=50, unique=True)
+    holder = models.CharField(max_length=255, blank=True, default='')
+    acquired_at = models.DateTimeField(null=True, blank=True)
+    renewed_at = models.DateTimeField(null=True, blank=True)
+    expires_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.name} held by {self.holder or 'nobody'} until {self.expires_at}"
+
+
+class SchedulerNode(models.Model):
+    """A bot process taking part in sharded scheduling; live while it keeps heartbeating."""
+
+    name = models.CharField(max_length=255, unique=True)
+    started_at = models.DateTimeField(auto_now_add=True)
+    heartbeat_at = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return self.name
+
+
+class SchedulerJobRun(models.Model):
+    STATUS_CHOICES = [
+        ('ok', 'OK'),
+        ('failed', 'Failed'),
+        ('misfired', 'Misfired'),  # Пропущен: запуск опоздал дольше допустимого
+        ('overlapped', 'Overlapped'),  # Пропущен: предыдущий запуск ещё не закончился
+    ]
+
+    job = models.CharField(max_length=100)
+    node = models.CharField(max_length=255)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES)
+    started_at = models.DateTimeField()
+    duration = models.FloatField(null=True, blank=True)
+    scanned = models.PositiveIntegerField(default=0)
+    attempted = models.PositiveIntegerField(default=0)
+    sent = models.PositiveIntegerField(default=0)
+    failed = models.PositiveIntegerField(default=0)
+    # Ran while another run of the same job was still going
+    overlapped = models.BooleanField(default=False)
+    # Scheduled runs that were late and coalesced into this one
+    missed = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True, default='')
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['job', '-started_at'], name='job_run_job_started_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.job} at {self.started_at} ({self.status})"
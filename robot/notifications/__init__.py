@@ -0,0 +1,5 @@
+from .digest import create_digest, get_digest_page, load_digest_page
+from .ledger import claim, drop_stale, mark_sent, queue_digests, queue_pending, record, release
+from .outbox import aenqueue, enqueue, outbox_workers
+from .reminders import queue_due_reminders, reminder_worker
+from .sender import BatchReport, Outgoing, RateLimitedSender, deliver, get_sender
@@ -0,0 +1,45 @@
+from asgiref.sync import sync_to_async
+
+from ..keyboards.task_list_keyboards import get_digest_keyboard
+from ..models import AlertDigest, Task
+from ..utils.pagination import Page, paginate
+
+DIGEST_PER_PAGE = 5
+
+
+def render_digest(digest: AlertDigest, tasks: Page) -> str:
+    lines = [f"{digest.title}\n{tasks.total} task(s) need attention:\n"]
+    for task in tasks:
+        assignee = task.assignee.first_name if task.assignee else 'Not assigned'
+        lines.append(
+            f"• «{task.title}»\n"
+            f"   👤 {assignee} · 📅 {task.deadline.strftime('%m/%d/%Y %I:%M %p')}"
+        )
+    return "\n".join(lines)
+
+
+def create_digest(recipient, title: str, tasks) -> tuple[str, object]:
+    """
+    Store a digest of `tasks` for `recipient` and return the text and keyboard
+    of its first page. `tasks` need their assignee loaded.
+    """
+    tasks = sorted(tasks, key=lambda task: (task.deadline, task.pk))
+    digest = AlertDigest.objects.create(recipient=recipient, title=title, task_ids=[task.pk for task in tasks])
+    page = paginate(tasks, 1, DIGEST_PER_PAGE)
+    return render_digest(digest, page), get_digest_keyboard(digest.pk, page)
+
+
+def load_digest_page(digest_id: int, recipient, page: int) -> tuple[str, object] | None:
+    """Text and keyboard of one page of a digest, None when it isn't `recipient`'s."""
+    digest = AlertDigest.objects.filter(pk=digest_id, recipient=recipient).first()
+    if digest is None:
+        return None
+    ids = paginate(digest.task_ids, page, DIGEST_PER_PAGE)
+    # Tasks deleted since the digest was sent simply drop out of the page
+    tasks = Task.objects.select_related('assignee').in_bulk(ids.items)
+    items = [tasks[task_id] for task_id in ids.items if task_id in tasks]
+    page = Page(items, ids.number, ids.per_page, ids.total)
+    return render_digest(digest, page), get_digest_keyboard(digest.pk, page)
+
+
+get_digest_page = sync_to_async(load_digest_page)
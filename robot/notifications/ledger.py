@@ -0,0 +1,170 @@
+import uuid
+
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from ..models import NotificationLog
+from ..utils.job_stats import count
+from ..utils.logger import logger
+from .digest import create_digest
+from .outbox import enqueue
+from .sender import Outgoing
+
+# Notifications that failed to render are retried this many times in total
+MAX_ATTEMPTS = 3
+
+
+def record(entries) -> None:
+    """
+    Queue notifications given as (task_id, kind, recipient_id, deadline) entries.
+
+    The ledger has one row per entry, so entries already queued or sent by an
+    earlier (or overlapping) run are ignored by the database. The deadline is
+    part of the key: once a task's deadline moves, its notifications are due again.
+    """
+    rows = [
+        NotificationLog(task_id=task_id, kind=kind, recipient_id=recipient_id, deadline=deadline)
+        for task_id, kind, recipient_id, deadline in entries
+    ]
+    NotificationLog.objects.bulk_create(rows, ignore_conflicts=True, batch_size=500)
+
+
+def drop_stale(shard=None) -> int:
+    """Delete pending notifications recorded for a deadline their task no longer has; returns how many."""
+    stale = NotificationLog.objects.filter(status='pending').exclude(deadline=F('task__deadline'))
+    if shard is not None:
+        stale = shard.filter(stale, 'task_id')
+    deleted, _ = NotificationLog.objects.filter(pk__in=list(stale.values_list('pk', flat=True))).delete()
+    return deleted
+
+
+def claim(kinds, limit: int | None = 100, shard=None, exclude: Q | None = None, **filters) -> list[NotificationLog]:
+    """
+    Atomically take up to `limit` (None for all) pending notifications of
+    `kinds` matching `filters` and not `exclude`, and about tasks of `shard`
+    when given, for sending.
+
+    Claimed rows carry a fresh token; the UPDATE re-checks the status, so two
+    claimers never get the same row. A claim is never handed out again, so a
+    row left 'claimed' outside a transaction is never sent twice.
+    """
+    token = uuid.uuid4()
+    queryset = NotificationLog.objects.filter(status='pending', kind__in=kinds, **filters)
+    if exclude is not None:
+        queryset = queryset.exclude(exclude)
+    if shard is not None:
+        queryset = shard.filter(queryset, 'task_id')
+    with transaction.atomic():
+        pending = list(
+            queryset
+            .order_by('pk')
+            .values_list('pk', flat=True)[:limit]
+        )
+        if not pending:
+            return []
+        NotificationLog.objects.filter(pk__in=pending, status='pending').update(
+            status='claimed',
+            claim_token=token,
+            claimed_at=timezone.now(),
+            attempts=F('attempts') + 1,
+        )
+    return list(
+        NotificationLog.objects.filter(claim_token=token)
+        .select_related('task', 'task__assignee', 'recipient')
+        .order_by('pk')
+    )
+
+
+def mark_sent(ids) -> None:
+    NotificationLog.objects.filter(pk__in=ids).update(status='sent', sent_at=timezone.now())
+
+
+def release(log: NotificationLog, error: str) -> None:
+    """Return a notification that failed to render to the queue, or give up after MAX_ATTEMPTS."""
+    status = 'failed' if log.attempts >= MAX_ATTEMPTS else 'pending'
+    NotificationLog.objects.filter(pk=log.pk, claim_token=log.claim_token).update(
+        status=status, claim_token=None, error=error[:1000]
+    )
+
+
+# Admin notifications waiting to go out in a digest rather than on their own
+DIGEST_PENDING = Q(recipient__alert_mode='digest')
+
+
+def queue_digests(kinds, title: str, shard=None) -> int:
+    """
+    Gather the pending notifications of `kinds` addressed to admins in digest
+    mode into one digest message per admin; returns how many were gathered.
+
+    With `shard`, the admins are split by their id instead of the tasks: the
+    node owning an admin digests that admin's notifications about every task,
+    so each admin still gets one digest per run however many nodes record them.
+    """
+    pending = NotificationLog.objects.filter(DIGEST_PENDING, status='pending', kind__in=kinds)
+    if shard is not None:
+        pending = shard.filter(pending, 'recipient_id')
+    recipients = list(pending.values_list('recipient_id', flat=True).distinct())
+    queued = 0
+    for recipient_id in recipients:
+        with transaction.atomic():
+            logs = claim(kinds, None, recipient_id=recipient_id)
+            if not logs:
+                continue
+            recipient = logs[0].recipient
+            # A task due for several kinds at once is listed once
+            tasks = list({log.task_id: log.task for log in logs}.values())
+            text, keyboard = create_digest(recipient, title, tasks)
+            enqueue([Outgoing(recipient.telegram_id, text, keyboard)])
+            mark_sent([log.pk for log in logs])
+        count(attempted=len(logs), sent=1)
+        queued += len(logs)
+    return queued
+
+
+def queue_pending(
+    kinds, render, batch_size: int = 100, digest_title: str | None = None, shard=None, skip_digests: bool = False
+) -> int:
+    """
+    Move every pending notification of `kinds` to the outbox, `render(log)`
+    giving the text, and return how many were queued.
+
+    With `digest_title`, admin notifications (kinds ending in ':admin') for
+    admins in digest mode go out as one digest per admin instead, built by
+    the node that owns the admin (see queue_digests). With `shard`, only
+    notifications about that shard's tasks are sent one by one. With
+    `skip_digests`, digest-mode admin notifications are left pending for a
+    queue_digests call made by the caller.
+
+    Each batch is claimed, queued and marked sent in one transaction, so a
+    crash either hands a notification to the outbox or leaves it pending.
+    """
+    queued = 0
+    skip = Q(pk__in=[])
+    if digest_title or skip_digests:
+        admin_kinds = [kind for kind in kinds if kind.endswith(':admin')]
+        if digest_title:
+            queued += queue_digests(admin_kinds, digest_title, shard)
+        # Left for the node that owns the admin when it isn't this one
+        skip = DIGEST_PENDING & Q(kind__in=admin_kinds)
+    # Released rows are pending again; skipping them keeps one run from using up their attempts
+    released = []
+    while True:
+        with transaction.atomic():
+            logs = claim(kinds, batch_size, shard, exclude=skip | Q(pk__in=released))
+            messages, rendered = [], []
+            for log in logs:
+                try:
+                    messages.append(Outgoing(log.recipient.telegram_id, render(log)))
+                    rendered.append(log.pk)
+                except Exception as e:
+                    logger.error(f"Failed to render {log.kind} for task {log.task_id}: {e}")
+                    release(log, str(e))
+                    released.append(log.pk)
+            enqueue(messages)
+            mark_sent(rendered)
+        count(attempted=len(logs), sent=len(messages), failed=len(logs) - len(rendered))
+        queued += len(rendered)
+        # A short batch drained the queue; anything released waits for the next run
+        if len(logs) < batch_size:
+            return queued
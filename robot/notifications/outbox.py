@@ -0,0 +1,186 @@
+import asyncio
+import uuid
+from datetime import timedelta
+
+from aiogram import Bot
+from aiogram.exceptions import (
+    TelegramBadRequest,
+    TelegramForbiddenError,
+    TelegramNotFound,
+    TelegramUnauthorizedError,
+)
+from aiogram.types import InlineKeyboardMarkup
+from asgiref.sync import sync_to_async
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from ..models import OutboxMessage
+from ..utils.logger import logger
+from .sender import Outgoing, get_sender
+
+MAX_ATTEMPTS = 8
+BASE_DELAY = timedelta(seconds=5)
+MAX_DELAY = timedelta(hours=1)
+
+# A worker that holds a batch longer than this is presumed dead and the batch is sent again
+LEASE = timedelta(minutes=5)
+
+# A worker still sending its batch renews the lease this often, well inside LEASE
+RENEW_INTERVAL = LEASE.total_seconds() / 3
+
+# Telegram refused the message itself; sending it again won't help
+PERMANENT_ERRORS = (TelegramBadRequest, TelegramForbiddenError, TelegramNotFound, TelegramUnauthorizedError)
+
+
+def enqueue(messages) -> int:
+    """
+    Store `messages` (Outgoing) for the outbox workers and return how many.
+
+    Called inside a transaction the messages only become visible, and the
+    workers are only woken, once it commits.
+    """
+    rows = [
+        OutboxMessage(
+            chat_id=str(message.chat_id),
+            text=message.text,
+            reply_markup=message.reply_markup.model_dump(mode='json', exclude_none=True) if message.reply_markup else None,
+            media_file_id=message.media_file_id,
+            media_type=message.media_type,
+        )
+        for message in messages
+    ]
+    OutboxMessage.objects.bulk_create(rows, batch_size=500)
+    if rows:
+        transaction.on_commit(outbox_workers.wake)
+    return len(rows)
+
+
+aenqueue = sync_to_async(enqueue)
+
+
+def claim_batch(limit: int) -> list[OutboxMessage]:
+    """
+    Lease up to `limit` due messages: pending ones whose backoff has passed and
+    'sending' ones whose worker let the lease expire.
+
+    Delivery is at least once: a worker that dies after Telegram accepted a
+    message but before marking it sent leaves it to be sent again.
+    """
+    now = timezone.now()
+    token = uuid.uuid4()
+    due = Q(status='pending', available_at__lte=now) | Q(status='sending', claimed_at__lt=now - LEASE)
+    with transaction.atomic():
+        ids = list(
+            OutboxMessage.objects.filter(due)
+            .order_by('available_at', 'pk')
+            .values_list('pk', flat=True)[:limit]
+        )
+        if not ids:
+            return []
+        OutboxMessage.objects.filter(due, pk__in=ids).update(
+            status='sending',
+            claim_token=token,
+            claimed_at=now,
+            attempts=F('attempts') + 1,
+        )
+    return list(OutboxMessage.objects.filter(claim_token=token).order_by('pk'))
+
+
+def renew(messages) -> int:
+    """Extend the lease of a batch that is still being sent; returns how many rows the worker still holds."""
+    tokens = {message.claim_token for message in messages}
+    return OutboxMessage.objects.filter(status='sending', claim_token__in=tokens).update(claimed_at=timezone.now())
+
+
+def backoff(attempts: int) -> timedelta:
+    return min(BASE_DELAY * 2 ** (attempts - 1), MAX_DELAY)
+
+
+def settle(messages, results) -> None:
+    """Record the outcome of a claimed batch; `results` holds None or the error per message."""
+    now = timezone.now()
+    sent = [message.pk for message, error in zip(messages, results) if error is None]
+    tokens = {message.claim_token for message in messages}
+    with transaction.atomic():
+        # The token check keeps a worker whose lease expired from overwriting the new owner
+        OutboxMessage.objects.filter(pk__in=sent, claim_token__in=tokens).update(
+            status='sent', sent_at=now, claim_token=None
+        )
+        for message, error in zip(messages, results):
+            if error is None:
+                continue
+            if isinstance(error, PERMANENT_ERRORS) or message.attempts >= MAX_ATTEMPTS:
+                changes = {'status': 'failed'}
+            else:
+                changes = {'status': 'pending', 'available_at': now + backoff(message.attempts)}
+            OutboxMessage.objects.filter(pk=message.pk, claim_token=message.claim_token).update(
+                claim_token=None, last_error=str(error)[:1000], **changes
+            )
+
+
+def to_outgoing(message: OutboxMessage) -> Outgoing:
+    reply_markup = InlineKeyboardMarkup.model_validate(message.reply_markup) if message.reply_markup else None
+    return Outgoing(message.chat_id, message.text, reply_markup, message.media_file_id, message.media_type)
+
+
+class OutboxWorkers:
+    """
+    Pool of workers draining the outbox through the bot's rate-limited sender.
+
+    Each worker claims its own batch, so throughput grows with the number of
+    workers until Telegram's limits are reached. Idle workers poll every
+    `poll_interval` seconds and are woken early when a message is enqueued.
+    A batch held back by the rate limits keeps its lease renewed, so no other
+    worker takes it over while it is still being sent.
+    """
+
+    def __init__(self, batch_size: int = 50, poll_interval: float = 1.0):
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.loop = None
+        self.event = None
+
+    def wake(self):
+        # Called from ORM threads on commit, so hand over to the event loop
+        if self.loop is not None and not self.loop.is_closed():
+            self.loop.call_soon_threadsafe(self.event.set)
+
+    async def run(self, bot: Bot, workers: int = 4):
+        self.loop = asyncio.get_running_loop()
+        self.event = asyncio.Event()
+        logger.info(f"Starting {workers} outbox worker(s)")
+        await asyncio.gather(*(self.work(bot, number) for number in range(workers)))
+
+    async def send_leased(self, bot: Bot, messages):
+        sending = asyncio.ensure_future(get_sender(bot).send_batch(to_outgoing(message) for message in messages))
+        try:
+            while True:
+                done, _ = await asyncio.wait({sending}, timeout=RENEW_INTERVAL)
+                if done:
+                    return sending.result()
+                await sync_to_async(renew)(messages)
+        finally:
+            sending.cancel()
+
+    async def work(self, bot: Bot, number: int):
+        while True:
+            try:
+                messages = await sync_to_async(claim_batch)(self.batch_size)
+                if not messages:
+                    self.event.clear()
+                    try:
+                        await asyncio.wait_for(self.event.wait(), self.poll_interval)
+                    except TimeoutError:
+                        pass
+                    continue
+                report = await self.send_leased(bot, messages)
+                await sync_to_async(settle)(messages, report.results)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Outbox worker {number} failed: {e}", exc_info=True)
+                await asyncio.sleep(self.poll_interval)
+
+
+outbox_workers = OutboxWorkers()
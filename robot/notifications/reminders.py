@@ -0,0 +1,114 @@
+import asyncio
+import os
+import uuid
+
+from asgiref.sync import sync_to_async
+from django.db import transaction
+from django.db.models import Prefetch
+from django.utils import timezone
+
+from ..models import Reminder, TaskAssignment
+from ..utils.logger import logger
+from .outbox import enqueue
+from .sender import Outgoing
+
+DEADLINE_FORMAT = '%m/%d/%Y %I:%M %p'
+
+# Reminders of tasks in these statuses are claimed but not sent
+FINISHED_STATUSES = ('completed',)
+
+
+def claim_due(limit: int) -> list[Reminder]:
+    """
+    Take up to `limit` reminders that are due, oldest first.
+
+    The UPDATE re-checks is_sent, so when two workers pick the same rows only
+    one of them gets each; the other finds no rows under its token.
+    """
+    now = timezone.now()
+    token = uuid.uuid4()
+    ids = list(
+        Reminder.objects.filter(is_sent=False, reminder_time__lte=now)
+        .order_by('reminder_time')
+        .values_list('pk', flat=True)[:limit]
+    )
+    if not ids:
+        return []
+    Reminder.objects.filter(pk__in=ids, is_sent=False).update(is_sent=True, claim_token=token, sent_at=now)
+    return list(
+        Reminder.objects.filter(claim_token=token)
+        .select_related('task', 'task__assignee')
+        .prefetch_related(
+            Prefetch('task__assignments', queryset=TaskAssignment.objects.select_related('user'))
+        )
+    )
+
+
+def recipients(task) -> list:
+    """Chats a reminder of `task` goes to: its assignee or assignees, else the group it was posted in."""
+    if task.assignee:
+        return [task.assignee.telegram_id]
+    if task.is_multi_task:
+        return [
+            assignment.user.telegram_id
+            for assignment in task.assignments.all()
+            if not assignment.completed
+        ]
+    group_id = os.getenv("TELEGRAM_GROUP_ID")
+    return [group_id] if group_id else []
+
+
+def render_reminder(reminder: Reminder) -> str:
+    task = reminder.task
+    return (
+        f"⏰ Reminder!\n"
+        f"Task «{task.title}»\n"
+        f"Deadline: {task.deadline.strftime(DEADLINE_FORMAT)}"
+    )
+
+
+def queue_due_reminders(limit: int = 100) -> int:
+    """
+    Claim a batch of due reminders and hand their messages to the outbox in
+    one transaction; returns how many reminders were claimed.
+    """
+    with transaction.atomic():
+        reminders = claim_due(limit)
+        messages = []
+        for reminder in reminders:
+            if reminder.task.status in FINISHED_STATUSES:
+                continue
+            text = render_reminder(reminder)
+            messages.extend(Outgoing(chat_id, text) for chat_id in recipients(reminder.task))
+        enqueue(messages)
+    if reminders:
+        logger.info(f"Queued {len(messages)} messages for {len(reminders)} reminders")
+    return len(reminders)
+
+
+class ReminderWorker:
+    """
+    Polls for due reminders in batches of `batch_size`, back to back while
+    batches come back full. Delivery goes through the outbox, whose worker
+    pool and rate-limited sender bound how many are sent at once.
+    """
+
+    def __init__(self, batch_size: int = 100, poll_interval: float = 15.0):
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+
+    async def run(self):
+        logger.info("Starting reminder worker")
+        while True:
+            try:
+                claimed = await sync_to_async(queue_due_reminders)(self.batch_size)
+                if claimed < self.batch_size:
+                    await asyncio.sleep(self.poll_interval)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Reminder worker failed: {e}", exc_info=True)
+                await asyncio.sleep(self.poll_interval)
+
+
+reminder_worker = ReminderWorker()
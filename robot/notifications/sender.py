@@ -0,0 +1,188 @@
+import asyncio
+import time
+from typing import Any, NamedTuple
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramRetryAfter
+
+from ..utils.logger import logger
+
+# Telegram's documented bot limits
+GLOBAL_PER_SECOND = 30
+CHAT_PER_SECOND = 1
+GROUP_PER_MINUTE = 20
+
+# How many times a message is retried after Telegram answers 429
+MAX_RETRIES = 3
+
+
+class TokenBucket:
+    """Classic token bucket: `capacity` tokens, refilled at `rate` tokens per second."""
+
+    def __init__(self, rate: float, capacity: float, now: float | None = None):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic() if now is None else now
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, now: float) -> float:
+        """Seconds until a token is available, 0 if one is available now."""
+        self._refill(now)
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def take(self, now: float):
+        self._refill(now)
+        self.tokens -= 1
+
+    def is_full(self, now: float) -> bool:
+        self._refill(now)
+        return self.tokens >= self.capacity
+
+
+class Outgoing(NamedTuple):
+    chat_id: int | str
+    text: str
+    reply_markup: Any = None
+    media_file_id: str | None = None
+    media_type: str | None = None
+
+
+class BatchReport(NamedTuple):
+    # One entry per message of the batch, in order: None when it was sent, else the error
+    results: list
+    retries: int
+    elapsed: float
+
+    @property
+    def sent(self) -> int:
+        return sum(1 for error in self.results if error is None)
+
+    @property
+    def failed(self) -> int:
+        return len(self.results) - self.sent
+
+    @property
+    def throughput(self) -> float:
+        return self.sent / self.elapsed if self.elapsed else float(self.sent)
+
+
+async def deliver(bot: Bot, message: Outgoing):
+    """Send one message, as a photo, video or document caption when it carries media."""
+    if message.media_file_id:
+        if message.media_type == 'photo':
+            return await bot.send_photo(message.chat_id, message.media_file_id, caption=message.text, reply_markup=message.reply_markup)
+        if message.media_type == 'video':
+            return await bot.send_video(message.chat_id, message.media_file_id, caption=message.text, reply_markup=message.reply_markup)
+        if message.media_type == 'document':
+            return await bot.send_document(message.chat_id, message.media_file_id, caption=message.text, reply_markup=message.reply_markup)
+    return await bot.send_message(message.chat_id, message.text, reply_markup=message.reply_markup)
+
+
+def is_group_chat(chat_id) -> bool:
+    # Groups and channels have negative ids; usernames like @channel are public chats too
+    return str(chat_id).startswith(('-', '@'))
+
+
+class RateLimitedSender:
+    """
+    Sends messages concurrently while staying inside Telegram's flood limits:
+    GLOBAL_PER_SECOND overall, CHAT_PER_SECOND per chat and GROUP_PER_MINUTE per
+    group. When Telegram still answers 429 the whole sender pauses for the
+    retry_after it asks for before the message is retried.
+
+    Everything runs on one event loop, so checking and taking tokens needs no lock.
+    """
+
+    def __init__(self, bot: Bot, concurrency: int = GLOBAL_PER_SECOND, max_chats: int = 10000):
+        self.bot = bot
+        self.max_chats = max_chats
+        self.global_bucket = TokenBucket(GLOBAL_PER_SECOND, GLOBAL_PER_SECOND)
+        self.chat_buckets = {}
+        self.group_buckets = {}
+        self.paused_until = 0.0
+        # Bounds requests in flight; messages waiting for a token don't hold a slot
+        self.in_flight = asyncio.Semaphore(concurrency)
+
+    def _bucket(self, buckets: dict, chat_id, rate: float, capacity: float, now: float) -> TokenBucket:
+        bucket = buckets.get(chat_id)
+        if bucket is None:
+            if len(buckets) >= self.max_chats:
+                # Full buckets hold no state worth keeping
+                for key in [key for key, idle in buckets.items() if idle.is_full(now)]:
+                    del buckets[key]
+            bucket = buckets[chat_id] = TokenBucket(rate, capacity, now)
+        return bucket
+
+    async def acquire(self, chat_id):
+        while True:
+            now = time.monotonic()
+            buckets = [
+                self.global_bucket,
+                self._bucket(self.chat_buckets, chat_id, CHAT_PER_SECOND, 1, now),
+            ]
+            if is_group_chat(chat_id):
+                buckets.append(self._bucket(self.group_buckets, chat_id, GROUP_PER_MINUTE / 60, GROUP_PER_MINUTE, now))
+            wait = max([self.paused_until - now] + [bucket.wait_time(now) for bucket in buckets])
+            if wait <= 0:
+                for bucket in buckets:
+                    bucket.take(now)
+                return
+            await asyncio.sleep(wait)
+
+    async def send(self, message: Outgoing) -> int:
+        """Send one message under the limits; returns how many 429 retries it took."""
+        retries = 0
+        while True:
+            await self.acquire(message.chat_id)
+            try:
+                async with self.in_flight:
+                    await deliver(self.bot, message)
+                return retries
+            except TelegramRetryAfter as e:
+                if retries >= MAX_RETRIES:
+                    raise
+                retries += 1
+                self.paused_until = max(self.paused_until, time.monotonic() + e.retry_after)
+                logger.warning(f"Telegram asked to retry after {e.retry_after}s (chat {message.chat_id})")
+
+    async def send_batch(self, messages) -> BatchReport:
+        """
+        Send `messages` concurrently. A failed message never stops the others;
+        its error is returned in the report at the message's position.
+        """
+        messages = list(messages)
+        started = time.monotonic()
+        retries = 0
+
+        async def send_one(message: Outgoing):
+            nonlocal retries
+            try:
+                retries += await self.send(message)
+            except Exception as e:
+                logger.error(f"Failed to send message to {message.chat_id}: {e}")
+                return e
+            return None
+
+        results = await asyncio.gather(*(send_one(message) for message in messages))
+        report = BatchReport(list(results), retries, time.monotonic() - started)
+        if messages:
+            logger.info(
+                f"Sent {report.sent}/{len(messages)} messages in {report.elapsed:.2f}s "
+                f"({report.throughput:.1f}/s, {report.retries} retries)"
+            )
+        return report
+
+
+_senders = {}
+
+
+def get_sender(bot: Bot) -> RateLimitedSender:
+    """The shared sender of `bot`; Telegram counts the limits per bot token."""
+    sender = _senders.get(bot.id)
+    if sender is None:
+        sender = _senders[bot.id] = RateLimitedSender(bot)
+    return sender
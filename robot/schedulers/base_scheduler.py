@@ -1,10 +1,56 @@
+import asyncio
+import os
+
 from aiogram import Bot
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from datetime import datetime
 
-scheduler = AsyncIOScheduler()
+from ..utils.logger import logger
+from .leader import LeaderElection
+from .sharding import ALL_TASKS, Shard, ShardMembership
+
+# A run that starts later than this is skipped and recorded as misfired; runs
+# that piled up within it are coalesced into one. A process that becomes
+# leader runs every job once straight away instead (see LeaderElection)
+MISFIRE_GRACE_TIME = 5 * 60
+
+scheduler = AsyncIOScheduler(job_defaults={'coalesce': True, 'misfire_grace_time': MISFIRE_GRACE_TIME})
+leader_election = LeaderElection(scheduler)
+shard_membership = ShardMembership()
+_sharded = False
+_background_tasks = []
+
+
+def _report_failure(task: asyncio.Task):
+    if not task.cancelled() and task.exception() is not None:
+        logger.error(f"Scheduler background task {task.get_name()} stopped", exc_info=task.exception())
+
+
+def run_in_background(coro, name: str | None = None) -> asyncio.Task:
+    # Keep a reference so the task isn't garbage collected while it runs
+    task = asyncio.create_task(coro, name=name)
+    task.add_done_callback(_report_failure)
+    _background_tasks.append(task)
+    return task
+
+
+def current_shard() -> Shard | None:
+    """
+    The tasks this process schedules for: all of them in leader mode, its own
+    slice in sharded mode, None while a sharded node has no slice yet.
+    """
+    return shard_membership.shard if _sharded else ALL_TASKS
 
 
 async def setup_scheduler(bot: Bot):
+    global _sharded
     if not scheduler.running:
-        scheduler.start()
+        # SCHEDULER_MODE=sharded splits the jobs' tasks by id across all bot
+        # processes; by default one process, the lease holder, runs every job
+        _sharded = os.getenv("SCHEDULER_MODE", "leader") == "sharded"
+        if _sharded:
+            scheduler.start()
+            run_in_background(shard_membership.run(), 'shard_membership')
+        else:
+            scheduler.start(paused=True)
+            run_in_background(leader_election.run(), 'leader_election')
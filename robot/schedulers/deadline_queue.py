@@ -0,0 +1,185 @@
+import asyncio
+import heapq
+import itertools
+import time
+from datetime import timedelta
+from typing import NamedTuple
+
+from asgiref.sync import sync_to_async
+from django.utils import timezone
+
+from ..models import EscalationRule, Task
+from ..services.task_query import LIVE_STATUSES
+from ..utils.logger import logger
+
+TRACKED_STATUSES = (*LIVE_STATUSES, 'overdue')
+
+# Events fire this long after the instant itself so the job's strict comparisons see the task
+GRACE = timedelta(seconds=1)
+
+# Edits that bypass the signals (other processes, queryset updates) are picked up by a periodic reload
+RELOAD_INTERVAL = 30 * 60
+
+# Seconds to wait after a failed load or run before trying again
+RETRY_DELAY = 5
+
+
+class Window(NamedTuple):
+    """When, relative to the deadline, a rule has work for a task."""
+    name: str
+    opens: timedelta
+    closes: timedelta
+    repeat: timedelta | None
+
+
+class DeadlineQueue:
+    """
+    Min-heap of the instants at which an escalation rule has work for some task.
+
+    Each task contributes one entry per rule window opening in the future, and
+    a repeating rule pushes its next occurrence when one fires.
+    A moved deadline or a finished task doesn't touch the heap: entries whose
+    deadline no longer matches the tracked one are dropped when they surface.
+    All methods except `submit` run on the event loop.
+    """
+
+    def __init__(self):
+        self.loop = None
+        self.windows = {}
+        self._heap = []
+        self._deadlines = {}
+        self._sequence = itertools.count()
+        self._changed = None
+        self._reload_at = 0.0
+
+    def _push(self, at, task_id, deadline, kind):
+        heapq.heappush(self._heap, (at, next(self._sequence), task_id, deadline, kind))
+
+    def track(self, task_id: int, deadline, status: str, fire_current: bool = True):
+        """
+        (Re)schedule the events of a task. With `fire_current`, windows the
+        task is already inside fire right away.
+        """
+        if status not in TRACKED_STATUSES or deadline is None:
+            self._deadlines.pop(task_id, None)
+            return
+        if self._deadlines.get(task_id) == deadline:
+            return
+        self._deadlines[task_id] = deadline
+        now = timezone.now()
+        for window in self.windows.values():
+            start = deadline + window.opens + GRACE
+            if start > now:
+                self._push(start, task_id, deadline, window.name)
+            elif fire_current and now < deadline + window.closes:
+                self._push(now, task_id, deadline, window.name)
+        if self._changed is not None:
+            self._changed.set()
+
+    def forget(self, task_id: int):
+        self._deadlines.pop(task_id, None)
+
+    def load(self, windows, rows, fire_current: bool = True):
+        """Replace the rule windows, and the queue with (task_id, deadline, status) rows."""
+        self.windows = {window.name: window for window in windows}
+        self._heap = []
+        self._deadlines = {}
+        for task_id, deadline, status in rows:
+            self.track(task_id, deadline, status, fire_current)
+
+    def _drop_stale(self):
+        while self._heap and self._deadlines.get(self._heap[0][2]) != self._heap[0][3]:
+            heapq.heappop(self._heap)
+
+    def next_at(self):
+        self._drop_stale()
+        return self._heap[0][0] if self._heap else None
+
+    def pop_due(self, now) -> set[str]:
+        """Rules with work due at `now`; several tasks due together need one run."""
+        names = set()
+        while True:
+            self._drop_stale()
+            if not self._heap or self._heap[0][0] > now:
+                return names
+            at, _, task_id, deadline, name = heapq.heappop(self._heap)
+            names.add(name)
+            window = self.windows.get(name)
+            if window and window.repeat and at + window.repeat < deadline + window.closes:
+                self._push(at + window.repeat, task_id, deadline, name)
+
+    def __len__(self):
+        return len(self._heap)
+
+    def submit(self, method, *args):
+        """Call `method` on the event loop from any thread; a no-op where the queue isn't running."""
+        if self.loop is not None and not self.loop.is_closed():
+            self.loop.call_soon_threadsafe(method, *args)
+
+    def request_reload(self):
+        """Reload rules and tasks on the next turn of the loop, e.g. after a rule changed."""
+        self._reload_at = 0.0
+        if self._changed is not None:
+            self._changed.set()
+
+    async def reload(self, fire_current: bool):
+        windows, rows = await sync_to_async(load_tracked_tasks)()
+        self.load(windows, rows, fire_current)
+        logger.info(f"Deadline queue loaded {len(self._deadlines)} tasks, {len(self._heap)} events")
+
+    async def run(self, on_due):
+        """
+        Sleep until the next event, or until a task changes, and hand the
+        names of the rules that became due to `on_due`.
+        """
+        self.loop = asyncio.get_running_loop()
+        self._changed = asyncio.Event()
+        self._reload_at = 0.0
+        # Windows already open fire on the first load only; later loads just catch up on edits
+        loaded = False
+        while True:
+            try:
+                if time.monotonic() >= self._reload_at:
+                    await self.reload(fire_current=not loaded)
+                    loaded = True
+                    self._reload_at = time.monotonic() + RELOAD_INTERVAL
+                names = self.pop_due(timezone.now())
+                if names:
+                    await on_due(names)
+
+                timeout = self._reload_at - time.monotonic()
+                next_at = self.next_at()
+                if next_at is not None:
+                    timeout = min(timeout, (next_at - timezone.now()).total_seconds())
+                self._changed.clear()
+                try:
+                    await asyncio.wait_for(self._changed.wait(), max(timeout, 0))
+                except TimeoutError:
+                    pass
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Events lost here are still caught by the jobs' fallback interval
+                logger.error(f"Deadline queue failed: {e}", exc_info=True)
+                await asyncio.sleep(RETRY_DELAY)
+
+
+def load_tracked_tasks():
+    """Windows of the active rules and the tasks that still have one ahead or open."""
+    windows = [
+        Window(rule.name, rule.offset, rule.offset + rule.window, rule.repeat)
+        for rule in EscalationRule.objects.filter(is_active=True)
+    ]
+    if not windows:
+        return [], []
+    last = max(window.closes for window in windows)
+    rows = list(
+        Task.objects.filter(
+            status__in=TRACKED_STATUSES,
+            deadline__gt=timezone.now() - last,
+        ).values_list('pk', 'deadline', 'status')
+    )
+    return windows, rows
+
+
+deadline_queue = DeadlineQueue()
@@ -0,0 +1,130 @@
+import functools
+from datetime import timedelta
+
+from django.utils import timezone
+
+from ..models import EscalationRule, NotificationLog, Task
+from ..notifications import drop_stale, queue_digests, queue_pending, record
+from ..services.task_query import LIVE_STATUSES
+from ..utils import job_stats
+from .sharding import ALL_TASKS, Shard
+
+DEADLINE_FORMAT = '%m/%d/%Y %I:%M %p'
+
+
+def load_rules() -> list[EscalationRule]:
+    return list(EscalationRule.objects.filter(is_active=True))
+
+
+def rule_statuses(rule: EscalationRule) -> tuple:
+    # A task past its deadline has been moved to 'overdue' before the rules are evaluated
+    return LIVE_STATUSES if rule.offset < timedelta(0) else ('overdue',)
+
+
+def occurrence(rule: EscalationRule, deadline, now) -> int | None:
+    """
+    Which notification of `rule` a task with `deadline` is due for at `now`:
+    0 for the first, n for the n-th repeat, None outside the rule's window.
+    """
+    elapsed = now - (deadline + rule.offset)
+    if elapsed < timedelta(0) or elapsed >= rule.window:
+        return None
+    return elapsed // rule.repeat if rule.repeat else 0
+
+
+def rule_kind(rule: EscalationRule, number: int) -> str:
+    # Each repeat is its own ledger kind, so the ledger still sends every one exactly once
+    return rule.name if number == 0 else f"{rule.name}#{number}"
+
+
+def rule_name(kind: str) -> str:
+    return kind.removesuffix(':admin').split('#')[0]
+
+
+def escalation_queryset(rules, now=None, shard: Shard = ALL_TASKS):
+    """Every task some of `rules` may be due for: one range over the union of their windows."""
+    now = now or timezone.now()
+    return shard.filter(Task.objects.filter(
+        status__in=(*LIVE_STATUSES, 'overdue'),
+        deadline__gt=now - max(rule.offset + rule.window for rule in rules),
+        deadline__lte=now - min(rule.offset for rule in rules),
+    ))
+
+
+def due_notifications(rules, tasks, admins, now) -> list[tuple]:
+    """
+    Ledger entries (task_id, kind, recipient_id, deadline) of every rule due at `now`
+    for `tasks`, given as (task_id, assignee_id, deadline, status).
+    """
+    entries = []
+    for task_id, assignee_id, deadline, status in tasks:
+        for rule in rules:
+            if status not in rule_statuses(rule):
+                continue
+            number = occurrence(rule, deadline, now)
+            if number is None:
+                continue
+            kind = rule_kind(rule, number)
+            if rule.audience != 'admins' and assignee_id:
+                entries.append((task_id, kind, assignee_id, deadline))
+            if rule.audience != 'assignee':
+                entries.extend((task_id, f"{kind}:admin", admin.pk, deadline) for admin in admins)
+    return entries
+
+
+def evaluate(rules, admins, shard: Shard = ALL_TASKS, now=None) -> int:
+    """
+    Record in the ledger every notification `rules` have due for the tasks of
+    `shard`, from a single scan whatever the number of rules; returns how many.
+    """
+    if not rules:
+        return 0
+    now = now or timezone.now()
+    tasks = list(escalation_queryset(rules, now, shard).values_list('pk', 'assignee_id', 'deadline', 'status'))
+    job_stats.count(scanned=len(tasks))
+    entries = due_notifications(rules, tasks, admins, now)
+    record(entries)
+    return len(entries)
+
+
+def render(rules_by_name: dict, log) -> str:
+    rule = rules_by_name[rule_name(log.kind)]
+    template = rule.template
+    if log.kind.endswith(':admin') and rule.admin_template:
+        template = rule.admin_template
+    task = log.task
+    return template.format(
+        title=task.title,
+        deadline=task.deadline.strftime(DEADLINE_FORMAT),
+        assignee=task.assignee.first_name if task.assignee else 'Not assigned',
+    )
+
+
+def digest_title(rules) -> str:
+    titles = [rule.digest_title for rule in rules]
+    return " · ".join(titles)[:255]
+
+
+def queue_due(rules, shard: Shard = ALL_TASKS) -> int:
+    """
+    Move the pending notifications of `rules` to the outbox; returns how many
+    were queued. Admins in digest mode get one digest per run covering every
+    rule, the others one message per notification. Notifications recorded for
+    a deadline that has since moved are dropped instead.
+    """
+    # Not narrowed to the shard: the digests below gather notifications about every task
+    drop_stale()
+    rules_by_name = {rule.name: rule for rule in rules}
+    kinds = {}
+    for kind in NotificationLog.objects.filter(status='pending').values_list('kind', flat=True).distinct():
+        name = rule_name(kind)
+        if name in rules_by_name:
+            kinds.setdefault(name, []).append(kind)
+    if not kinds:
+        return 0
+    admin_kinds = [kind for rule_kinds in kinds.values() for kind in rule_kinds if kind.endswith(':admin')]
+    alerting = {rule_name(kind) for kind in admin_kinds}
+    queued = queue_digests(admin_kinds, digest_title([rule for rule in rules if rule.name in alerting]), shard)
+    for rule_kinds in kinds.values():
+        queued += queue_pending(rule_kinds, functools.partial(render, rules_by_name), shard=shard, skip_digests=True)
+    return queued
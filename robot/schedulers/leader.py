@@ -0,0 +1,94 @@
+import asyncio
+import os
+import socket
+import uuid
+from datetime import timedelta
+
+from apscheduler.schedulers.base import BaseScheduler
+from asgiref.sync import sync_to_async
+from django.db.models import Case, F, Q, Value, When
+from django.utils import timezone
+
+from ..models import SchedulerLease
+from ..utils.logger import logger
+
+LEASE_NAME = 'scheduler'
+# A leader that misses heartbeats for this long loses the lease to another process
+LEASE_TTL = timedelta(seconds=60)
+HEARTBEAT_INTERVAL = 15
+
+# Unique per process, readable in the admin
+HOLDER = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+def try_acquire(name: str, holder: str, ttl: timedelta = LEASE_TTL) -> bool:
+    """
+    Take or renew the lease `name` for `holder`; True when `holder` now holds it.
+
+    The lease changes hands with one conditional UPDATE, so when several
+    processes race for an expired lease exactly one of them wins.
+    """
+    now = timezone.now()
+    SchedulerLease.objects.get_or_create(name=name, defaults={'expires_at': now})
+    return SchedulerLease.objects.filter(
+        Q(holder=holder) | Q(expires_at__lte=now), name=name
+    ).update(
+        acquired_at=Case(When(holder=holder, then=F('acquired_at')), default=Value(now)),
+        holder=holder,
+        renewed_at=now,
+        expires_at=now + ttl,
+    ) == 1
+
+
+def release(name: str, holder: str) -> None:
+    """Give the lease up so another process can take over without waiting for it to expire."""
+    SchedulerLease.objects.filter(name=name, holder=holder).update(expires_at=timezone.now())
+
+
+class LeaderElection:
+    """
+    Keeps `scheduler` running in exactly one bot process.
+
+    Every process starts its scheduler paused and heartbeats the lease every
+    HEARTBEAT_INTERVAL seconds. The holder resumes its scheduler; everyone else
+    keeps it paused and takes over once the lease expires. A process that
+    can't reach the database pauses at once rather than risk two leaders.
+    """
+
+    def __init__(self, scheduler: BaseScheduler, name: str = LEASE_NAME, holder: str = HOLDER):
+        self.scheduler = scheduler
+        self.name = name
+        self.holder = holder
+        self.is_leader = False
+
+    def _set_leader(self, leader: bool):
+        if leader == self.is_leader:
+            return
+        self.is_leader = leader
+        if leader:
+            logger.info(f"{self.holder} took the {self.name} lease, running scheduled jobs")
+            # Runs due while paused would be older than the misfire grace time; run each job once now instead
+            now = timezone.now()
+            for job in self.scheduler.get_jobs():
+                if job.next_run_time is not None and job.next_run_time < now:
+                    job.modify(next_run_time=now)
+            self.scheduler.resume()
+        else:
+            logger.info(f"{self.holder} lost the {self.name} lease, pausing scheduled jobs")
+            self.scheduler.pause()
+
+    async def run(self):
+        try:
+            while True:
+                try:
+                    leader = await sync_to_async(try_acquire)(self.name, self.holder)
+                except Exception as e:
+                    logger.error(f"Lease heartbeat failed: {e}", exc_info=True)
+                    leader = False
+                self._set_leader(leader)
+                await asyncio.sleep(HEARTBEAT_INTERVAL)
+        except asyncio.CancelledError:
+            if self.is_leader:
+                self._set_leader(False)
+                await sync_to_async(release)(self.name, self.holder)
+            raise
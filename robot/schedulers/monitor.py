@@ -0,0 +1,161 @@
+import asyncio
+import functools
+import time
+from collections import Counter
+
+from apscheduler.events import EVENT_JOB_MAX_INSTANCES, EVENT_JOB_MISSED, EVENT_JOB_SUBMITTED, EVENT_SCHEDULER_RESUMED
+from asgiref.sync import sync_to_async
+from django.db.models import Avg, Count, Max, OuterRef, Q, Subquery, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from ..models import SchedulerJobRun, SchedulerLease, SchedulerNode
+from ..utils.job_stats import COUNTERS, current_job_stats
+from ..utils.logger import logger
+from .leader import HOLDER
+
+# Runs kept per job; older ones are dropped as new ones are recorded
+RUNS_KEPT = 100
+
+
+def save_run(job: str, status: str, started_at, duration=None, stats=None, overlapped=False, error='', missed=0) -> None:
+    SchedulerJobRun.objects.create(
+        job=job,
+        node=HOLDER,
+        status=status,
+        started_at=started_at,
+        duration=duration,
+        overlapped=overlapped,
+        missed=missed,
+        error=error[:2000],
+        **(stats or {}),
+    )
+    # Keep the table a fixed-size ring per job
+    cutoff = (
+        SchedulerJobRun.objects.filter(job=job)
+        .order_by('-started_at', '-pk')
+        .values_list('started_at', flat=True)[RUNS_KEPT:RUNS_KEPT + 1]
+    )
+    if cutoff:
+        SchedulerJobRun.objects.filter(job=job, started_at__lte=cutoff[0]).delete()
+
+
+def job_health() -> list[dict]:
+    """Per job: totals over the kept runs and the outcome of the latest one."""
+    latest = SchedulerJobRun.objects.filter(job=OuterRef('job')).order_by('-started_at', '-pk')
+    rows = (
+        SchedulerJobRun.objects.values('job')
+        .annotate(
+            runs=Count('pk'),
+            failures=Count('pk', filter=Q(status='failed')),
+            # Runs skipped outright plus those coalesced into a later one
+            misfires=Count('pk', filter=Q(status='misfired')) + Coalesce(Sum('missed'), 0),
+            overlaps=Count('pk', filter=Q(status='overlapped') | Q(overlapped=True)),
+            avg_duration=Avg('duration'),
+            max_duration=Max('duration'),
+            scanned=Sum('scanned'),
+            attempted=Sum('attempted'),
+            sent=Sum('sent'),
+            failed=Sum('failed'),
+            last_started_at=Max('started_at'),
+            last_status=Subquery(latest.values('status')[:1]),
+            last_error=Subquery(latest.values('error')[:1]),
+            last_node=Subquery(latest.values('node')[:1]),
+        )
+        .order_by('job')
+    )
+    return list(rows)
+
+
+def health_report() -> dict:
+    """Job health plus who runs the jobs: the lease holder and the live sharded nodes."""
+    return {
+        'generated_at': timezone.now(),
+        'jobs': job_health(),
+        'leases': list(SchedulerLease.objects.values('name', 'holder', 'renewed_at', 'expires_at')),
+        'nodes': list(SchedulerNode.objects.order_by('name').values('name', 'started_at', 'heartbeat_at')),
+    }
+
+
+get_health_report = sync_to_async(health_report)
+
+
+class JobMonitor:
+    """
+    Records every run of the wrapped scheduler jobs: start, duration, status,
+    the job_stats counters, and runs APScheduler skipped as misfired or
+    because the previous run was still going. Late runs it coalesced into
+    one are counted on the run that stood in for them.
+    """
+
+    def __init__(self):
+        self.running = Counter()
+        self.missed = Counter()
+        self._scheduled = {}
+        self._pending = set()
+
+    def wrap(self, name: str, func):
+        @functools.wraps(func)
+        async def run(*args, **kwargs):
+            overlapped = self.running[name] > 0
+            missed = self.missed.pop(name, 0)
+            self.running[name] += 1
+            stats = dict.fromkeys(COUNTERS, 0)
+            token = current_job_stats.set(stats)
+            started_at = timezone.now()
+            started = time.monotonic()
+            status, error = 'ok', ''
+            try:
+                return await func(*args, **kwargs)
+            except Exception as e:
+                status, error = 'failed', f"{type(e).__name__}: {e}"
+                logger.error(f"Scheduler job {name} failed: {e}", exc_info=True)
+            finally:
+                current_job_stats.reset(token)
+                self.running[name] -= 1
+                try:
+                    await sync_to_async(save_run)(
+                        name, status, started_at, time.monotonic() - started, stats, overlapped, error, missed
+                    )
+                except Exception as e:
+                    logger.error(f"Failed to record run of {name}: {e}")
+
+        return run
+
+    def on_submitted(self, event, scheduler):
+        """Count the fire times between the job's previous run and this one that coalescing dropped."""
+        run_time = event.scheduled_run_times[-1]
+        previous = self._scheduled.get(event.job_id)
+        self._scheduled[event.job_id] = run_time
+        job = scheduler.get_job(event.job_id)
+        if previous is None or job is None:
+            return
+        fire_time = job.trigger.get_next_fire_time(previous, previous)
+        while fire_time is not None and fire_time < run_time:
+            self.missed[event.job_id] += 1
+            fire_time = job.trigger.get_next_fire_time(fire_time, fire_time)
+
+    def on_resumed(self, event):
+        # Runs due while paused belonged to another leader, not to this process
+        self._scheduled.clear()
+
+    def on_event(self, event):
+        # APScheduler calls listeners inside the event loop, so the write goes to a task
+        if event.code == EVENT_JOB_MISSED:
+            status, run_time = 'misfired', event.scheduled_run_time
+        else:
+            status, run_time = 'overlapped', event.scheduled_run_times[0]
+        logger.warning(f"Scheduler job {event.job_id} {status}")
+        task = asyncio.get_running_loop().create_task(
+            sync_to_async(save_run)(event.job_id, status, run_time)
+        )
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+
+    def attach(self, scheduler):
+        scheduler.add_listener(self.on_event, EVENT_JOB_MISSED | EVENT_JOB_MAX_INSTANCES)
+        scheduler.add_listener(functools.partial(self.on_submitted, scheduler=scheduler), EVENT_JOB_SUBMITTED)
+        scheduler.add_listener(self.on_resumed, EVENT_SCHEDULER_RESUMED)
+
+
+job_monitor = JobMonitor()
@@ -0,0 +1,86 @@
+import asyncio
+from datetime import timedelta
+from typing import NamedTuple
+
+from asgiref.sync import sync_to_async
+from django.db.models import QuerySet
+from django.db.models.functions import Mod
+from django.utils import timezone
+
+from ..models import SchedulerNode
+from ..utils.logger import logger
+from .leader import HEARTBEAT_INTERVAL, HOLDER
+
+# A node that hasn't heartbeated for this long is dropped and its shard is taken over
+NODE_TTL = timedelta(seconds=60)
+
+
+class Shard(NamedTuple):
+    """This node's slice of the tasks: those with id % count == index."""
+
+    index: int
+    count: int
+
+    def filter(self, queryset: QuerySet, field: str = 'id') -> QuerySet:
+        """Narrow `queryset` to this shard; `field` holds the id split on, a task id unless noted."""
+        if self.count == 1:
+            return queryset
+        return queryset.alias(shard=Mod(field, self.count)).filter(shard=self.index)
+
+    def sql(self, column: str = 'id') -> tuple[str, list]:
+        """The same condition as a raw SQL fragment and its parameters."""
+        if self.count == 1:
+            return '', []
+        return f" AND {column} %% %s = %s", [self.count, self.index]
+
+
+ALL_TASKS = Shard(0, 1)
+
+
+def heartbeat(name: str) -> Shard:
+    """
+    Record that node `name` is alive and return its shard.
+
+    Shards are the positions of the live nodes sorted by name, so every node
+    computes the same split and a node that stops heartbeating is dropped from
+    it within NODE_TTL.
+    """
+    now = timezone.now()
+    SchedulerNode.objects.update_or_create(name=name, defaults={'heartbeat_at': now})
+    SchedulerNode.objects.filter(heartbeat_at__lt=now - NODE_TTL).delete()
+    names = list(SchedulerNode.objects.order_by('name').values_list('name', flat=True))
+    return Shard(names.index(name), len(names))
+
+
+def leave(name: str) -> None:
+    SchedulerNode.objects.filter(name=name).delete()
+
+
+class ShardMembership:
+    """
+    Registers this process as a scheduler node and keeps `shard` current.
+
+    Until the first heartbeat succeeds, or when the database can't be reached,
+    the node owns no tasks at all; the other nodes take over its slice once
+    its row expires.
+    """
+
+    def __init__(self, name: str = HOLDER):
+        self.name = name
+        self.shard = None
+
+    async def run(self):
+        try:
+            while True:
+                try:
+                    shard = await sync_to_async(heartbeat)(self.name)
+                except Exception as e:
+                    logger.error(f"Scheduler node heartbeat failed: {e}", exc_info=True)
+                    shard = None
+                if shard != self.shard:
+                    logger.info(f"Scheduler node {self.name} now owns shard {shard}")
+                    self.shard = shard
+                await asyncio.sleep(HEARTBEAT_INTERVAL)
+        except asyncio.CancelledError:
+            await sync_to_async(leave)(self.name)
+            raise
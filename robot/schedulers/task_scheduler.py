@@ -1,232 +1,125 @@
-from .base_scheduler import scheduler
-from ..models import Task, TelegramUser
+from .base_scheduler import current_shard, run_in_background, scheduler
+from .deadline_queue import deadline_queue
+from .escalation import evaluate, load_rules, queue_due
+from .monitor import job_monitor
+from .sharding import ALL_TASKS, Shard
+from ..models import Task, TaskAssignment, TelegramUser
+from ..services.task_query import LIVE_STATUSES
+from ..utils.user_cache import user_cache
+from django.db import connection, transaction
 from django.utils import timezone
 from asgiref.sync import sync_to_async
-from datetime import datetime, timedelta
 import logging
 
-@sync_to_async
-def get_tasks_with_deadline_approaching(hours: int):
-    deadline_threshold = timezone.now() + timedelta(hours=hours)
-    return list(Task.objects.filter(
-        status__in=['open', 'in_progress', 'assigned'],
-        deadline__lte=deadline_threshold,
-        deadline__gt=timezone.now()
-    ).select_related('assignee', 'creator'))
+# Assignments of those tasks that are still being worked on go overdue with them
+OVERDUE_ASSIGNMENTS_FROM = ('assigned', 'in_progress')
 
 
-@sync_to_async
-def get_admin_users():
-    return list(TelegramUser.objects.filter(is_admin=True))
+def overdue_queryset(now=None, shard: Shard = ALL_TASKS):
+    return shard.filter(Task.objects.filter(
+        status__in=LIVE_STATUSES,
+        deadline__lt=now or timezone.now()
+    ))
 
 
-@sync_to_async
-def get_task_assignee_notification_status(task):
-    return task.assignee and task.assignee.notification_enabled
+def _update_overdue_returning(now, shard: Shard):
+    table = connection.ops.quote_name(Task._meta.db_table)
+    placeholders = ', '.join(['%s'] * len(LIVE_STATUSES))
+    shard_sql, shard_params = shard.sql()
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"UPDATE {table} SET status = %s "
+            f"WHERE status IN ({placeholders}) AND deadline < %s{shard_sql} "
+            f"RETURNING id, assignee_id",
+            ['overdue', *LIVE_STATUSES, connection.ops.adapt_datetimefield_value(now), *shard_params],
+        )
+        return cursor.fetchall()
+
+
+def transition_overdue_tasks(now=None, shard: Shard = ALL_TASKS) -> list[tuple[int, int | None]]:
+    """
+    Move every active task of `shard` past its deadline to 'overdue', and their
+    open assignments with them, in one transaction.
+
+    Returns (task_id, assignee_id) of the tasks that changed. Where the backend
+    supports UPDATE ... RETURNING that is a single statement for the tasks;
+    otherwise the rows are locked and read first.
+    """
+    now = now or timezone.now()
+    with transaction.atomic():
+        if connection.features.can_return_rows_from_update:
+            rows = _update_overdue_returning(now, shard)
+        else:
+            rows = list(overdue_queryset(now, shard).select_for_update().values_list('pk', 'assignee_id'))
+            Task.objects.filter(pk__in=[task_id for task_id, _ in rows]).update(status='overdue')
+        if rows:
+            TaskAssignment.objects.filter(
+                task_id__in=[task_id for task_id, _ in rows],
+                status__in=OVERDUE_ASSIGNMENTS_FROM,
+            ).update(status='overdue')
+    return rows
 
 
 @sync_to_async
-def get_task_notification_details(task):
-    return {
-        'telegram_id': task.assignee.telegram_id,
-        'title': task.title,
-        'deadline': task.deadline.strftime('%m/%d/%Y %I:%M %p')
-    }
-
-
-async def send_deadline_notifications(bot, hours: int):
-    tasks = await get_tasks_with_deadline_approaching(hours)
-    logging.info(f"Found {len(tasks)} tasks with deadline approaching in {hours} hours")
+def get_admin_users():
+    admins = user_cache.get_admins()
+    if admins is None:
+        generation = user_cache.generation
+        admins = list(TelegramUser.objects.filter(is_admin=True))
+        user_cache.set_admins(admins, generation)
+    return admins
+
+
+def own_shard() -> Shard | None:
+    shard = current_shard()
+    if shard is None:
+        logging.info("Scheduler node has no shard yet, skipping the run")
+    return shard
+
+
+def escalate(admins, shard: Shard) -> None:
+    """One tick of the escalation ladder for the tasks of `shard`."""
+    transitioned = transition_overdue_tasks(shard=shard)
+    if transitioned:
+        logging.info(f"Marked {len(transitioned)} tasks as overdue")
+    rules = load_rules()
+    due = evaluate(rules, admins, shard)
+    if due:
+        logging.info(f"Escalation rules found {due} notifications due")
+    queue_due(rules, shard)
+
+
+async def run_escalations(bot):
+    shard = own_shard()
+    if shard is None:
+        return
     admins = await get_admin_users()
-    
-    time_text = {
-        48: "2 days",
-        24: "24 hours",
-        1: "1 hour"
-    }.get(hours, f"{hours} hours")
-    
-    for task in tasks:
-        assignee = await get_task_assignee(task)
-        # Notify assignee
-        if assignee:
-            await bot.send_message(
-                assignee.telegram_id,
-                f"⚠️ Reminder!\n"
-                f"The deadline for the task «{task.title}» is in {time_text}!\n"
-                f"Deadline: {task.deadline.strftime('%m/%d/%Y %I:%M %p')}"
-            )
-        
-        # Notify admins about critical tasks
-        if hours <= 24:
-            for admin in admins:
-                await bot.send_message(
-                    admin.telegram_id,
-                    f"🚨 Attention, Admin!\n"
-                    f"The task «{task.title}» is in a critical status!\n"
-                    f"Time left: {time_text}\n"
-                    f"Assignee: {assignee.first_name if assignee else 'Not assigned'}\n"
-                    f"Deadline: {task.deadline.strftime('%m/%d/%Y %I:%M %p')}"
-                )
+    await sync_to_async(escalate)([admin for admin in admins if admin.notification_enabled], shard)
 
 
-@sync_to_async
-def get_overdue_tasks():
-    now = timezone.now()
-    return list(Task.objects.filter(
-        status__in=['open', 'in_progress', 'assigned'],
-        deadline__lt=now
-    ))
+ESCALATION_JOB = 'escalations'
 
-@sync_to_async
-def get_task_assignee(task):
-    return task.assignee
 
-async def check_overdue_tasks(bot):
-    tasks = await get_overdue_tasks()
-    admins = await get_admin_users()
-    
-    for task in tasks:
-        if task.status != 'overdue':
-            task.status = 'overdue'
-            await sync_to_async(task.save)()
-            assignee = await get_task_assignee(task)
-            # Notify assignee
-            if assignee:
-                await bot.send_message(
-                    assignee.telegram_id,
-                    f"🚨 Attention!\n"
-                    f"The task «{task.title}» is overdue!\n"
-                    f"Deadline was: {task.deadline.strftime('%m/%d/%Y %I:%M %p')}"
-                )
-            
-            # Notify admins
-            for admin in admins:
-                if admin.notification_enabled:
-                    await bot.send_message(
-                        admin.telegram_id,
-                        f"🚨 Attention, Admin!\n"
-                        f"The task «{task.title}» is overdue!\n"
-                        f"Assignee: {assignee.first_name if assignee else 'Not assigned'}\n"
-                        f"Deadline was: {task.deadline.strftime('%m/%d/%Y %I:%M %p')}"
-                    )
-
-async def check_overdue_tasks_1(bot):
-    now = timezone.now()
-    one_hour_ago = now - timedelta(hours=1)
-
-    tasks = await sync_to_async(list)(Task.objects.filter(
-        status__in=['overdue'],
-        deadline__lte=one_hour_ago,
-        deadline__gt=now - timedelta(hours=2),
-        is_notified_one_hour=False
-    ))
-    admins = await get_admin_users()
-    
-    for task in tasks:
-        assignee = await get_task_assignee(task)
-        # Notify assignee
-        if assignee:
-            await bot.send_message(
-                assignee.telegram_id,
-                f"🚨 Attention!\n"
-                f"The task «{task.title}» is overdue for 1 hour!\n"
-                f"Deadline was: {task.deadline.strftime('%m/%d/%Y %I:%M %p')}"
-            )
-        
-        # Notify admins
-        for admin in admins:
-            if admin.notification_enabled:
-                await bot.send_message(
-                    admin.telegram_id,
-                    f"🚨 Attention, Admin!\n"
-                    f"The task «{task.title}» is overdue for 1 hour!\n"
-                    f"Assignee: {assignee.first_name if assignee else 'Not assigned'}\n"
-                    f"Deadline was: {task.deadline.strftime('%m/%d/%Y %I:%M %p')}"
-                )
-        task.is_notified_one_hour = True
-        await sync_to_async(task.save)()
-
-async def check_overdue_tasks_4_hours(bot):
-    now = timezone.now()
-    four_hours_ago = now - timedelta(hours=4)
-
-    tasks = await sync_to_async(list)(Task.objects.filter(
-        status__in=['overdue'],
-        deadline__lte=four_hours_ago,
-        deadline__gt=now - timedelta(hours=5),
-        is_notified_4_hours=False
-    ))
-    admins = await get_admin_users()
-    
-    for task in tasks:
-        assignee = await get_task_assignee(task)
-        # Notify assignee
-        if assignee:
-            await bot.send_message(
-                assignee.telegram_id,
-                f"🚨 Attention!\n"
-                f"The task «{task.title}» is overdue for 4 hours!\n"
-                f"Deadline was: {task.deadline.strftime('%m/%d/%Y %I:%M %p')}"
-            )
-        
-        # Notify admins
-        for admin in admins:
-            if admin.notification_enabled:
-                await bot.send_message(
-                    admin.telegram_id,
-                    f"🚨 Attention, Admin!\n"
-                    f"The task «{task.title}» is overdue for 4 hours!\n"
-                    f"Assignee: {assignee.first_name if assignee else 'Not assigned'}\n"
-                    f"Deadline was: {task.deadline.strftime('%m/%d/%Y %I:%M %p')}"
-                )
-        task.is_notified_4_hours = True
-        await sync_to_async(task.save)()
+async def run_due_jobs(rule_names) -> None:
+    """
+    Run the escalation job now that the deadline queue found a rule with work.
+    The queue only decides when; the job still decides what, under the leader
+    lease or for this shard, and the ledger keeps a second run from notifying twice.
+    """
+    if rule_names and scheduler.get_job(ESCALATION_JOB):
+        scheduler.modify_job(ESCALATION_JOB, next_run_time=timezone.now())
+
 
 def setup_task_schedulers(bot):
-    # Check deadlines 48 hours in advance
-    scheduler.add_job(
-        send_deadline_notifications,
-        'interval',
-        hours=24,
-        args=[bot, 48]
-    )
-    
-    # Check deadlines 24 hours in advance
-    scheduler.add_job(
-        send_deadline_notifications,
-        'interval',
-        hours=24,
-        args=[bot, 24]
-    )
-    
-    # Check deadlines 1 hour in advance
-    scheduler.add_job(
-        send_deadline_notifications,
-        'interval',
-        hours=1,
-        args=[bot, 1]
-    )
-    
-    # Check overdue tasks
-    scheduler.add_job(
-        check_overdue_tasks,
-        'interval',
-        minutes=10,
-        args=[bot]
-    )
-    
-    # Check overdue tasks FOR 1 HOUR
-    scheduler.add_job(
-        check_overdue_tasks_1,
-        'interval',
-        hours=1,
-        args=[bot]
-    )
-    
-    # Check overdue tasks FOR 4 HOUR
-    scheduler.add_job(
-        check_overdue_tasks_4_hours,
-        'interval',
-        hours=1,
-        args=[bot]
-    )
\ No newline at end of file
+    job_monitor.attach(scheduler)
+
+    def add_job(job_id: str, func, args, **trigger):
+        # Every run is recorded under job_id for the scheduler health screen
+        scheduler.add_job(job_monitor.wrap(job_id, func), 'interval', id=job_id, args=args, replace_existing=True, **trigger)
+
+    # Overdue transition plus every EscalationRule in one tick. The deadline
+    # queue runs it as soon as a task enters a rule's window; the interval is a
+    # fallback for changes the queue doesn't see, so keep it under the shortest window
+    add_job(ESCALATION_JOB, run_escalations, [bot], minutes=30)
+
+    run_in_background(deadline_queue.run(run_due_jobs), 'deadline_queue')
@@ -0,0 +1,87 @@
+from datetime import datetime
+from typing import NamedTuple
+
+from asgiref.sync import sync_to_async
+from django.db.models import CharField, Count, Exists, F, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from ..models import Task, TaskAssignment, TaskComment, TaskCompletion, TelegramUser
+
+STATUS_DISPLAY = dict(Task.STATUS_CHOICES)
+
+
+class TaskDetail(NamedTuple):
+    """Everything the task card shows, read in one query."""
+
+    id: int
+    title: str
+    description: str
+    deadline: datetime
+    status: str
+    is_group_task: bool
+    media_file_id: str | None
+    media_type: str | None
+    creator_telegram_id: int
+    creator_name: str
+    assignee_name: str | None
+    completions_count: int
+    latest_comment: str | None
+    # Status of the viewer's own TaskAssignment, None when they have none
+    viewer_assignment_status: str | None
+    has_submitted_assignment: bool
+
+    def get_status_display(self) -> str:
+        return STATUS_DISPLAY.get(self.status, self.status)
+
+
+def load_task_detail(task_id: int, viewer: TelegramUser | None = None) -> TaskDetail:
+    assignments = TaskAssignment.objects.filter(task=OuterRef('pk'))
+    completions = (
+        TaskCompletion.objects.filter(task=OuterRef('pk'))
+        .values('task')
+        .annotate(count=Count('pk'))
+        .values('count')
+    )
+    row = (
+        Task.objects.filter(pk=task_id)
+        .annotate(
+            completions_count=Coalesce(Subquery(completions, output_field=IntegerField()), 0),
+            latest_comment=Subquery(
+                TaskComment.objects.filter(task=OuterRef('pk')).order_by('-created_at', '-pk').values('text')[:1]
+            ),
+            viewer_assignment_status=(
+                Subquery(assignments.filter(user_id=viewer.pk).values('status')[:1])
+                if viewer is not None else Value(None, output_field=CharField())
+            ),
+            has_submitted_assignment=Exists(assignments.filter(status='submitted')),
+            creator_telegram_id=F('creator__telegram_id'),
+            creator_name=F('creator__first_name'),
+            assignee_name=F('assignee__first_name'),
+        )
+        .values(*TaskDetail._fields)
+        .get()
+    )
+    return TaskDetail(**row)
+
+
+get_task_detail = sync_to_async(load_task_detail)
+
+
+def render_task_detail(task: TaskDetail, is_admin: bool = False) -> str:
+    text = (
+        f"📝 Task: {task.title}\n\n"
+        f"📄 Description: {task.description}\n"
+        f"📅 Deadline: {task.deadline.strftime('%m/%d/%Y %I:%M %p')}\n"
+        f"👤 Created by: {task.creator_name}\n"
+        f"📊 Status: {task.get_status_display()}\n"
+    )
+    if is_admin:
+        if task.is_group_task:
+            text += f"✅ Completed: {task.completions_count} members\n"
+        if task.status == 'completed':
+            text += f"✅ Task completed\n"
+            if task.latest_comment:
+                text += f"💬 Commentary: {task.latest_comment}\n"
+    if task.assignee_name:
+        text += f"👤 Assignee: {task.assignee_name}\n"
+    return text
@@ -0,0 +1,164 @@
+from functools import lru_cache
+from typing import NamedTuple
+
+from asgiref.sync import sync_to_async
+from django.db.models import Exists, OuterRef, Q
+from django.utils import timezone
+
+from ..models import Task, TaskAssignment, TelegramUser
+from ..utils.pagination import Page
+from ..utils.task_rows import paginate_task_rows
+
+TASKS_PER_PAGE = 5
+
+ACTIVE_STATUSES = ('assigned', 'in_progress', 'overdue')
+
+# Statuses the overdue job still has to move to 'overdue' once the deadline passes
+LIVE_STATUSES = ('open', 'assigned', 'in_progress')
+
+# Callback states used by older keyboards, mapped onto the view names below
+VIEW_ALIASES = {
+    '*': 'all',
+    'my_tasks': 'active',
+    'user_completed_tasks': 'completed',
+    'completed_tasks': 'completed',
+    'user_overdue_tasks': 'overdue',
+    'overdue_tasks': 'overdue',
+    'submitted_tasks': 'submitted',
+    'user_submitted_tasks': 'submitted',
+    'revision_tasks': 'revision',
+    'user_revision_tasks': 'revision',
+    'open_tasks': 'open',
+    'available_tasks': 'open',
+}
+
+# view: (filter on Task for admins, filter on the user's TaskAssignment rows, ordering on Task)
+VIEWS = {
+    'all': (
+        Q(),
+        Q(status__in=ACTIVE_STATUSES) & ~Q(task__status='completed'),
+        ('-created_at',),
+    ),
+    'active': (
+        Q(status__in=ACTIVE_STATUSES),
+        Q(status__in=ACTIVE_STATUSES) & ~Q(task__status='completed'),
+        ('-created_at',),
+    ),
+    'completed': (
+        Q(status='completed'),
+        Q(status='completed') | Q(task__status='completed'),
+        ('-completed_at',),
+    ),
+    'overdue': (
+        Q(status='overdue'),
+        (Q(status='overdue') | Q(task__status='overdue')) & ~Q(task__status='completed'),
+        ('deadline',),
+    ),
+    'submitted': (
+        Q(status='submitted') | (
+            Q(pk__in=TaskAssignment.objects.filter(status='submitted').values('task_id'))
+            & ~Q(status='completed')
+        ),
+        Q(status='submitted') & ~Q(task__status='completed'),
+        ('-created_at',),
+    ),
+    'revision': (
+        Q(status='revision'),
+        Q(status='revision'),
+        ('-created_at',),
+    ),
+    'open': (
+        Q(status='open'),
+        None,
+        ('-created_at',),
+    ),
+}
+
+# Views that also pick up active tasks whose deadline passed before the overdue job ran
+DEADLINE_VIEWS = {'overdue'}
+
+
+class TaskQuery(NamedTuple):
+    """Declarative description of one task list page."""
+
+    view: str = 'all'
+    is_admin: bool = False
+    viewer_id: int | None = None
+    target_telegram_id: int | None = None
+    page: int = 1
+    cursor: str = ''
+
+    @property
+    def view_name(self) -> str:
+        view = VIEW_ALIASES.get(self.view, self.view)
+        return view if view in VIEWS else 'all'
+
+
+class TaskList(NamedTuple):
+    view: str
+    page: Page
+    target: TelegramUser | None = None
+
+
+class CompiledQuery:
+    """A view resolved to a model, a static filter and an ordering, ready to bind to a user."""
+
+    __slots__ = ('model', 'where', 'ordering', 'scope', 'deadline_view')
+
+    def __init__(self, model, where, ordering, scope, deadline_view):
+        self.model = model
+        self.where = where
+        self.ordering = ordering
+        self.scope = scope
+        self.deadline_view = deadline_view
+
+    def queryset(self, user_pk=None):
+        where = self.where
+        if self.deadline_view:
+            if self.model is TaskAssignment:
+                where |= Q(
+                    status__in=('assigned', 'in_progress'),
+                    task__status__in=LIVE_STATUSES,
+                    task__deadline__lt=timezone.now(),
+                )
+            else:
+                where |= Q(status__in=LIVE_STATUSES, deadline__lt=timezone.now())
+        queryset = self.model.objects.filter(where)
+        if self.scope == 'viewer':
+            queryset = queryset.filter(user_id=user_pk)
+        elif self.scope == 'target':
+            # EXISTS instead of a join keeps one row per task, so no DISTINCT is needed
+            queryset = queryset.filter(
+                Q(assignee_id=user_pk)
+                | Exists(TaskAssignment.objects.filter(task=OuterRef('pk'), user_id=user_pk))
+            )
+        return queryset.order_by(*self.ordering)
+
+
+@lru_cache(maxsize=None)
+def compile_query(view: str, is_admin: bool, targeted: bool) -> CompiledQuery:
+    task_filter, assignment_filter, ordering = VIEWS[view]
+    deadline_view = view in DEADLINE_VIEWS
+    if targeted:
+        return CompiledQuery(Task, task_filter, ordering, 'target', deadline_view)
+    if is_admin or assignment_filter is None:
+        return CompiledQuery(Task, task_filter, ordering, None, deadline_view)
+    assignment_ordering = tuple(
+        f"-task__{field[1:]}" if field.startswith('-') else f"task__{field}"
+        for field in ordering
+    )
+    return CompiledQuery(TaskAssignment, assignment_filter, assignment_ordering, 'viewer', deadline_view)
+
+
+def fetch_tasks(query: TaskQuery) -> TaskList:
+    view = query.view_name
+    target = None
+    if query.is_admin and query.target_telegram_id:
+        target = TelegramUser.objects.get(telegram_id=query.target_telegram_id)
+    compiled = compile_query(view, query.is_admin, target is not None)
+    queryset = compiled.queryset(target.pk if target is not None else query.viewer_id)
+    page = paginate_task_rows(queryset, query.page, TASKS_PER_PAGE, query.cursor)
+    return TaskList(view, page, target)
+
+
+get_tasks = sync_to_async(fetch_tasks)
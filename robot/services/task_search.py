@@ -0,0 +1,89 @@
+import re
+
+from asgiref.sync import sync_to_async
+from django.db import connection
+from django.db.models import Exists, OuterRef, Q
+
+from ..models import Task, TaskComment
+from ..utils.pagination import Page
+from ..utils.task_rows import TaskRow, paginate_task_rows
+from .task_query import TASKS_PER_PAGE
+
+FTS_TABLE = 'robot_task_fts'
+
+# bm25 column weights: title, description, comments
+FTS_WEIGHTS = (10.0, 3.0, 1.0)
+
+MAX_TERMS = 8
+
+_fts_available = None
+
+
+def search_terms(text: str) -> list[str]:
+    return re.findall(r'\w+', text.lower())[:MAX_TERMS]
+
+
+def fts_available() -> bool:
+    global _fts_available
+    if _fts_available is None:
+        _fts_available = (
+            connection.vendor == 'sqlite'
+            and FTS_TABLE in connection.introspection.table_names()
+        )
+    return _fts_available
+
+
+def _match_expression(terms) -> str:
+    # Every term is quoted, so user input can't use FTS5 query syntax; the trailing * matches prefixes
+    return ' '.join('"{}"*'.format(term.replace('"', '""')) for term in terms)
+
+
+def _fts_page(terms, page: int, per_page: int) -> Page:
+    match = _match_expression(terms)
+    with connection.cursor() as cursor:
+        cursor.execute(f"SELECT count(*) FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s", [match])
+        total = cursor.fetchone()[0]
+        number = min(max(page, 1), max(1, (total + per_page - 1) // per_page))
+        cursor.execute(
+            f"""
+            SELECT task.id, task.title, task.status
+            FROM {FTS_TABLE}
+            JOIN robot_task AS task ON task.id = {FTS_TABLE}.rowid
+            WHERE {FTS_TABLE} MATCH %s
+            ORDER BY bm25({FTS_TABLE}, %s, %s, %s), task.id DESC
+            LIMIT %s OFFSET %s
+            """,
+            [match, *FTS_WEIGHTS, per_page, (number - 1) * per_page],
+        )
+        items = [TaskRow(pk, pk, title, status, status) for pk, title, status in cursor.fetchall()]
+    return Page(items, number, per_page, total)
+
+
+def _fallback_page(terms, page: int, per_page: int) -> Page:
+    where = Q()
+    for term in terms:
+        where &= (
+            Q(title__icontains=term)
+            | Q(description__icontains=term)
+            | Exists(TaskComment.objects.filter(task=OuterRef('pk'), text__icontains=term))
+        )
+    return paginate_task_rows(Task.objects.filter(where).order_by('-created_at'), page, per_page)
+
+
+def find_tasks(text: str, page: int = 1, per_page: int = TASKS_PER_PAGE) -> Page:
+    """
+    Tasks whose title, description or comments contain every word of `text`.
+
+    On SQLite the FTS5 index from migration 0005 answers the query and results
+    are ranked by bm25, title matches first. Elsewhere the same words are
+    matched with icontains and the newest tasks come first.
+    """
+    terms = search_terms(text)
+    if not terms:
+        return Page([], 1, per_page, 0)
+    if fts_available():
+        return _fts_page(terms, page, per_page)
+    return _fallback_page(terms, page, per_page)
+
+
+search_tasks = sync_to_async(find_tasks)
@@ -0,0 +1,44 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import BotText, EscalationRule, Task, TelegramUser
+from .schedulers.deadline_queue import deadline_queue
+from .utils.get_text_by_name import bot_texts
+from .utils.user_cache import user_cache
+
+
+@receiver(post_save, sender=TelegramUser)
+@receiver(post_delete, sender=TelegramUser)
+def invalidate_cached_user(sender, instance, **kwargs):
+    user_cache.invalidate(instance.telegram_id)
+
+
+@receiver(post_save, sender=BotText)
+def refresh_cached_text(sender, instance, **kwargs):
+    bot_texts.update(instance.name, instance.text)
+
+
+@receiver(post_delete, sender=BotText)
+def discard_cached_text(sender, instance, **kwargs):
+    bot_texts.discard(instance.name)
+
+
+@receiver(post_save, sender=Task)
+def track_task_deadline(sender, instance, **kwargs):
+    # Creation, a new deadline and a status change all reschedule the task's reminders
+    transaction.on_commit(
+        lambda: deadline_queue.submit(deadline_queue.track, instance.pk, instance.deadline, instance.status)
+    )
+
+
+@receiver(post_delete, sender=Task)
+def forget_task_deadline(sender, instance, **kwargs):
+    task_id = instance.pk
+    transaction.on_commit(lambda: deadline_queue.submit(deadline_queue.forget, task_id))
+
+
+@receiver(post_save, sender=EscalationRule)
+@receiver(post_delete, sender=EscalationRule)
+def reload_escalation_rules(sender, instance, **kwargs):
+    transaction.on_commit(lambda: deadline_queue.submit(deadline_queue.request_reload))
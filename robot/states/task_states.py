@@ -10,6 +10,7 @@ class TaskCreation(StatesGroup):
     waiting_for_media = State()
     confirm_creation = State()
     selecting_assignees = State()  # только для групповых
+    waiting_for_reminder = State()
 
 
 class TaskComment(StatesGroup):
@@ -27,3 +28,7 @@ class TaskFilters(StatesGroup):
     revision_tasks = State()
     completed_tasks = State()
     overdue_tasks = State()
+
+
+class TaskSearch(StatesGroup):
+    waiting_for_query = State()
@@ -1,3 +1,445 @@
-from django.test import TestCase
+import asyncio
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from aiogram.exceptions import TelegramForbiddenError, TelegramNetworkError
+from aiogram.methods import SendMessage
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+
+from .models import EscalationRule, NotificationLog, OutboxMessage, Reminder, Task, TaskAssignment, TelegramUser
+from .notifications.ledger import claim
+from .notifications import outbox
+from .notifications.outbox import LEASE, MAX_ATTEMPTS, backoff, claim_batch, enqueue, renew, settle
+from .notifications.reminders import claim_due, queue_due_reminders
+from .notifications.sender import BatchReport, Outgoing
+from .schedulers.escalation import due_notifications, evaluate, load_rules, occurrence, queue_due, rule_kind, rule_name
+from .services.task_query import VIEWS, TaskQuery, compile_query, fetch_tasks
+from .utils.task_rows import paginate_task_rows
+
+
+class KeysetPaginationTests(TestCase):
+    """Cursor walks must visit the same rows, in the same order, as OFFSET pages."""
+
+    PER_PAGE = 3
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = TelegramUser.objects.create(telegram_id=1, first_name='Admin', is_admin=True)
+        cls.user = TelegramUser.objects.create(telegram_id=2, first_name='User')
+        now = timezone.now()
+        statuses = ['open', 'assigned', 'in_progress', 'submitted', 'completed', 'revision', 'overdue']
+        assignment_statuses = {
+            'open': None,
+            'assigned': 'assigned',
+            'in_progress': 'in_progress',
+            'submitted': 'submitted',
+            'completed': 'completed',
+            'revision': 'revision',
+            'overdue': 'overdue',
+        }
+        for number in range(28):
+            status = statuses[number % len(statuses)]
+            task = Task.objects.create(
+                title=f"Task {number}",
+                description='',
+                creator=cls.admin,
+                assignee=cls.user if status != 'open' else None,
+                # Groups of four share a deadline, so the ordering has to fall back to the pk
+                deadline=now + timedelta(days=number // 4),
+                status=status,
+            )
+            if assignment_statuses[status]:
+                TaskAssignment.objects.create(task=task, user=cls.user, status=assignment_statuses[status])
+        tasks = list(Task.objects.order_by('pk'))
+        # Ties on created_at in groups of three, and on completed_at with NULLs mixed in
+        for index, task in enumerate(tasks):
+            Task.objects.filter(pk=task.pk).update(
+                created_at=now - timedelta(hours=index // 3),
+                completed_at=None if index % 5 == 0 else now - timedelta(days=index // 4),
+            )
+
+    def querysets(self):
+        for view in VIEWS:
+            for is_admin, targeted in ((True, False), (False, False), (True, True)):
+                if not is_admin and VIEWS[view][1] is None:
+                    continue
+                compiled = compile_query(view, is_admin, targeted)
+                yield f"{view} admin={is_admin} targeted={targeted}", compiled.queryset(self.user.pk)
+
+    def offset_walk(self, queryset) -> list[int]:
+        first = paginate_task_rows(queryset, 1, self.PER_PAGE)
+        pks = []
+        for number in range(1, first.num_pages + 1):
+            pks.extend(row.pk for row in paginate_task_rows(queryset, number, self.PER_PAGE))
+        return pks
+
+    def test_forward_cursor_walk_matches_offset_pages(self):
+        for label, queryset in self.querysets():
+            with self.subTest(label):
+                expected = self.offset_walk(queryset)
+                page = paginate_task_rows(queryset, 1, self.PER_PAGE)
+                pks = [row.pk for row in page]
+                while page.has_next:
+                    page = paginate_task_rows(queryset, page.number + 1, self.PER_PAGE, page.next_cursor)
+                    pks.extend(row.pk for row in page)
+                self.assertEqual(pks, expected)
+                self.assertEqual(len(set(pks)), queryset.count())
+
+    def test_backward_cursor_walk_matches_offset_pages(self):
+        for label, queryset in self.querysets():
+            with self.subTest(label):
+                expected = self.offset_walk(queryset)
+                last = paginate_task_rows(queryset, 1, self.PER_PAGE).num_pages
+                page = paginate_task_rows(queryset, last, self.PER_PAGE)
+                pages = [[row.pk for row in page]]
+                while page.has_previous:
+                    page = paginate_task_rows(queryset, page.number - 1, self.PER_PAGE, page.previous_cursor)
+                    pages.insert(0, [row.pk for row in page])
+                self.assertEqual([pk for pks in pages for pk in pks], expected)
+
+    def test_ties_on_created_at_are_split_by_pk(self):
+        queryset = compile_query('all', True, False).queryset()
+        page = paginate_task_rows(queryset, 1, 2)
+        following = paginate_task_rows(queryset, 2, 2, page.next_cursor)
+        tied = Task.objects.filter(created_at=Task.objects.get(pk=page.last_pk).created_at)
+        self.assertGreater(tied.count(), 1)
+        self.assertFalse({row.pk for row in page} & {row.pk for row in following})
+        self.assertEqual([row.pk for row in following], self.offset_walk(queryset)[2:4])
+
+
+
+class TargetScopeTests(TestCase):
+    """An admin looking at one user's tasks sees each task once, however the user is tied to it."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = TelegramUser.objects.create(telegram_id=1, first_name='Admin', is_admin=True)
+        cls.user = TelegramUser.objects.create(telegram_id=2, first_name='User')
+        other = TelegramUser.objects.create(telegram_id=3, first_name='Other')
+        cls.tasks = {}
+        for status in ('in_progress', 'submitted', 'overdue', 'completed', 'revision'):
+            task = Task.objects.create(
+                title=status, description='', creator=cls.admin, assignee=cls.user,
+                deadline=timezone.now() + timedelta(days=1), status=status,
+            )
+            # Both the assignee and an assignment holder, next to another user's assignment
+            TaskAssignment.objects.create(task=task, user=cls.user, status=status)
+            TaskAssignment.objects.create(task=task, user=other, status=status)
+            cls.tasks[status] = task.pk
+
+    def test_assignee_with_an_assignment_gets_each_task_once(self):
+        for view in VIEWS:
+            with self.subTest(view):
+                pks = [
+                    row.pk
+                    for row in fetch_tasks(TaskQuery(view, True, self.admin.pk, self.user.telegram_id)).page
+                ]
+                self.assertEqual(len(pks), len(set(pks)))
+                expected = compile_query(view, True, False).queryset().filter(pk__in=self.tasks.values())
+                self.assertEqual(sorted(pks), sorted(expected.values_list('pk', flat=True)))
+
+    def test_all_view_lists_every_task_of_the_user(self):
+        page = fetch_tasks(TaskQuery('all', True, self.admin.pk, self.user.telegram_id)).page
+        self.assertEqual(sorted(row.pk for row in page), sorted(self.tasks.values()))
+
+def send_error(error_class):
+    return error_class(method=SendMessage(chat_id=1, text='x'), message='error')
+
+
+class OutboxTests(TestCase):
+    def setUp(self):
+        enqueue([Outgoing(chat_id, f"Message {chat_id}") for chat_id in range(1, 4)])
+
+    def expire_leases(self):
+        OutboxMessage.objects.filter(status='sending').update(claimed_at=timezone.now() - LEASE - timedelta(seconds=1))
+
+    def test_claimed_messages_are_leased(self):
+        messages = claim_batch(10)
+        self.assertEqual(len(messages), 3)
+        self.assertTrue(all(message.status == 'sending' and message.attempts == 1 for message in messages))
+        self.assertEqual(claim_batch(10), [])
+
+    def test_expired_lease_is_claimed_again(self):
+        first = claim_batch(10)
+        self.expire_leases()
+        second = claim_batch(10)
+        self.assertEqual([message.pk for message in second], [message.pk for message in first])
+        self.assertTrue(all(message.attempts == 2 for message in second))
+        self.assertNotEqual(second[0].claim_token, first[0].claim_token)
+
+    def test_stale_worker_does_not_overwrite_new_owner(self):
+        stale = claim_batch(10)
+        self.expire_leases()
+        claim_batch(10)
+        settle(stale, [send_error(TelegramNetworkError)] * len(stale))
+        self.assertEqual(OutboxMessage.objects.filter(status='sending').count(), 3)
+
+    def test_stale_worker_does_not_mark_sent(self):
+        stale = claim_batch(10)
+        self.expire_leases()
+        current = claim_batch(10)
+        settle(stale, [None] * len(stale))
+        self.assertEqual(OutboxMessage.objects.filter(status='sending', claim_token=current[0].claim_token).count(), 3)
+        settle(current, [None] * len(current))
+        self.assertEqual(OutboxMessage.objects.filter(status='sent').count(), 3)
+
+    def test_renewed_lease_is_not_claimed_again(self):
+        messages = claim_batch(10)
+        self.expire_leases()
+        self.assertEqual(renew(messages), 3)
+        self.assertEqual(claim_batch(10), [])
+
+    async def test_slow_batch_keeps_its_lease(self):
+        messages = await outbox.sync_to_async(claim_batch)(10)
+
+        class SlowSender:
+            async def send_batch(self, outgoing):
+                outgoing = list(outgoing)
+                # Held back by the rate limits past the lease
+                await outbox.sync_to_async(self.expire)()
+                await asyncio.sleep(0.05)
+                return BatchReport([None] * len(outgoing), 0, 0.05)
+
+            def expire(self):
+                OutboxMessage.objects.update(claimed_at=timezone.now() - LEASE - timedelta(seconds=1))
+
+        with mock.patch.object(outbox, 'get_sender', return_value=SlowSender()), \
+                mock.patch.object(outbox, 'RENEW_INTERVAL', 0.01):
+            report = await outbox.outbox_workers.send_leased(None, messages)
+            self.assertEqual(await outbox.sync_to_async(claim_batch)(10), [])
+        self.assertEqual(report.sent, 3)
+
+    def test_backoff_doubles_up_to_max_delay(self):
+        self.assertEqual(backoff(1), timedelta(seconds=5))
+        self.assertEqual(backoff(2), timedelta(seconds=10))
+        self.assertEqual(backoff(4), timedelta(seconds=40))
+        self.assertEqual(backoff(20), timedelta(hours=1))
+
+    def test_transient_error_is_retried_after_backoff(self):
+        messages = claim_batch(10)
+        settle(messages, [None, send_error(TelegramNetworkError), None])
+        retried = OutboxMessage.objects.get(pk=messages[1].pk)
+        self.assertEqual(retried.status, 'pending')
+        self.assertGreater(retried.available_at, timezone.now() + backoff(1) - timedelta(seconds=1))
+        self.assertEqual(OutboxMessage.objects.filter(status='sent').count(), 2)
+        self.assertEqual(claim_batch(10), [])
+        OutboxMessage.objects.filter(pk=retried.pk).update(available_at=timezone.now())
+        self.assertEqual([message.pk for message in claim_batch(10)], [retried.pk])
+
+    def test_permanent_error_fails_at_once(self):
+        messages = claim_batch(10)
+        settle(messages, [send_error(TelegramForbiddenError), None, None])
+        failed = OutboxMessage.objects.get(pk=messages[0].pk)
+        self.assertEqual(failed.status, 'failed')
+        self.assertEqual(failed.attempts, 1)
+
+    def test_last_attempt_fails(self):
+        OutboxMessage.objects.update(attempts=MAX_ATTEMPTS - 1)
+        messages = claim_batch(10)
+        settle(messages, [send_error(TelegramNetworkError)] * len(messages))
+        self.assertEqual(OutboxMessage.objects.filter(status='failed').count(), 3)
+
+    def test_messages_survive_a_restart(self):
+        # A worker died holding part of the queue; the rest was never claimed
+        held = {message.pk for message in claim_batch(2)}
+        waiting = {message.pk for message in claim_batch(10)}
+        self.assertEqual(len(waiting), 1)
+        OutboxMessage.objects.filter(pk__in=waiting).update(status='pending', claim_token=None)
+        self.assertEqual({message.pk for message in claim_batch(10)}, waiting)
+        self.expire_leases()
+        self.assertEqual({message.pk for message in claim_batch(10)}, held | waiting)
+
+
+class LedgerClaimTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        admin = TelegramUser.objects.create(telegram_id=1, first_name='Admin', is_admin=True)
+        for number in range(4):
+            task = Task.objects.create(
+                title=f"Task {number}", description='', creator=admin, deadline=timezone.now(), status='overdue'
+            )
+            NotificationLog.objects.create(task=task, kind='overdue:admin', recipient=admin)
+
+    def test_overlapping_claimers_get_disjoint_rows(self):
+        overlapping = {}
+
+        def claim_in_between(execute, sql, params, many, context):
+            # Another claimer takes the rows after this one selected them, before it updates them
+            if sql.startswith('UPDATE') and 'second' not in overlapping:
+                overlapping['second'] = []
+                overlapping['second'] = claim(['overdue:admin'], 2)
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(claim_in_between):
+            first = claim(['overdue:admin'], 2)
+        second = overlapping['second']
+        self.assertEqual(len(second), 2)
+        self.assertEqual(first, [])
+        self.assertFalse({log.pk for log in first} & {log.pk for log in second})
+
+    def test_claimed_rows_are_not_handed_out_again(self):
+        first = claim(['overdue:admin'], 3)
+        second = claim(['overdue:admin'], 3)
+        self.assertEqual(len(first), 3)
+        self.assertEqual(len(second), 1)
+        self.assertFalse({log.pk for log in first} & {log.pk for log in second})
+        self.assertEqual(claim(['overdue:admin'], 3), [])
+
+
+
+class ReminderClaimTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = TelegramUser.objects.create(telegram_id=2, first_name='User')
+        now = timezone.now()
+        for number, status in enumerate(['in_progress', 'in_progress', 'in_progress', 'completed']):
+            task = Task.objects.create(
+                title=f"Task {number}", description='', creator=cls.user, assignee=cls.user,
+                deadline=now + timedelta(days=1), status=status,
+            )
+            Reminder.objects.create(task=task, reminder_time=now - timedelta(minutes=number))
+
+    def test_overlapping_claimers_get_disjoint_reminders(self):
+        overlapping = {}
+
+        def claim_in_between(execute, sql, params, many, context):
+            # Another worker takes the reminders after this one selected them, before it updates them
+            if sql.startswith('UPDATE') and 'second' not in overlapping:
+                overlapping['second'] = []
+                overlapping['second'] = claim_due(2)
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(claim_in_between):
+            first = claim_due(2)
+        second = overlapping['second']
+        self.assertEqual(len(second), 2)
+        self.assertEqual(first, [])
+        self.assertFalse({reminder.pk for reminder in first} & {reminder.pk for reminder in second})
+
+    def test_claimed_reminders_are_not_handed_out_again(self):
+        first = claim_due(3)
+        second = claim_due(3)
+        self.assertEqual(len(first), 3)
+        self.assertEqual(len(second), 1)
+        self.assertFalse({reminder.pk for reminder in first} & {reminder.pk for reminder in second})
+        self.assertEqual(claim_due(3), [])
+
+    def test_reminders_of_completed_tasks_are_consumed_silently(self):
+        self.assertEqual(queue_due_reminders(), 4)
+        self.assertFalse(Reminder.objects.filter(is_sent=False).exists())
+        texts = list(OutboxMessage.objects.values_list('text', flat=True))
+        self.assertEqual(len(texts), 3)
+        self.assertFalse(any('Task 3' in text for text in texts))
+        self.assertEqual(queue_due_reminders(), 0)
+
+class EscalationRuleTests(SimpleTestCase):
+    deadline = timezone.now().replace(microsecond=0)
+
+    def rule(self, **fields):
+        defaults = {
+            'name': 'overdue',
+            'offset': timedelta(0),
+            'window': timedelta(hours=24),
+            'repeat': None,
+            'audience': 'both',
+        }
+        return EscalationRule(**{**defaults, **fields})
+
+    def test_window_is_half_open(self):
+        rule = self.rule(offset=timedelta(hours=-1), window=timedelta(hours=1))
+        opens = self.deadline - timedelta(hours=1)
+        self.assertIsNone(occurrence(rule, self.deadline, opens - timedelta(seconds=1)))
+        self.assertEqual(occurrence(rule, self.deadline, opens), 0)
+        self.assertEqual(occurrence(rule, self.deadline, self.deadline - timedelta(seconds=1)), 0)
+        # elapsed == window is already outside
+        self.assertIsNone(occurrence(rule, self.deadline, self.deadline))
+
+    def test_repeats_are_numbered(self):
+        rule = self.rule(repeat=timedelta(hours=6))
+        for hours, number in ((0, 0), (5.9, 0), (6, 1), (23.9, 3), (24, None)):
+            with self.subTest(hours=hours):
+                self.assertEqual(occurrence(rule, self.deadline, self.deadline + timedelta(hours=hours)), number)
+
+    def test_rule_kind_round_trips(self):
+        rule = self.rule()
+        self.assertEqual(rule_kind(rule, 0), 'overdue')
+        self.assertEqual(rule_kind(rule, 3), 'overdue#3')
+        self.assertEqual(rule_name('overdue#3'), 'overdue')
+        self.assertEqual(rule_name('overdue#3:admin'), 'overdue')
+        self.assertEqual(rule_name('overdue:admin'), 'overdue')
+
+    def test_audience_split(self):
+        admins = [TelegramUser(pk=pk) for pk in (10, 11)]
+        now = self.deadline + timedelta(hours=7)
+        tasks = [(1, 5, self.deadline, 'overdue'), (2, None, self.deadline, 'overdue')]
+        cases = {
+            'assignee': [(1, 'overdue#1', 5, self.deadline)],
+            'admins': [
+                (1, 'overdue#1:admin', 10, self.deadline), (1, 'overdue#1:admin', 11, self.deadline),
+                (2, 'overdue#1:admin', 10, self.deadline), (2, 'overdue#1:admin', 11, self.deadline),
+            ],
+            'both': [
+                (1, 'overdue#1', 5, self.deadline),
+                (1, 'overdue#1:admin', 10, self.deadline), (1, 'overdue#1:admin', 11, self.deadline),
+                (2, 'overdue#1:admin', 10, self.deadline), (2, 'overdue#1:admin', 11, self.deadline),
+            ],
+        }
+        for audience, expected in cases.items():
+            with self.subTest(audience):
+                rule = self.rule(audience=audience, repeat=timedelta(hours=6))
+                self.assertEqual(due_notifications([rule], tasks, admins, now), expected)
+
+    def test_rules_only_see_their_statuses(self):
+        before = self.rule(name='reminder_1h', offset=timedelta(hours=-1), window=timedelta(hours=1))
+        after = self.rule()
+        tasks = [
+            (1, 5, self.deadline, 'in_progress'),
+            (2, 5, self.deadline, 'overdue'),
+            (3, 5, self.deadline, 'submitted'),
+        ]
+        self.assertEqual(
+            due_notifications([before, after], tasks, [], self.deadline - timedelta(minutes=30)),
+            [(1, 'reminder_1h', 5, self.deadline)],
+        )
+        self.assertEqual(
+            due_notifications([before, after], tasks, [], self.deadline + timedelta(minutes=30)),
+            [(2, 'overdue', 5, self.deadline)],
+        )
+
+
+class MovedDeadlineTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = TelegramUser.objects.create(telegram_id=2, first_name='User')
+        cls.task = Task.objects.create(
+            title='Task', description='', creator=cls.user, assignee=cls.user,
+            deadline=timezone.now() + timedelta(hours=30), status='in_progress',
+        )
+
+    def kinds(self, **filters):
+        return list(NotificationLog.objects.filter(task=self.task, **filters).values_list('kind', flat=True))
+
+    def test_moved_deadline_gets_its_reminders_again(self):
+        rules = load_rules()
+        evaluate(rules, [])
+        queue_due(rules)
+        self.assertEqual(self.kinds(status='sent'), ['deadline_48h'])
+        evaluate(rules, [])
+        self.assertEqual(self.kinds(status='pending'), [])
+
+        self.task.deadline += timedelta(hours=1)
+        self.task.save()
+        evaluate(rules, [])
+        self.assertEqual(self.kinds(status='pending'), ['deadline_48h'])
+        self.assertEqual(queue_due(rules), 1)
+        self.assertEqual(self.kinds(status='sent'), ['deadline_48h', 'deadline_48h'])
+
+    def test_pending_notification_of_an_old_deadline_is_dropped(self):
+        rules = load_rules()
+        evaluate(rules, [])
+        Task.objects.filter(pk=self.task.pk).update(deadline=self.task.deadline + timedelta(days=7))
+        self.assertEqual(queue_due(rules), 0)
+        self.assertEqual(self.kinds(), [])
+        self.assertEqual(OutboxMessage.objects.count(), 0)
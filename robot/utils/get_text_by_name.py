@@ -1,11 +1,91 @@
+import asyncio
+import logging
+import threading
+
 from robot.models import BotText
 from asgiref.sync import sync_to_async
+from django.db.models import Count, Max
+
+
+class BotTextCache:
+    """
+    In-memory copy of every BotText row.
+
+    The table is loaded once at startup. `watch()` then compares a cheap
+    version stamp (row count and latest `updated_at`) every `check_interval`
+    seconds and reloads when an admin has edited a text. Names that are not in
+    the table yet are created in the background with their default text.
+    """
+
+    def __init__(self, check_interval: float = 30):
+        self.check_interval = check_interval
+        self._texts = {}
+        self._version = None
+        self._lock = threading.Lock()
+        self._pending = set()
+
+    @staticmethod
+    def _current_version():
+        stamp = BotText.objects.aggregate(count=Count('id'), updated_at=Max('updated_at'))
+        return stamp['count'], stamp['updated_at']
+
+    def load(self):
+        version = self._current_version()
+        texts = {}
+        for name, text in BotText.objects.order_by('id').values_list('name', 'text'):
+            texts.setdefault(name, text)
+        with self._lock:
+            self._texts = texts
+            self._version = version
+        logging.info(f"Loaded {len(texts)} bot texts")
+
+    def refresh_if_stale(self):
+        if self._current_version() != self._version:
+            self.load()
+
+    async def watch(self):
+        while True:
+            await asyncio.sleep(self.check_interval)
+            try:
+                await sync_to_async(self.refresh_if_stale)()
+            except Exception as e:
+                logging.error(f"Error while refreshing bot texts: {e}")
+
+    def update(self, name, text):
+        with self._lock:
+            self._texts[name] = text
+
+    def discard(self, name):
+        with self._lock:
+            self._texts.pop(name, None)
+
+    def get(self, name, text="") -> str:
+        cached = self._texts.get(name)
+        if cached is None:
+            with self._lock:
+                cached = self._texts.setdefault(name, text)
+            self._create_missing(name, text)
+        return cached
+
+    def _create_missing(self, name, text):
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            BotText.objects.get_or_create(name=name, defaults={'text': text})
+            return
+        task = loop.create_task(self._create_missing_async(name, text))
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+
+    async def _create_missing_async(self, name, text):
+        try:
+            await sync_to_async(BotText.objects.get_or_create)(name=name, defaults={'text': text})
+        except Exception as e:
+            logging.error(f"Failed to create bot text {name}: {e}")
+
+
+bot_texts = BotTextCache()
 
 
-@sync_to_async
 def get_text_by_name(name, text=""):
-    try:
-        return BotText.objects.get(name=name).text
-    except BotText.DoesNotExist:
-        BotText.objects.create(name=name, text=text)
-        return text
+    return bot_texts.get(name, text)
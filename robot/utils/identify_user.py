@@ -1,19 +1,32 @@
 from robot.models import TelegramUser
 from asgiref.sync import sync_to_async
+from .user_cache import user_cache
 
 
 @sync_to_async
 def identify_user(telegram_id, username = None, first_name = None) -> tuple[TelegramUser, bool]:
-    try:
-        return TelegramUser.objects.get(telegram_id=telegram_id), False
-    except TelegramUser.DoesNotExist:
-        if username and first_name:
-            TelegramUser.objects.create(telegram_id=telegram_id, username=username, first_name= first_name)
-        elif username:
-            TelegramUser.objects.create(telegram_id=telegram_id, username=username)
-        elif first_name:
-            TelegramUser.objects.create(telegram_id=telegram_id, first_name = first_name)
-        else:
-            TelegramUser.objects.create(telegram_id=telegram_id)
-        return TelegramUser.objects.get(telegram_id=telegram_id), True
-   
+    created = False
+    user = user_cache.get(telegram_id)
+    if user is None:
+        generation = user_cache.generation
+        defaults = {}
+        if username:
+            defaults['username'] = username
+        if first_name:
+            defaults['first_name'] = first_name
+        # get_or_create retries the read when a concurrent insert wins the race
+        user, created = TelegramUser.objects.get_or_create(telegram_id=telegram_id, defaults=defaults)
+        if created:
+            generation = user_cache.generation
+        user_cache.set(user, generation)
+
+    changes = {
+        field: value
+        for field, value in (('username', username), ('first_name', first_name))
+        if value and getattr(user, field) != value
+    }
+    if changes:
+        TelegramUser.objects.filter(pk=user.pk).update(**changes)
+        for field, value in changes.items():
+            setattr(user, field, value)
+    return user, created
@@ -0,0 +1,21 @@
+from contextvars import ContextVar
+
+# Counters of the scheduler job running in the current context, see robot/schedulers/monitor.py
+COUNTERS = ('scanned', 'attempted', 'sent', 'failed')
+
+current_job_stats = ContextVar('current_job_stats', default=None)
+
+
+def count(**amounts):
+    """
+    Add to the counters of the running scheduler job, if any: tasks `scanned`,
+    notifications `attempted`, messages `sent` to the outbox and notifications
+    that `failed`.
+
+    sync_to_async carries the context into its thread, so ORM code can count too.
+    """
+    stats = current_job_stats.get()
+    if stats is None:
+        return
+    for name, amount in amounts.items():
+        stats[name] += amount
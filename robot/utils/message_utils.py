@@ -1,11 +1,85 @@
+from collections import OrderedDict
+
 from aiogram.exceptions import TelegramBadRequest
 from aiogram.types import Message, CallbackQuery
 
+from .logger import logger
+
+# Errors after which the message can't be edited any more, so a new one is sent instead
+GONE_ERRORS = (
+    "message to edit not found",
+    "message can't be edited",
+    "there is no text in the message to edit",
+    "message_id_invalid",
+)
+
+
+class MessageFingerprints:
+    """
+    Bounded LRU of what the bot last rendered into each of its messages,
+    keyed by (chat_id, message_id).
+
+    Only this process edits the bot's messages, so a matching fingerprint means
+    the edit would be a no-op and Telegram would reject it as "not modified".
+    """
+
+    def __init__(self, maxsize: int = 4096):
+        self.maxsize = maxsize
+        self.skipped = 0
+        self._fingerprints = OrderedDict()
+
+    @staticmethod
+    def fingerprint(text: str, reply_markup=None):
+        markup = reply_markup.model_dump_json(exclude_none=True) if reply_markup is not None else None
+        return hash((text, markup))
+
+    def matches(self, key, fingerprint) -> bool:
+        if self._fingerprints.get(key) == fingerprint:
+            self._fingerprints.move_to_end(key)
+            self.skipped += 1
+            return True
+        return False
+
+    def remember(self, key, fingerprint):
+        self._fingerprints[key] = fingerprint
+        self._fingerprints.move_to_end(key)
+        while len(self._fingerprints) > self.maxsize:
+            self._fingerprints.popitem(last=False)
+
+    def forget(self, key):
+        self._fingerprints.pop(key, None)
+
+
+message_fingerprints = MessageFingerprints()
+
+
+def _key(message: Message):
+    return (message.chat.id, message.message_id)
+
+
 async def safe_edit_message(message: Message, text: str, reply_markup=None):
+    fingerprint = message_fingerprints.fingerprint(text, reply_markup)
+    if message_fingerprints.matches(_key(message), fingerprint):
+        return message
+
     try:
         await message.edit_text(text, reply_markup=reply_markup)
+        message_fingerprints.remember(_key(message), fingerprint)
+        return message
     except TelegramBadRequest as e:
-        await message.answer(text, reply_markup=reply_markup)
+        error = str(e).lower()
+        if "message is not modified" in error:
+            message_fingerprints.remember(_key(message), fingerprint)
+            return message
+        if not any(reason in error for reason in GONE_ERRORS):
+            raise
+        logger.info(f"Message {_key(message)} can't be edited ({e}), sending a new one")
+        message_fingerprints.forget(_key(message))
+
+    sent = await message.answer(text, reply_markup=reply_markup)
+    if isinstance(sent, Message):
+        message_fingerprints.remember(_key(sent), fingerprint)
+    return sent
 
 async def send_task_message(message: Message, task, text: str, reply_markup=None):
     if task.media_file_id:
@@ -19,5 +93,5 @@ async def send_task_message(message: Message, task, text: str, reply_markup=None
             return
         except Exception as e:
             logger.error(f"Error sending media: {e}")
-    
-    await safe_edit_message(message, text, reply_markup)
\ No newline at end of file
+
+    await safe_edit_message(message, text, reply_markup)
@@ -0,0 +1,148 @@
+from django.db.models import F, Q, QuerySet
+
+
+class Page:
+    """One page of task list rows plus the cursors that link it to its neighbours."""
+
+    __slots__ = ('items', 'number', 'per_page', 'total', 'first_pk', 'last_pk')
+
+    def __init__(self, items, number, per_page, total, first_pk=None, last_pk=None):
+        self.items = items
+        self.number = number
+        self.per_page = per_page
+        self.total = total
+        self.first_pk = first_pk
+        self.last_pk = last_pk
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+    @property
+    def num_pages(self) -> int:
+        return max(1, (self.total + self.per_page - 1) // self.per_page)
+
+    @property
+    def has_next(self) -> bool:
+        return self.number < self.num_pages
+
+    @property
+    def has_previous(self) -> bool:
+        return self.number > 1
+
+    @property
+    def next_cursor(self) -> str:
+        return f"a{self.last_pk}" if self.last_pk is not None else ""
+
+    @property
+    def previous_cursor(self) -> str:
+        return f"b{self.first_pk}" if self.first_pk is not None else ""
+
+
+def _order_keys(queryset: QuerySet):
+    keys = []
+    for field in queryset.query.order_by or queryset.model._meta.ordering:
+        if not isinstance(field, str):
+            raise ValueError(f"Keyset pagination needs plain field ordering, got {field!r}")
+        keys.append((field.lstrip('-'), field.startswith('-')))
+    # The primary key makes the ordering total, so cursors never skip ties
+    keys.append(('pk', keys[0][1] if keys else False))
+    return keys
+
+
+def _is_nullable(model, path: str) -> bool:
+    if path == 'pk':
+        return False
+    field = None
+    for name in path.split('__'):
+        field = model._meta.get_field(name)
+        if field.is_relation:
+            model = field.related_model
+    return field.null
+
+
+def _ordering(keys, reverse=False):
+    # NULLs sort after values going forward, so they come first in reverse
+    nulls = {'nulls_first': True} if reverse else {'nulls_last': True}
+    expressions = []
+    for field, descending in keys:
+        if descending != reverse:
+            expressions.append(F(field).desc(**nulls))
+        else:
+            expressions.append(F(field).asc(**nulls))
+    return expressions
+
+
+def _seek_condition(model, keys, cursor_values, forward: bool) -> Q:
+    """Rows strictly after (or before) the cursor row in the order given by `keys`."""
+    condition = Q(pk__in=[])
+    equal_prefix = Q()
+    for field, descending in keys:
+        value = cursor_values[field]
+        if value is None:
+            equal = Q(**{f"{field}__isnull": True})
+            # Every value sorts before NULL, so only a backward seek has rows beyond it
+            beyond = None if forward else Q(**{f"{field}__isnull": False})
+        else:
+            equal = Q(**{field: value})
+            beyond = Q(**{f"{field}__{'lt' if descending == forward else 'gt'}": value})
+            if forward and _is_nullable(model, field):
+                beyond |= Q(**{f"{field}__isnull": True})
+        if beyond is not None:
+            condition |= equal_prefix & beyond
+        equal_prefix &= equal
+    return condition
+
+
+def _row_pk(row):
+    return row['pk'] if isinstance(row, dict) else row.pk
+
+
+def paginate(rows, page: int = 1, per_page: int = 5, cursor: str = None, row=None) -> Page:
+    """
+    Return one page of `rows`.
+
+    Querysets are paginated in the database: one COUNT for the page counter and
+    one LIMIT query for the rows. When `cursor` names the boundary row of the
+    neighbouring page ("a<pk>" for the page after it, "b<pk>" for the page
+    before it), the rows are fetched with a seek on the queryset ordering
+    instead of an OFFSET, so every page costs the same however deep it is.
+    Plain sequences are sliced in memory.
+
+    `row`, when given, is called with each values() dict to build the items.
+    """
+    if not isinstance(rows, QuerySet):
+        total = len(rows)
+        number = min(max(page, 1), max(1, (total + per_page - 1) // per_page))
+        items = list(rows[(number - 1) * per_page:number * per_page])
+        return Page(items, number, per_page, total)
+
+    total = rows.count()
+    number = min(max(page, 1), max(1, (total + per_page - 1) // per_page))
+    keys = _order_keys(rows)
+
+    items = None
+    if cursor and cursor[0] in 'ab' and cursor[1:].isdigit():
+        forward = cursor[0] == 'a'
+        cursor_values = (
+            rows.model._base_manager
+            .filter(pk=int(cursor[1:]))
+            .values(*(field for field, _ in keys))
+            .first()
+        )
+        if cursor_values is not None:
+            seek = rows.filter(_seek_condition(rows.model, keys, cursor_values, forward))
+            items = list(seek.order_by(*_ordering(keys, reverse=not forward))[:per_page])
+            if not forward:
+                items.reverse()
+    if not items:
+        offset = (number - 1) * per_page
+        items = list(rows.order_by(*_ordering(keys))[offset:offset + per_page])
+
+    first_pk = _row_pk(items[0]) if items else None
+    last_pk = _row_pk(items[-1]) if items else None
+    if row is not None:
+        items = [row(**item) for item in items]
+    return Page(items, number, per_page, total, first_pk=first_pk, last_pk=last_pk)
@@ -0,0 +1,40 @@
+from django.db.models import F, QuerySet
+
+from robot.models import TaskAssignment
+from .pagination import Page, paginate
+
+
+class TaskRow:
+    """The columns a task list button needs, read with values() instead of full models."""
+
+    __slots__ = ('pk', 'id', 'title', 'status', 'assignment_status')
+
+    def __init__(self, pk, task_pk, task_title, task_status, assignment_status):
+        self.pk = pk
+        self.id = task_pk
+        self.title = task_title
+        self.status = task_status
+        self.assignment_status = assignment_status
+
+
+def task_rows(queryset: QuerySet) -> QuerySet:
+    """Project a Task or TaskAssignment queryset onto the TaskRow columns in one query."""
+    if queryset.model is TaskAssignment:
+        return queryset.values(
+            'pk',
+            task_pk=F('task_id'),
+            task_title=F('task__title'),
+            task_status=F('task__status'),
+            assignment_status=F('status'),
+        )
+    return queryset.values(
+        'pk',
+        task_pk=F('pk'),
+        task_title=F('title'),
+        task_status=F('status'),
+        assignment_status=F('status'),
+    )
+
+
+def paginate_task_rows(queryset: QuerySet, page: int = 1, per_page: int = 5, cursor: str = None) -> Page:
+    return paginate(task_rows(queryset), page, per_page, cursor, row=TaskRow)
@@ -0,0 +1,84 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class UserCache:
+    """
+    Bounded LRU cache of TelegramUser rows keyed by telegram_id.
+
+    Entries expire after `ttl` seconds, which also bounds how long an edit made
+    by another process (e.g. the Django admin) can stay invisible to the bot.
+    Edits made in this process are dropped right away by the signals in
+    robot/signals.py.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 60):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.generation = 0
+        self._users = OrderedDict()
+        self._admins = None
+        self._lock = threading.Lock()
+
+    def get(self, telegram_id):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._users.get(telegram_id)
+            if entry is not None:
+                expires_at, user = entry
+                if expires_at > now:
+                    self._users.move_to_end(telegram_id)
+                    self.hits += 1
+                    return user
+                del self._users[telegram_id]
+            self.misses += 1
+            return None
+
+    def set(self, user, generation=None):
+        # A row read before an invalidation must not be cached after it
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+            self._users[user.telegram_id] = (time.monotonic() + self.ttl, user)
+            self._users.move_to_end(user.telegram_id)
+            while len(self._users) > self.maxsize:
+                self._users.popitem(last=False)
+
+    def get_admins(self):
+        with self._lock:
+            if self._admins is not None and self._admins[0] > time.monotonic():
+                self.hits += 1
+                return self._admins[1]
+            self.misses += 1
+            return None
+
+    def set_admins(self, admins, generation=None):
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+            self._admins = (time.monotonic() + self.ttl, list(admins))
+
+    def invalidate(self, telegram_id=None):
+        with self._lock:
+            self.generation += 1
+            if telegram_id is None:
+                self._users.clear()
+            else:
+                self._users.pop(telegram_id, None)
+            self._admins = None
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'size': len(self._users),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / total if total else 0.0,
+            }
+
+
+user_cache = UserCache()
@@ -1,3 +1,23 @@
-from django.shortcuts import render
+import os
 
-# Create your views here.
+from django.http import JsonResponse
+from django.utils.crypto import constant_time_compare
+from django.views.decorators.http import require_GET
+
+from .schedulers.monitor import health_report
+
+
+def _may_see_health(request) -> bool:
+    # Staff can look from a browser; monitoring sends "Authorization: Bearer <SCHEDULER_HEALTH_TOKEN>"
+    if request.user.is_authenticated and request.user.is_staff:
+        return True
+    token = os.getenv("SCHEDULER_HEALTH_TOKEN")
+    header = request.headers.get("Authorization", "")
+    return bool(token) and constant_time_compare(header, f"Bearer {token}")
+
+
+@require_GET
+def scheduler_health(request):
+    if not _may_see_health(request):
+        return JsonResponse({'error': 'forbidden'}, status=403)
+    return JsonResponse(health_report())